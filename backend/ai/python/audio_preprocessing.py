@@ -0,0 +1,310 @@
+"""
+Audio preprocessing for transcription: recordings are decoded to 16 kHz
+mono with ffmpeg, leading/trailing silence is trimmed, long recordings are
+split at pauses, and each chunk is re-encoded (Opus by default) before it
+is uploaded. transcribe_audio / transcribe_audio_async transcribe the
+chunks concurrently and stitch the texts back together; get_course_codes
+uses them when given an AudioPreprocessing config.
+
+Without a usable ffmpeg the original bytes are uploaded unchanged.
+"""
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from groq import AsyncGroq, Groq
+from pydantic import BaseModel
+
+from planner_tracing import propagate_context
+
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_FRAME_SECONDS = 0.03
+
+# codec name -> (ffmpeg encoder arguments, container / file extension)
+AUDIO_CODECS = {
+    "opus": (("-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-compression_level", "3"), "ogg"),
+    "flac": (("-c:a", "flac", "-compression_level", "8"), "flac"),
+}
+
+
+class AudioPreprocessing(BaseModel):
+    """
+    Settings for transcribe_audio. Silence is any 30 ms frame more than
+    'silence_db' below the loudest frame of the recording.
+    """
+    codec: str = "opus"
+    silence_db: float = -35.0
+    keep_silence_seconds: float = 0.2     # kept before the first / after the last sound
+    min_pause_seconds: float = 0.4        # shortest pause a long recording is split at
+    max_chunk_seconds: float = 60.0
+    max_concurrency: int = 4
+    ffmpeg: Optional[str] = None          # binary; default $FFMPEG_BINARY or "ffmpeg" on PATH
+
+
+class AudioChunk(BaseModel):
+    index: int
+    start_seconds: float
+    end_seconds: float
+    filename: str
+    data: bytes
+
+
+class AudioTranscriptionReport(BaseModel):
+    """
+    Before/after numbers for one transcribe_audio call. 'preprocessed' is
+    False when the original file was uploaded as-is ('note' says why).
+    """
+    preprocessed: bool
+    original_bytes: int
+    uploaded_bytes: int
+    original_seconds: Optional[float] = None
+    processed_seconds: Optional[float] = None
+    chunks: int = 1
+    preprocess_seconds: float = 0.0
+    transcription_seconds: float = 0.0
+    note: Optional[str] = None
+
+
+def transcription_request(audio_file_path: str, audio_bytes: bytes, transcription_model: str, prompt: Optional[str]) -> dict:
+    return dict(
+        file=(audio_file_path, audio_bytes),
+        model=transcription_model,
+        prompt=prompt or "",
+        language="en",
+        temperature=0.0
+    )
+
+
+def ffmpeg_binary(configured: Optional[str] = None) -> Optional[str]:
+    return shutil.which(configured or os.getenv("FFMPEG_BINARY") or "ffmpeg")
+
+
+def _run_ffmpeg(ffmpeg: str, args: List[str], data: Optional[bytes] = None) -> bytes:
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", *args],
+        input=data, stdin=None if data is not None else subprocess.DEVNULL,
+        capture_output=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return result.stdout
+
+
+def decode_audio_pcm(audio_file_path: str, ffmpeg: str) -> bytes:
+    """
+    Any file ffmpeg understands -> 16 kHz mono signed 16-bit little-endian PCM.
+    Reads from the path rather than a pipe: .m4a files often keep their index
+    at the end, which a pipe cannot seek to.
+    """
+    pcm = _run_ffmpeg(
+        ffmpeg, ["-i", audio_file_path, "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "-f", "s16le", "pipe:1"]
+    )
+    if not pcm:
+        raise RuntimeError(f"ffmpeg decoded no audio from {audio_file_path}")
+    return pcm
+
+
+def encode_audio_pcm(pcm: bytes, codec: str, ffmpeg: str) -> bytes:
+    encoder, container = AUDIO_CODECS[codec]
+    return _run_ffmpeg(
+        ffmpeg,
+        ["-f", "s16le", "-ar", str(AUDIO_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0", *encoder, "-f", container, "pipe:1"],
+        pcm,
+    )
+
+
+def _frame_levels(pcm: bytes) -> List[float]:
+    """
+    Mean absolute amplitude of every 30 ms frame.
+    """
+    samples = array("h")
+    samples.frombytes(pcm[: len(pcm) - len(pcm) % 2])
+    if sys.byteorder != "little":
+        samples.byteswap()
+    step = int(AUDIO_SAMPLE_RATE * AUDIO_FRAME_SECONDS)
+    return [sum(map(abs, samples[i:i + step])) / step for i in range(0, len(samples), step)]
+
+
+def _silent_runs(silent: List[bool], start: int, end: int) -> List[tuple]:
+    runs = []
+    run_start = None
+    for i in range(start, end):
+        if silent[i] and run_start is None:
+            run_start = i
+        elif not silent[i] and run_start is not None:
+            runs.append((run_start, i))
+            run_start = None
+    if run_start is not None:
+        runs.append((run_start, end))
+    return runs
+
+
+def plan_audio_chunks(levels: List[float], config: AudioPreprocessing) -> List[tuple]:
+    """
+    Frame levels -> [(first_frame, end_frame), ...]: leading and trailing
+    silence trimmed, then cut into pieces of at most max_chunk_seconds, each
+    cut placed in the middle of the longest pause in the second half of the
+    piece (or an even hard cut when there is none). Empty when all is
+    silence.
+    """
+    loudest = max(levels, default=0.0)
+    if loudest <= 0:
+        return []
+    threshold = loudest * 10 ** (config.silence_db / 20)
+    silent = [level < threshold for level in levels]
+    voiced = [i for i, quiet in enumerate(silent) if not quiet]
+    keep = int(config.keep_silence_seconds / AUDIO_FRAME_SECONDS)
+    start = max(0, voiced[0] - keep)
+    end = min(len(levels), voiced[-1] + 1 + keep)
+
+    max_frames = max(1, int(config.max_chunk_seconds / AUDIO_FRAME_SECONDS))
+    min_pause = max(1, int(config.min_pause_seconds / AUDIO_FRAME_SECONDS))
+    chunks = []
+    while end - start > max_frames:
+        window_start = start + max_frames // 2
+        pauses = [
+            (b - a, a, b) for a, b in _silent_runs(silent, window_start, start + max_frames)
+            if b - a >= min_pause
+        ]
+        if pauses:
+            _, a, b = max(pauses)
+            cut = (a + b) // 2
+        else:
+            pieces = -(-(end - start) // max_frames)
+            cut = start + -(-(end - start) // pieces)
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, end))
+    return chunks
+
+
+def preprocess_audio(audio_file_path: str, config: AudioPreprocessing) -> tuple:
+    """
+    Returns (chunks, report): the recording resampled to 16 kHz mono,
+    trimmed, split at pauses and encoded with config.codec. No chunks means
+    the recording is silent. Raises RuntimeError when ffmpeg is missing or
+    cannot decode the file.
+    """
+    ffmpeg = ffmpeg_binary(config.ffmpeg)
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found")
+    started = time.perf_counter()
+    name = os.path.splitext(os.path.basename(audio_file_path))[0] or "audio"
+    pcm = decode_audio_pcm(audio_file_path, ffmpeg)
+    bytes_per_frame = int(AUDIO_SAMPLE_RATE * AUDIO_FRAME_SECONDS) * 2
+    extension = AUDIO_CODECS[config.codec][1]
+    spans = plan_audio_chunks(_frame_levels(pcm), config)
+
+    def encode(span: tuple) -> bytes:
+        return encode_audio_pcm(pcm[span[0] * bytes_per_frame:span[1] * bytes_per_frame], config.codec, ffmpeg)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(config.max_concurrency, len(spans)))) as pool:
+        encoded = list(pool.map(encode, spans))
+    chunks = [
+        AudioChunk(
+            index=index,
+            start_seconds=first * AUDIO_FRAME_SECONDS,
+            end_seconds=min(end * bytes_per_frame, len(pcm)) / 2 / AUDIO_SAMPLE_RATE,
+            filename=f"{name}.{index}.{extension}",
+            data=data,
+        )
+        for index, ((first, end), data) in enumerate(zip(spans, encoded))
+    ]
+    report = AudioTranscriptionReport(
+        preprocessed=True,
+        original_bytes=os.path.getsize(audio_file_path),
+        uploaded_bytes=sum(len(c.data) for c in chunks),
+        original_seconds=len(pcm) / 2 / AUDIO_SAMPLE_RATE,
+        processed_seconds=sum(c.end_seconds - c.start_seconds for c in chunks),
+        chunks=len(chunks),
+        preprocess_seconds=time.perf_counter() - started,
+    )
+    return chunks, report
+
+
+def _fallback_audio(audio_file_path: str, audio_bytes: bytes, error: Exception) -> tuple:
+    chunk = AudioChunk(
+        index=0, start_seconds=0.0, end_seconds=0.0,
+        filename=os.path.basename(audio_file_path), data=audio_bytes,
+    )
+    report = AudioTranscriptionReport(
+        preprocessed=False, original_bytes=len(audio_bytes), uploaded_bytes=len(audio_bytes),
+        note=f"uploaded unprocessed: {error}",
+    )
+    return [chunk], report
+
+
+def _prepared_audio(audio_file_path: str, audio_bytes: bytes, config: AudioPreprocessing) -> tuple:
+    try:
+        return preprocess_audio(audio_file_path, config)
+    except (RuntimeError, OSError) as e:
+        return _fallback_audio(audio_file_path, audio_bytes, e)
+
+
+def _stitch_transcripts(texts: List[str]) -> str:
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+def transcribe_audio(
+    client: Groq,
+    audio_file_path: str,
+    audio_bytes: bytes,
+    transcription_model: str = "whisper-large-v3-turbo",
+    prompt: Optional[str] = None,
+    config: Optional[AudioPreprocessing] = None,
+) -> tuple:
+    """
+    Preprocesses the recording (see preprocess_audio), transcribes its chunks
+    concurrently and joins the texts in order. Returns (text, report).
+    Without a usable ffmpeg the original bytes are uploaded unchanged.
+    """
+    config = config or AudioPreprocessing()
+    chunks, report = _prepared_audio(audio_file_path, audio_bytes, config)
+    started = time.perf_counter()
+
+    def transcribe(chunk: AudioChunk) -> str:
+        return client.audio.transcriptions.create(
+            **transcription_request(chunk.filename, chunk.data, transcription_model, prompt)
+        ).text or ""
+
+    if len(chunks) <= 1:
+        texts = [transcribe(c) for c in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(config.max_concurrency, len(chunks)))) as pool:
+            texts = list(pool.map(propagate_context(transcribe), chunks))
+    report.transcription_seconds = time.perf_counter() - started
+    return _stitch_transcripts(texts), report
+
+
+async def transcribe_audio_async(
+    client: AsyncGroq,
+    audio_file_path: str,
+    audio_bytes: bytes,
+    transcription_model: str = "whisper-large-v3-turbo",
+    prompt: Optional[str] = None,
+    config: Optional[AudioPreprocessing] = None,
+) -> tuple:
+    """
+    asyncio version of transcribe_audio; ffmpeg runs in a worker thread.
+    """
+    config = config or AudioPreprocessing()
+    chunks, report = await asyncio.to_thread(_prepared_audio, audio_file_path, audio_bytes, config)
+    started = time.perf_counter()
+    limit = asyncio.Semaphore(max(1, config.max_concurrency))
+
+    async def transcribe(chunk: AudioChunk) -> str:
+        async with limit:
+            response = await client.audio.transcriptions.create(
+                **transcription_request(chunk.filename, chunk.data, transcription_model, prompt)
+            )
+        return response.text or ""
+
+    texts = await asyncio.gather(*(transcribe(c) for c in chunks))
+    report.transcription_seconds = time.perf_counter() - started
+    return _stitch_transcripts(texts), report
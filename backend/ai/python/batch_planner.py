@@ -0,0 +1,349 @@
+"""
+Batch planning: runs the course_planner pipeline for many students at once.
+
+    python batch_planner.py inputs.jsonl -o results.jsonl --workers 8 --rpm 30 --tpm 6000
+
+Each input line is a JSON object with an "id" and either "raw_text" or
+"audio_path". Every item goes through get_course_codes, the department
+scrape and generate_schedules on a worker pool. Groq calls share a
+token-bucket limiter for requests/minute and tokens/minute, and each
+department is scraped at most once per batch. One JSON line per item is
+written as soon as it finishes (completion order), with per-stage timings.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from groq import Groq
+
+from course_planner import (
+    CatalogCache,
+    CourseCodeIndex,
+    HostRateLimiter,
+    ScheduleCourse,
+    estimate_tokens,
+    fetch_courses_for_department,
+    generate_schedules,
+    get_course_codes,
+    normalize_course_code,
+)
+
+DEFAULT_CODES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "js", "all_carleton_course_codes.txt"
+)
+
+
+# ----------------------------------------------------------------------
+# 1) RATE LIMITING for Groq
+# ----------------------------------------------------------------------
+class TokenBucket:
+    """
+    Classic token bucket: 'capacity' units, refilled continuously at
+    'per_minute' units per minute. take() blocks until enough units exist.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._level = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                wait = (amount - self._level) / self.rate
+            self._sleep(wait)
+
+    def adjust(self, delta: float) -> None:
+        """
+        Returns (delta > 0) or charges (delta < 0) units after the fact, e.g.
+        once the real token usage of a call is known. The level may go
+        negative, which delays the next callers.
+        """
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + delta)
+
+
+class GroqRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by all workers.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens: int) -> None:
+        self.requests.take(1)
+        self.tokens.take(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is not None:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+
+class _Namespace:
+    pass
+
+
+class RateLimitedGroq:
+    """
+    Wraps a Groq client so that chat.completions.create and
+    audio.transcriptions.create go through a GroqRateLimiter. Chat calls are
+    charged an estimate up front and corrected from the response's usage.
+    """
+
+    def __init__(self, client: Groq, limiter: GroqRateLimiter, completion_tokens: int = 1024,
+                 transcription_tokens: int = 0):
+        self._client = client
+        self._limiter = limiter
+        self._completion_tokens = completion_tokens
+        self._transcription_tokens = transcription_tokens
+        self.chat = _Namespace()
+        self.chat.completions = _Namespace()
+        self.chat.completions.create = self._chat_create
+        self.audio = _Namespace()
+        self.audio.transcriptions = _Namespace()
+        self.audio.transcriptions.create = self._transcribe
+
+    def _chat_create(self, **kwargs):
+        estimate = sum(estimate_tokens(m["content"]) for m in kwargs.get("messages", [])) + self._completion_tokens
+        self._limiter.acquire(estimate)
+        response = self._client.chat.completions.create(**kwargs)
+        usage = getattr(response, "usage", None)
+        self._limiter.settle(estimate, getattr(usage, "total_tokens", None))
+        return response
+
+    def _transcribe(self, **kwargs):
+        self._limiter.acquire(self._transcription_tokens)
+        return self._client.audio.transcriptions.create(**kwargs)
+
+
+# ----------------------------------------------------------------------
+# 2) SHARED DEPARTMENT SCRAPES (once per batch)
+# ----------------------------------------------------------------------
+class DepartmentScrapes:
+    """
+    Single-flight department scraping: the first student needing a
+    department triggers the scrape, everyone else waits on the same result.
+    A failed scrape is raised to the callers waiting for it and forgotten,
+    so the next caller tries again.
+    """
+
+    def __init__(self, term_code: str = "202510", cache: Optional[CatalogCache] = None,
+                 min_request_interval: float = 0.25, session: Optional[requests.Session] = None):
+        self.term_code = term_code
+        self.cache = cache
+        self._owns_session = session is None
+        self.session = session if session is not None else requests.Session()
+        self.rate_limiter = HostRateLimiter(min_request_interval)
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.scrapes = 0
+
+    def get(self, department: str) -> List[ScheduleCourse]:
+        department = department.upper()
+        with self._lock:
+            future = self._futures.get(department)
+            owner = future is None
+            if owner:
+                future = self._futures[department] = Future()
+                self.scrapes += 1
+        if owner:
+            try:
+                future.set_result(fetch_courses_for_department(
+                    department, self.term_code, cache=self.cache,
+                    session=self.session, rate_limiter=self.rate_limiter,
+                ))
+            except Exception as e:
+                with self._lock:
+                    del self._futures[department]
+                future.set_exception(e)
+        return future.result()
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+
+# ----------------------------------------------------------------------
+# 3) ONE ITEM THROUGH THE PIPELINE
+# ----------------------------------------------------------------------
+def plan_item(
+    item: dict,
+    client,
+    code_index: CourseCodeIndex,
+    scrapes: DepartmentScrapes,
+    engine: str = "llm",
+    context_encoding: str = "compact",
+    top_k: Optional[int] = None,
+) -> dict:
+    """
+    Runs get_course_codes -> department scrape -> generate_schedules for one
+    input and returns its result record (never raises). With engine="solver",
+    'top_k' keeps only the best-ranked schedules. A department that cannot be
+    scraped is listed in "scrape_errors" and planning goes on without it, as
+    in fetch_courses_for_departments.
+    """
+    timings = {}
+    result = {"id": item.get("id"), "status": "error"}
+    started = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        codes = get_course_codes(
+            client=client,
+            allowed_codes=code_index,
+            audio_file_path=item.get("audio_path"),
+            raw_text=item.get("raw_text"),
+            model=item.get("extraction_model", "llama-3.1-8b-instant"),
+        )
+        timings["extract"] = time.perf_counter() - t
+        result["course_codes"] = codes.model_dump()
+        if codes.status == "error":
+            result["error"] = codes.requested_input
+            return result
+
+        mandatory = [c.course_code for c in codes.mandatory]
+        electives = [c.course_code for c in codes.electives]
+        wanted = {normalize_course_code(c) for c in mandatory + electives}
+
+        t = time.perf_counter()
+        departments = sorted({m.group(1) for c in wanted if (m := re.match(r"([A-Z]+)", c))})
+        sections, scrape_errors = [], {}
+        for dept in departments:
+            try:
+                sections += [s for s in scrapes.get(dept) if normalize_course_code(s.course_code) in wanted]
+            except Exception as e:
+                scrape_errors[dept] = f"{type(e).__name__}: {e}"
+        if scrape_errors:
+            result["scrape_errors"] = scrape_errors
+        timings["scrape"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        schedules = generate_schedules(
+            client=client,
+            md_file_path="",
+            mandatory_courses=mandatory,
+            elective_courses=electives,
+            special_requests=codes.special_request,
+            engine=engine,
+            courses=sections,
+            context_encoding=context_encoding,
+            top_k=top_k,
+        )
+        timings["generate"] = time.perf_counter() - t
+        result["schedules"] = schedules.model_dump()
+        result["status"] = schedules.status
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        timings["total"] = time.perf_counter() - started
+        result["timings"] = {k: round(v, 4) for k, v in timings.items()}
+    return result
+
+
+def run_batch(
+    items: List[dict],
+    out,
+    client,
+    code_index: CourseCodeIndex,
+    workers: int = 8,
+    requests_per_minute: float = 30,
+    tokens_per_minute: float = 6000,
+    engine: str = "llm",
+    context_encoding: str = "compact",
+    cache: Optional[CatalogCache] = None,
+    top_k: Optional[int] = None,
+) -> dict:
+    """
+    Plans every item on a pool of 'workers' threads and writes one JSON line
+    per item to 'out' in completion order. Returns a small summary.
+    """
+    limited = RateLimitedGroq(client, GroqRateLimiter(requests_per_minute, tokens_per_minute))
+    scrapes = DepartmentScrapes(cache=cache)
+    ok = 0
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(plan_item, item, limited, code_index, scrapes, engine, context_encoding, top_k)
+                for item in items
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                ok += record["status"] == "success"
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        scrapes.close()
+    return {
+        "items": len(items),
+        "succeeded": ok,
+        "department_scrapes": scrapes.scrapes,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def read_jsonl(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", help="JSONL file of {id, raw_text | audio_path}")
+    ap.add_argument("-o", "--output", default="-", help="output JSONL (default: stdout)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--rpm", type=float, default=30, help="Groq requests per minute")
+    ap.add_argument("--tpm", type=float, default=6000, help="Groq tokens per minute")
+    ap.add_argument("--engine", choices=["llm", "solver"], default="llm")
+    ap.add_argument("--context", choices=["markdown", "compact"], default="compact")
+    ap.add_argument("--top-k", type=int, help="keep the k best-ranked solver schedules per item")
+    ap.add_argument("--codes", default=DEFAULT_CODES_FILE, help="allowed course codes file")
+    ap.add_argument("--cache", default="catalog_cache.sqlite3", help="catalog cache path ('' to disable)")
+    args = ap.parse_args()
+
+    load_dotenv()
+    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    code_index = CourseCodeIndex.from_file(args.codes)
+    cache = CatalogCache(args.cache) if args.cache else None
+    items = read_jsonl(args.inputs)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = run_batch(
+            items, out, client, code_index,
+            workers=args.workers, requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+            engine=args.engine, context_encoding=args.context, cache=cache, top_k=args.top_k,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Helpers for Banner course-search HTML fixtures used by the benchmarks.
+
+Fixtures live in benchmarks/fixtures/banner/<DEPT>.html. They can be recorded
+from the live site (record_fixture) or, when offline, synthesized in the same
+row layout the scraper parses (render_course_search_html). The checked-in
+fixtures were written by write_sample_fixtures: the real sections from
+scraped_courses.md padded with synthetic ones.
+"""
+import os
+import sys
+from html import escape
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course_planner import (  # noqa: E402
+    ScheduleCourse,
+    fetch_course_search_html,
+    normalize_course_code,
+    read_courses_markdown,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures", "banner")
+SAMPLE_MARKDOWN = os.path.join(os.path.dirname(HERE), "scraped_courses.md")
+
+
+def fixture_path(department: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{department.upper()}.html")
+
+
+def record_fixture(department: str, term_code: str = "202510") -> str:
+    """
+    Saves the live Banner results page for 'department' as a fixture.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = fixture_path(department)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(fetch_course_search_html(department, term_code))
+    return path
+
+
+def load_fixtures() -> Dict[str, str]:
+    """
+    {department: html} for every saved fixture.
+    """
+    if not os.path.isdir(FIXTURE_DIR):
+        return {}
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+                fixtures[name[:-5]] = f.read()
+    return fixtures
+
+
+def render_course_search_html(courses: List[ScheduleCourse]) -> str:
+    """
+    Renders sections as a Banner results table: a main row with 11 cells,
+    then "Meeting Date", "Also Register in" and "Section Information" rows.
+    """
+    out = ["<html><body><table>"]
+    for n, c in enumerate(courses):
+        color = "#C0C0C0" if n % 2 else "#DCDCDC"
+        cells = [
+            "", c.status, c.crn, c.course_code, c.section, c.course_title,
+            f"{c.credits:.3f}", c.schedule_type, "No", "", c.instructor,
+        ]
+        out.append(
+            f'<tr bgcolor="{color}">'
+            + "".join(f"<td>{escape(x)}</td>" for x in cells)
+            + "</tr>"
+        )
+        out.append(
+            f'<tr bgcolor="{color}"><td colspan="2"></td><td colspan="9">'
+            f"<b>Meeting Date:</b> Sep 04, 2024 to Dec 06, 2024 "
+            f"<b>Days:</b> {escape(c.day)} <b>Time:</b> {c.start_time} - {c.end_time} "
+            f"<b>Building:</b> TBA <b>Room:</b> TBA</td></tr>"
+        )
+        if c.also_register_in:
+            out.append(
+                f'<tr bgcolor="{color}"><td colspan="2"></td><td colspan="9">'
+                f"<b>Also Register in:</b> {escape(c.also_register_in)}</td></tr>"
+            )
+        out.append(
+            f'<tr bgcolor="{color}"><td colspan="2"></td><td colspan="9">'
+            f"<b>Section Information:</b> Precludes additional credit.</td></tr>"
+        )
+    out.append("</table></body></html>")
+    return "\n".join(out)
+
+
+def synthetic_department(department: str, sections: int, crn_start: int = 30000) -> List[ScheduleCourse]:
+    """
+    Builds 'sections' plausible sections for 'department' by cycling the
+    sample rows in scraped_courses.md under new course numbers and CRNs
+    numbered from 'crn_start'.
+    """
+    sample = read_courses_markdown(SAMPLE_MARKDOWN)
+    courses = []
+    for n in range(sections):
+        base = sample[n % len(sample)]
+        number = 1000 + (n // len(sample)) * 5
+        courses.append(base.model_copy(update={
+            "crn": str(crn_start + n),
+            "course_code": f"{department} {number}",
+            "also_register_in": (
+                base.also_register_in.replace(base.course_code, f"{department} {number}")
+                if base.also_register_in else None
+            ),
+        }))
+    return courses
+
+
+def write_sample_fixtures(sections_per_department: int = 120, departments: Optional[List[str]] = None) -> List[str]:
+    """
+    Writes an offline fixture for every department in scraped_courses.md
+    (or 'departments'): its real sample sections, padded with
+    synthetic_department rows up to 'sections_per_department'. Each
+    department gets its own CRN block, so CRNs stay unique across fixtures
+    as they are within a Banner term.
+    """
+    sample = read_courses_markdown(SAMPLE_MARKDOWN)
+    by_department: Dict[str, List[ScheduleCourse]] = {}
+    for course in sample:
+        department = normalize_course_code(course.course_code).rstrip("0123456789")
+        by_department.setdefault(department, []).append(course)
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    paths = []
+    crn_block = max(1000, sections_per_department)
+    for i, department in enumerate(departments or sorted(by_department)):
+        courses = list(by_department.get(department.upper(), []))
+        padding = max(0, sections_per_department - len(courses))
+        courses += synthetic_department(department.upper(), padding, crn_start=30000 + i * crn_block)
+        path = fixture_path(department)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_course_search_html(courses))
+        paths.append(path)
+    return paths
@@ -0,0 +1,93 @@
+"""
+Compares uploading recordings as-is with the transcribe_audio preprocessing
+(16 kHz mono, silence trimmed, split at pauses, compact codec).
+
+    python benchmarks/bench_audio.py                           # test2.m4a + test3.m4a against groq_stub
+    python benchmarks/bench_audio.py --max-chunk-seconds 4     # force chunking on the short samples
+    python benchmarks/bench_audio.py --live                    # real Groq (GROQ_API_KEY)
+
+Needs ffmpeg on PATH or in $FFMPEG_BINARY; without it the "processed" rows
+show the unprocessed fallback. Against the stub, transcription latency is
+--latency plus --latency-per-mb for every uploaded megabyte.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from groq import Groq
+
+from audio_preprocessing import AudioPreprocessing, ffmpeg_binary, transcribe_audio, transcription_request
+from banner_fixtures import HERE
+from groq_stub import StubGroqServer
+
+SAMPLES = [os.path.join(os.path.dirname(HERE), name) for name in ("test2.m4a", "test3.m4a")]
+
+
+def transcribe_raw(client, path: str, model: str) -> dict:
+    with open(path, "rb") as f:
+        audio_bytes = f.read()
+    started = time.perf_counter()
+    text = client.audio.transcriptions.create(**transcription_request(path, audio_bytes, model, None)).text
+    return {"uploaded_bytes": len(audio_bytes), "chunks": 1, "preprocess_s": 0.0,
+            "transcription_s": time.perf_counter() - started, "text": text}
+
+
+def transcribe_processed(client, path: str, model: str, config: AudioPreprocessing) -> dict:
+    with open(path, "rb") as f:
+        audio_bytes = f.read()
+    text, report = transcribe_audio(client, path, audio_bytes, model, None, config)
+    return {"uploaded_bytes": report.uploaded_bytes, "chunks": report.chunks,
+            "preprocess_s": report.preprocess_seconds, "transcription_s": report.transcription_seconds,
+            "text": text, "note": report.note}
+
+
+def run(client, args) -> list:
+    config = AudioPreprocessing(codec=args.codec, max_chunk_seconds=args.max_chunk_seconds)
+    rows = []
+    for path in args.files:
+        size = os.path.getsize(path)
+        for mode in ("raw", "processed"):
+            result = transcribe_raw(client, path, args.model) if mode == "raw" \
+                else transcribe_processed(client, path, args.model, config)
+            rows.append({"file": os.path.basename(path), "mode": mode, "original_bytes": size, **result})
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", default=SAMPLES)
+    ap.add_argument("--codec", default="opus")
+    ap.add_argument("--max-chunk-seconds", type=float, default=60.0)
+    ap.add_argument("--model", default="whisper-large-v3-turbo")
+    ap.add_argument("--live", action="store_true", help="use the real Groq API instead of groq_stub")
+    ap.add_argument("--latency", type=float, default=0.05, help="stub seconds per transcription request")
+    ap.add_argument("--latency-per-mb", type=float, default=2.0, help="stub seconds per uploaded MB")
+    ap.add_argument("-o", "--output", help="also write the rows as JSON")
+    args = ap.parse_args()
+
+    print(f"ffmpeg: {ffmpeg_binary() or 'not found'}")
+    if args.live:
+        from dotenv import load_dotenv
+        load_dotenv()
+        rows = run(Groq(api_key=os.getenv("GROQ_API_KEY")), args)
+    else:
+        with StubGroqServer(transcription_latency=args.latency,
+                            transcription_latency_per_mb=args.latency_per_mb) as stub:
+            rows = run(Groq(api_key="stub", base_url=stub.base_url, max_retries=0), args)
+
+    print(f"{'file':<11}{'mode':<11}{'bytes':>9}{'uploaded':>10}{'chunks':>7}{'prep s':>8}{'asr s':>8}")
+    for row in rows:
+        print(f"{row['file']:<11}{row['mode']:<11}{row['original_bytes']:>9}{row['uploaded_bytes']:>10}"
+              f"{row['chunks']:>7}{row['preprocess_s']:>8.3f}{row['transcription_s']:>8.3f}")
+        if row.get("note"):
+            print(f"  {row['note']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Token-count report for the generate_schedules course context encodings.
+
+    python benchmarks/bench_context.py [path/to/scraped_courses.md]
+
+Prints the markdown vs compact sizes and checks that the compact encoding
+decodes back to the same sections.
+"""
+import json
+import sys
+
+from banner_fixtures import SAMPLE_MARKDOWN
+from course_planner import (
+    context_token_report,
+    decode_courses_compact,
+    encode_courses_compact,
+    read_courses_markdown,
+)
+
+
+def main() -> int:
+    path = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_MARKDOWN
+    courses = read_courses_markdown(path)
+    print(json.dumps(context_token_report(courses), indent=2))
+
+    decoded = decode_courses_compact(encode_courses_compact(courses))
+    if sorted(decoded, key=lambda c: c.crn) != sorted(courses, key=lambda c: c.crn):
+        print("MISMATCH: compact encoding does not round-trip")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
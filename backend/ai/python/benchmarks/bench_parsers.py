@@ -0,0 +1,71 @@
+"""
+Benchmarks the Banner HTML parser backends against each other.
+
+    python benchmarks/bench_parsers.py                # saved fixtures, else synthetic
+    python benchmarks/bench_parsers.py --record BUSI LAWS PSYC
+    python benchmarks/bench_parsers.py --synthetic 2000
+
+Every backend must produce exactly the same ScheduleCourse list; the script
+exits non-zero if they differ. Reports parsed rows per second per backend.
+"""
+import argparse
+import sys
+import time
+
+from banner_fixtures import (
+    load_fixtures,
+    record_fixture,
+    render_course_search_html,
+    synthetic_department,
+)
+from course_planner import HTML_PARSERS, lxml_html, parse_course_search_html
+
+LARGE_DEPARTMENTS = {"BUSI": 1800, "LAWS": 900, "PSYC": 1400}
+
+
+def bench(html: str, parser: str, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        courses = parse_course_search_html(html, parser=parser)
+        best = min(best, time.perf_counter() - start)
+    return courses, best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--record", nargs="+", metavar="DEPT", help="save live pages as fixtures first")
+    ap.add_argument("--synthetic", type=int, metavar="N", help="ignore fixtures; use N synthetic sections per department")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.record:
+        for dept in args.record:
+            print(f"recorded {record_fixture(dept)}")
+
+    pages = {} if args.synthetic else load_fixtures()
+    if not pages:
+        pages = {
+            dept: render_course_search_html(synthetic_department(dept, args.synthetic or size))
+            for dept, size in LARGE_DEPARTMENTS.items()
+        }
+        print("using synthetic pages (no fixtures in benchmarks/fixtures/banner)")
+
+    parsers = [p for p in HTML_PARSERS if p != "lxml" or lxml_html is not None]
+    ok = True
+    print(f"{'dept':<6}{'parser':<8}{'rows':>7}{'seconds':>10}{'rows/s':>12}")
+    for dept, html in pages.items():
+        reference = None
+        for parser in parsers:
+            courses, seconds = bench(html, parser, args.repeat)
+            print(f"{dept:<6}{parser:<8}{len(courses):>7}{seconds:>10.4f}{len(courses) / seconds:>12.0f}")
+            if reference is None:
+                reference = courses
+            elif courses != reference:
+                print(f"  MISMATCH: {parser} differs from {parsers[0]} on {dept}")
+                ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Offline end-to-end benchmark of the course_planner pipeline.
+
+    python benchmarks/bench_pipeline.py                      # writes benchmarks/results/<commit>-<time>.json
+    python benchmarks/bench_pipeline.py --chat-latency 0.3 --repeat 10
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/old.json
+
+Stages (each timed 'repeat' times; min / median / mean seconds are kept):
+- scrape_parse:        parse_course_search_html over every Banner fixture
+- markdown_write:      encode_courses_markdown + writing scraped_courses.md
+- prompt_build:        extraction and schedule prompts (markdown and compact)
+- response_validation: pydantic validation of the canned model answers
+- pipeline_text:       get_course_codes -> scrape -> generate_schedules
+- pipeline_audio:      the same starting from test2.m4a
+
+The pipeline stages talk to groq_stub (fake Groq + Banner on localhost), so
+their numbers are our own overhead plus the configured stub latency.
+--compare exits non-zero when a stage's median is more than --threshold
+times slower than in the given result file.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+from groq import Groq
+
+from banner_fixtures import HERE, SAMPLE_MARKDOWN, load_fixtures, write_sample_fixtures
+from course_planner import (
+    CourseCodeIndex,
+    GenerateSchedulesResponse,
+    GetCourseCodesResponse,
+    course_codes_messages,
+    encode_courses_compact,
+    encode_courses_markdown,
+    fetch_courses_for_departments,
+    generate_schedules,
+    get_course_codes,
+    normalize_course_code,
+    parse_course_search_html,
+    read_courses_markdown,
+    schedule_messages,
+)
+from groq_stub import SAMPLE_TRANSCRIPT, StubGroqServer, default_responses
+
+RESULTS_DIR = os.path.join(HERE, "results")
+AUDIO_SAMPLE = os.path.join(os.path.dirname(HERE), "test2.m4a")
+CODES_FILE = os.path.join(os.path.dirname(HERE), "..", "js", "all_carleton_course_codes.txt")
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "repeat": repeat,
+    }
+
+
+def run_pipeline(client, code_index: CourseCodeIndex, banner_url: str, raw_text: str = "",
+                 audio_file_path: str = "", md_path: str = "") -> GenerateSchedulesResponse:
+    """
+    The MAIN USAGE flow of course_planner.py against the stub, without any
+    caches or the local fast path, so every call reaches the "API".
+    """
+    codes = get_course_codes(
+        client=client, allowed_codes=code_index, audio_file_path=audio_file_path,
+        raw_text=raw_text, fast_path=False,
+    )
+    if codes.status == "error":
+        raise RuntimeError(codes.requested_input)
+    wanted = [c.course_code for c in codes.mandatory + codes.electives]
+    departments = sorted({normalize_course_code(c).rstrip("0123456789") for c in wanted})
+    keys = {normalize_course_code(c) for c in wanted}
+    courses = [
+        c for result in fetch_courses_for_departments(departments, url=banner_url)
+        for c in result.courses if normalize_course_code(c.course_code) in keys
+    ]
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(encode_courses_markdown(courses))
+    schedules = generate_schedules(
+        client=client, md_file_path=md_path,
+        mandatory_courses=[c.course_code for c in codes.mandatory],
+        elective_courses=[c.course_code for c in codes.electives],
+        special_requests=codes.special_request, courses=courses,
+    )
+    if schedules.status == "error":
+        raise RuntimeError("generate_schedules failed")
+    return schedules
+
+
+def run_benchmarks(args) -> dict:
+    fixtures = load_fixtures()
+    if not fixtures:
+        write_sample_fixtures()
+        fixtures = load_fixtures()
+    parsed = {dept: parse_course_search_html(html) for dept, html in fixtures.items()}
+    all_courses = [c for courses in parsed.values() for c in courses]
+    sample = read_courses_markdown(SAMPLE_MARKDOWN)
+    code_index = CourseCodeIndex.from_file(CODES_FILE) if os.path.exists(CODES_FILE) \
+        else CourseCodeIndex(normalize_course_code(c.course_code) for c in all_courses)
+    responses = default_responses()
+    mandatory = ["COMP 1405", "COMP 1805", "MATH 1007", "BIOL 1902", "PSYC 1001"]
+    tmp = tempfile.mkdtemp(prefix="bench_pipeline_")
+    md_path = os.path.join(tmp, "scraped_courses.md")
+
+    def write_markdown():
+        with open(md_path, "w", encoding="utf-8") as f:
+            f.write(encode_courses_markdown(all_courses))
+
+    def build_prompts():
+        course_codes_messages(SAMPLE_TRANSCRIPT, code_index)
+        schedule_messages(mandatory, [], None, encode_courses_markdown(sample), "markdown")
+        schedule_messages(mandatory, [], None, encode_courses_compact(sample), "compact")
+
+    def validate_responses():
+        GetCourseCodesResponse.model_validate_json(responses["extraction"])
+        GenerateSchedulesResponse.model_validate_json(responses["schedules"])
+
+    stages = {
+        "scrape_parse": timed(lambda: [parse_course_search_html(h) for h in fixtures.values()], args.repeat),
+        "markdown_write": timed(write_markdown, args.repeat),
+        "prompt_build": timed(build_prompts, args.repeat),
+        "response_validation": timed(validate_responses, args.repeat),
+    }
+    stages["scrape_parse"]["rows"] = len(all_courses)
+
+    with StubGroqServer(
+        transcription_latency=args.transcription_latency,
+        chat_latency=args.chat_latency,
+        banner_latency=args.banner_latency,
+        responses=responses,
+        fixtures=fixtures,
+    ) as stub:
+        client = Groq(api_key="stub", base_url=stub.base_url, max_retries=0)
+        stages["pipeline_text"] = timed(
+            lambda: run_pipeline(client, code_index, stub.banner_url, raw_text=SAMPLE_TRANSCRIPT, md_path=md_path),
+            args.repeat,
+        )
+        if os.path.exists(AUDIO_SAMPLE):
+            stages["pipeline_audio"] = timed(
+                lambda: run_pipeline(client, code_index, stub.banner_url, audio_file_path=AUDIO_SAMPLE, md_path=md_path),
+                args.repeat,
+            )
+        calls = dict(stub.calls)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "repeat": args.repeat,
+            "transcription_latency": args.transcription_latency,
+            "chat_latency": args.chat_latency,
+            "banner_latency": args.banner_latency,
+            "fixtures": {dept: len(courses) for dept, courses in parsed.items()},
+        },
+        "stub_calls": calls,
+        "stages": stages,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Prints median ratios per stage; False if any stage regressed.
+    """
+    ok = True
+    print(f"\n{'stage':<22}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for stage, result in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        ok = ok and not flag
+        print(f"{stage:<22}{old['median']:>12.5f}{result['median']:>12.5f}{ratio:>8.2f}{flag}")
+    return ok
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--transcription-latency", type=float, default=0.0, help="stub latency in seconds")
+    ap.add_argument("--chat-latency", type=float, default=0.0, help="stub latency in seconds")
+    ap.add_argument("--banner-latency", type=float, default=0.0, help="stub latency in seconds")
+    ap.add_argument("-o", "--output", help="result JSON path (default: benchmarks/results/<commit>-<time>.json)")
+    ap.add_argument("--compare", metavar="RESULT_JSON", help="baseline result to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2, help="allowed median slowdown for --compare")
+    args = ap.parse_args()
+
+    result = run_benchmarks(args)
+    print(f"{'stage':<22}{'min s':>10}{'median s':>10}{'mean s':>10}")
+    for stage, r in result["stages"].items():
+        print(f"{stage:<22}{r['min']:>10.5f}{r['median']:>10.5f}{r['mean']:>10.5f}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{result['commit']}-{result['timestamp'].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            if not compare(result, json.load(f), args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Benchmarks schedule_ranking at 10k and 100k candidate schedules.
+
+    python benchmarks/bench_ranking.py [--sizes 10000 100000] [--k 10]
+
+Candidates are random 8-section combinations of the sections in
+scraped_courses.md; only scoring speed is measured, so conflicts between
+them do not matter.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from banner_fixtures import SAMPLE_MARKDOWN
+from course_planner import read_courses_markdown
+from schedule_ranking import ScheduleRanker
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--sections", type=int, default=8, help="sections per candidate")
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    sections = read_courses_markdown(SAMPLE_MARKDOWN)
+    ranker = ScheduleRanker(sections)
+    rng = np.random.default_rng(0)
+    print(f"{'candidates':>11}{'pack s':>10}{'top-k s':>10}{'cand/s':>14}")
+    for size in args.sizes:
+        candidates = rng.integers(0, len(sections), size=(size, args.sections)).tolist()
+        start = time.perf_counter()
+        matrix = ranker.pack(candidates)
+        packed = time.perf_counter()
+        ranker.top_k(matrix, args.k)
+        ranked = time.perf_counter()
+        print(f"{size:>11}{packed - start:>10.4f}{ranked - packed:>10.4f}{size / (ranked - packed):>14.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the Groq API (and the Banner course search) so the whole
+pipeline can run offline.
+
+    python benchmarks/groq_stub.py --port 8765 --chat-latency 0.4
+
+Serves:
+- POST /openai/v1/audio/transcriptions   -> {"text": <canned transcript>}
+- POST /openai/v1/chat/completions       -> canned extraction or schedule JSON,
+                                           picked from the system prompt; with
+                                           "stream": true it answers as SSE
+- POST /banner                           -> the saved fixture for sel_subj
+
+Point a client at it with Groq(api_key="stub", base_url=server.base_url) and
+pass url=server.banner_url to the scraper functions. Latencies are per
+endpoint, in seconds, and are slept before answering; transcriptions can
+also be charged per uploaded megabyte to mimic upload/decode cost.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl
+
+from banner_fixtures import SAMPLE_MARKDOWN, load_fixtures
+from course_planner import estimate_tokens, read_courses_markdown, solve_schedules
+
+SAMPLE_TRANSCRIPT = (
+    "I want to mandatory register COMP 1405, COMP 1805, MATH 1007, BIOL1902, PSYC1001"
+)
+
+
+def default_responses() -> Dict[str, str]:
+    """
+    Canned bodies: the transcript, an extraction for SAMPLE_TRANSCRIPT and
+    three solver schedules over scraped_courses.md.
+    """
+    mandatory = ["COMP 1405", "COMP 1805", "MATH 1007", "BIOL 1902", "PSYC 1001"]
+    schedules = solve_schedules(read_courses_markdown(SAMPLE_MARKDOWN), mandatory, [], max_schedules=3)
+    return {
+        "transcription": SAMPLE_TRANSCRIPT,
+        "extraction": json.dumps({
+            "status": "success",
+            "requested_input": SAMPLE_TRANSCRIPT,
+            "mandatory": [{"course_code": c.replace(" ", "")} for c in mandatory],
+            "electives": [],
+            "special_request": "",
+        }),
+        "schedules": schedules.model_dump_json(),
+    }
+
+
+class StubGroqServer:
+    """
+    Threaded HTTP server on 127.0.0.1; use as a context manager.
+    'calls' counts requests per endpoint.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        transcription_latency: float = 0.0,
+        chat_latency: float = 0.0,
+        banner_latency: float = 0.0,
+        responses: Optional[Dict[str, str]] = None,
+        fixtures: Optional[Dict[str, str]] = None,
+        transcription_latency_per_mb: float = 0.0,
+    ):
+        self.latency = {"transcription": transcription_latency, "chat": chat_latency, "banner": banner_latency}
+        self.transcription_latency_per_mb = transcription_latency_per_mb
+        self.responses = responses or default_responses()
+        self.fixtures = fixtures if fixtures is not None else load_fixtures()
+        self.calls = {"transcription": 0, "chat": 0, "banner": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def banner_url(self) -> str:
+        return self.base_url + "/banner"
+
+    def start(self) -> "StubGroqServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubGroqServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, endpoint: str, extra_latency: float = 0.0) -> None:
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency[endpoint] + extra_latency:
+            time.sleep(self.latency[endpoint] + extra_latency)
+
+    def _chat_body(self, request: dict) -> tuple:
+        system = next((m["content"] for m in request.get("messages", []) if m["role"] == "system"), "")
+        content = self.responses["extraction" if "course code extraction" in system else "schedules"]
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in request.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": estimate_tokens(content),
+            "total_tokens": prompt_tokens + estimate_tokens(content),
+        }
+        return content, usage
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.endswith("/audio/transcriptions"):
+                    stub._count("transcription", stub.transcription_latency_per_mb * len(body) / 1e6)
+                    self._send(200, json.dumps({"text": stub.responses["transcription"]}).encode())
+                elif self.path.endswith("/chat/completions"):
+                    stub._count("chat")
+                    self._chat(json.loads(body or b"{}"))
+                elif self.path.startswith("/banner"):
+                    stub._count("banner")
+                    subjects = [v for k, v in parse_qsl(body.decode()) if k == "sel_subj" and v != "dummy"]
+                    html = stub.fixtures.get(subjects[-1].upper() if subjects else "", "<html></html>")
+                    self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+                else:
+                    self._send(404, b'{"error": "not found"}')
+
+            def _chat(self, request: dict):
+                content, usage = stub._chat_body(request)
+                created = int(time.time())
+                model = request.get("model", "stub")
+                if not request.get("stream"):
+                    self._send(200, json.dumps({
+                        "id": "chatcmpl-stub", "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": usage,
+                    }).encode())
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                step = 64
+                for i in range(0, len(content), step):
+                    chunk = {
+                        "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--transcription-latency", type=float, default=0.0)
+    ap.add_argument("--chat-latency", type=float, default=0.0)
+    ap.add_argument("--banner-latency", type=float, default=0.0)
+    ap.add_argument("--transcription-latency-per-mb", type=float, default=0.0)
+    ap.add_argument("--responses", help="JSON file overriding the canned transcription/extraction/schedules")
+    args = ap.parse_args()
+
+    responses = default_responses()
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses.update(json.load(f))
+    server = StubGroqServer(
+        args.port, args.transcription_latency, args.chat_latency, args.banner_latency, responses,
+        transcription_latency_per_mb=args.transcription_latency_per_mb,
+    )
+    print(f"stub Groq API on {server.base_url} (banner: {server.banner_url})")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
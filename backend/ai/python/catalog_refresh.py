@@ -0,0 +1,189 @@
+"""
+Incremental catalog refresh with a seat-status change feed.
+
+    python catalog_refresh.py COMP MATH PSYC --interval 300 --feed changes.jsonl
+
+Re-scrapes the given departments on a schedule, diffs each result against
+the previous snapshot (kept in the CatalogCache) by CRN, and emits only the
+sections that were added, removed, or had a watched field change. Every
+change is one JSON line, so consumers and caches can invalidate just the
+affected sections instead of rebuilding everything.
+"""
+import argparse
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from course_planner import (
+    CatalogCache,
+    ScheduleCourse,
+    fetch_courses_for_departments,
+)
+
+# Fields whose changes are reported; everything else is considered static.
+WATCHED_FIELDS = ("status", "instructor", "day", "start_time", "end_time", "also_register_in")
+
+
+class SectionChange(BaseModel):
+    """
+    One entry of the change feed. 'changes' maps each changed field to
+    [old, new]; for "added"/"removed" it holds the watched fields of the
+    section that appeared or disappeared.
+    """
+    kind: str                 # "added", "removed" or "changed"
+    department: str
+    term_code: str
+    crn: str
+    course_code: str
+    section: str
+    changes: Dict[str, List[Optional[str]]] = {}
+    detected_at: float
+
+
+def diff_sections(
+    department: str,
+    term_code: str,
+    old: List[ScheduleCourse],
+    new: List[ScheduleCourse],
+    detected_at: Optional[float] = None,
+) -> List[SectionChange]:
+    """
+    Compares two scrapes of the same department by CRN, in O(old + new).
+    """
+    detected_at = time.time() if detected_at is None else detected_at
+    before = {c.crn: c for c in old}
+    after = {c.crn: c for c in new}
+    changes = []
+
+    def entry(kind: str, course: ScheduleCourse, fields: Dict[str, List[Optional[str]]]) -> SectionChange:
+        return SectionChange(
+            kind=kind, department=department, term_code=term_code, crn=course.crn,
+            course_code=course.course_code, section=course.section,
+            changes=fields, detected_at=detected_at,
+        )
+
+    for crn, course in after.items():
+        previous = before.get(crn)
+        if previous is None:
+            changes.append(entry("added", course, {f: [None, getattr(course, f)] for f in WATCHED_FIELDS}))
+            continue
+        fields = {
+            f: [getattr(previous, f), getattr(course, f)]
+            for f in WATCHED_FIELDS if getattr(previous, f) != getattr(course, f)
+        }
+        if fields:
+            changes.append(entry("changed", course, fields))
+    for crn, course in before.items():
+        if crn not in after:
+            changes.append(entry("removed", course, {f: [getattr(course, f), None] for f in WATCHED_FIELDS}))
+    return changes
+
+
+class CatalogRefresher:
+    """
+    Periodically re-scrapes 'departments' and publishes SectionChange records
+    to every subscriber. Fresh rows replace the cache entry, so warm lookups
+    through the same CatalogCache see the new data immediately.
+
+    The first scrape of a department without a stored snapshot only records
+    the baseline unless emit_initial=True.
+    """
+
+    def __init__(
+        self,
+        departments: List[str],
+        cache: CatalogCache,
+        term_code: str = "202510",
+        interval: float = 300,
+        max_concurrency: int = 4,
+        emit_initial: bool = False,
+        fetch: Callable = fetch_courses_for_departments,
+    ):
+        self.departments = list(dict.fromkeys(d.upper() for d in departments))
+        self.cache = cache
+        self.term_code = term_code
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+        self.emit_initial = emit_initial
+        self._fetch = fetch
+        self._subscribers: List[Callable[[SectionChange], None]] = []
+        self.errors: Dict[str, str] = {}
+
+    def subscribe(self, callback: Callable[[SectionChange], None]) -> None:
+        self._subscribers.append(callback)
+
+    def refresh_once(self) -> List[SectionChange]:
+        """
+        One refresh pass over every department; returns the emitted changes.
+        Departments that fail keep their previous snapshot and are listed in
+        'errors'.
+        """
+        results = self._fetch(self.departments, self.term_code, max_concurrency=self.max_concurrency)
+        emitted = []
+        now = time.time()
+        for result in results:
+            if result.error:
+                self.errors[result.department] = result.error
+                continue
+            self.errors.pop(result.department, None)
+            previous = self.cache.snapshot(result.department, self.term_code)
+            if previous is not None or self.emit_initial:
+                old = previous[1] if previous is not None else []
+                emitted.extend(diff_sections(result.department, self.term_code, old, result.courses, now))
+            self.cache.put(result.department, self.term_code, result.courses)
+        for change in emitted:
+            for callback in self._subscribers:
+                callback(change)
+        return emitted
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Refreshes every 'interval' seconds until 'stop' is set.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            self.refresh_once()
+            stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+def jsonl_sink(stream) -> Callable[[SectionChange], None]:
+    def write(change: SectionChange) -> None:
+        stream.write(change.model_dump_json() + "\n")
+        stream.flush()
+    return write
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("departments", nargs="+")
+    ap.add_argument("--term", default="202510")
+    ap.add_argument("--interval", type=float, default=300, help="seconds between refreshes")
+    ap.add_argument("--once", action="store_true", help="refresh a single time and exit")
+    ap.add_argument("--feed", default="-", help="change feed JSONL file (default: stdout)")
+    ap.add_argument("--cache", default="catalog_cache.sqlite3")
+    args = ap.parse_args()
+
+    refresher = CatalogRefresher(args.departments, CatalogCache(args.cache), args.term, args.interval)
+    feed = sys.stdout if args.feed == "-" else open(args.feed, "a", encoding="utf-8")
+    refresher.subscribe(jsonl_sink(feed))
+    try:
+        if args.once:
+            refresher.refresh_once()
+        else:
+            refresher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if feed is not sys.stdout:
+            feed.close()
+    for department, error in refresher.errors.items():
+        print(f"{department}: {error}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Memory-mapped columnar snapshot of the full-university catalog.
+
+    python catalog_snapshot.py export catalog_snapshot --from-cache catalog_cache.sqlite3
+    python catalog_snapshot.py export catalog_snapshot --scrape      # every subject in the code list
+    python catalog_snapshot.py info catalog_snapshot
+
+A snapshot directory holds:
+- sections.npy     one NumPy structured row per section: interned string ids,
+                   credits, subject id + course number, and the 2016-bit weekly
+                   meeting mask as 32 little-endian uint64 words;
+- strings.bin      UTF-8 blob of every distinct string, with
+- strings.npy      its (start, end) byte offsets;
+- meta.json        format version, term, subject -> row range, and the
+                   lecture/tutorial SectionLinks graph ({code: {lecture: [tutorials]}}).
+
+Rows are sorted by (subject, course number, section), so subject and code
+filters are binary searches. Everything is opened with mmap_mode="r", so
+loading is near-instant and worker processes share one read-only copy
+through the page cache.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from course_planner import (
+    SLOTS_PER_DAY,
+    CatalogCache,
+    CourseCodeIndex,
+    ScheduleCourse,
+    SectionLinks,
+    fetch_courses_for_departments,
+    normalize_course_code,
+)
+
+FORMAT_VERSION = 1
+MASK_WORDS = (7 * SLOTS_PER_DAY + 63) // 64
+NO_STRING = -1
+
+_STRING_FIELDS = (
+    "status", "crn", "course_code", "section", "course_title", "schedule_type",
+    "instructor", "day", "start_time", "end_time", "also_register_in",
+)
+
+SECTION_DTYPE = np.dtype(
+    [(f, "<i4") for f in _STRING_FIELDS]
+    + [
+        ("credits", "<f4"),
+        ("subject", "<i4"),
+        ("number", "<u2"),
+        ("mask", "<u8", (MASK_WORDS,)),
+    ]
+)
+
+_CODE_RE = re.compile(r"^([A-Z]+)(\d+)")
+
+
+def _split_code(course_code: str) -> tuple:
+    match = _CODE_RE.match(normalize_course_code(course_code))
+    return (match.group(1), int(match.group(2))) if match else (normalize_course_code(course_code), 0)
+
+
+def write_snapshot(path: str, courses: Iterable[ScheduleCourse], term_code: str = "") -> int:
+    """
+    Writes 'courses' as a snapshot directory at 'path'; returns the row count.
+    """
+    courses = sorted(
+        courses, key=lambda c: (*_split_code(c.course_code), c.section, c.crn)
+    )
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    rows = np.zeros(len(courses), dtype=SECTION_DTYPE)
+    subjects: Dict[str, List[int]] = {}
+    for i, course in enumerate(courses):
+        row = rows[i]
+        for field in _STRING_FIELDS:
+            row[field] = intern(getattr(course, field))
+        subject, number = _split_code(course.course_code)
+        row["subject"] = intern(subject)
+        row["number"] = number
+        row["credits"] = course.credits
+        row["mask"] = np.frombuffer(
+            course.meeting_mask.to_bytes(MASK_WORDS * 8, "little"), dtype="<u8"
+        )
+        bounds = subjects.setdefault(subject, [i, i + 1])
+        bounds[1] = i + 1
+
+    os.makedirs(path, exist_ok=True)
+    blob = bytearray()
+    offsets = np.zeros((len(strings), 2), dtype="<i8")
+    for value, index in strings.items():
+        encoded = value.encode("utf-8")
+        offsets[index] = (len(blob), len(blob) + len(encoded))
+        blob += encoded
+
+    np.save(os.path.join(path, "sections.npy"), rows)
+    np.save(os.path.join(path, "strings.npy"), offsets)
+    with open(os.path.join(path, "strings.bin"), "wb") as f:
+        f.write(bytes(blob))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "term_code": term_code,
+            "sections": len(courses),
+            "subjects": subjects,
+            "links": SectionLinks.from_courses(courses).to_dict(),
+        }, f)
+    return len(courses)
+
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot directory.
+    'rows' is the structured array; use the filters to get row indices and
+    course()/courses() to materialize ScheduleCourse objects only when needed.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.meta.get('version')}")
+        self.path = path
+        self.term_code = self.meta["term_code"]
+        self.rows = np.load(os.path.join(path, "sections.npy"), mmap_mode="r")
+        self._offsets = np.load(os.path.join(path, "strings.npy"), mmap_mode="r")
+        self._blob = np.memmap(os.path.join(path, "strings.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "strings.bin")) else np.zeros(0, dtype=np.uint8)
+        self._string_cache: Dict[int, str] = {}
+        self._subjects = {s: tuple(bounds) for s, bounds in self.meta["subjects"].items()}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def string(self, index: int) -> Optional[str]:
+        if index == NO_STRING:
+            return None
+        value = self._string_cache.get(index)
+        if value is None:
+            start, end = self._offsets[index]
+            value = self._string_cache[index] = self._blob[start:end].tobytes().decode("utf-8")
+        return value
+
+    @property
+    def subjects(self) -> List[str]:
+        return list(self._subjects)
+
+    def subject_range(self, subject: str) -> range:
+        start, end = self._subjects.get(subject.upper(), (0, 0))
+        return range(start, end)
+
+    def code_range(self, course_code: str) -> range:
+        """
+        Rows of one course code, e.g. "COMP 1405" or "COMP1405".
+        """
+        subject, number = _split_code(course_code)
+        span = self.subject_range(subject)
+        numbers = self.rows["number"][span.start:span.stop]
+        lo = int(np.searchsorted(numbers, number, side="left"))
+        hi = int(np.searchsorted(numbers, number, side="right"))
+        return range(span.start + lo, span.start + hi)
+
+    def filter(self, subjects: Optional[Iterable[str]] = None, codes: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Row indices matching any of 'subjects' or any of 'codes'
+        (all rows when both are None), in snapshot order.
+        """
+        if subjects is None and codes is None:
+            return np.arange(len(self.rows))
+        parts = [np.arange(r.start, r.stop) for r in map(self.subject_range, subjects or [])]
+        parts += [np.arange(r.start, r.stop) for r in map(self.code_range, codes or [])]
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def meeting_mask(self, index: int) -> int:
+        return int.from_bytes(self.rows["mask"][index].tobytes(), "little")
+
+    def course(self, index: int) -> ScheduleCourse:
+        row = self.rows[index]
+        fields = {f: self.string(int(row[f])) for f in _STRING_FIELDS}
+        fields["credits"] = float(row["credits"])
+        return ScheduleCourse(**fields)
+
+    def courses(self, indices: Optional[Iterable[int]] = None) -> List[ScheduleCourse]:
+        indices = range(len(self.rows)) if indices is None else indices
+        return [self.course(int(i)) for i in indices]
+
+    def links(self, subjects: Optional[Iterable[str]] = None) -> SectionLinks:
+        """
+        Lecture/tutorial graph of the whole snapshot or of 'subjects'. Older
+        snapshots without a stored graph get it built from their rows.
+        """
+        data = self.meta.get("links")
+        if data is None:
+            return SectionLinks.from_courses(self.courses(self.filter(subjects=subjects)))
+        if subjects is not None:
+            wanted = {s.upper() for s in subjects}
+            data = {code: lectures for code, lectures in data.items() if _split_code(code)[0] in wanted}
+        return SectionLinks.from_dict(data)
+
+
+def _collect_courses(args) -> List[ScheduleCourse]:
+    if args.scrape:
+        subjects = sorted({re.match(r"[A-Z]+", c).group(0) for c in CourseCodeIndex.from_file(args.codes).by_normalized})
+        courses = []
+        for result in fetch_courses_for_departments(subjects, args.term, max_concurrency=args.concurrency):
+            if result.error:
+                print(f"{result.department}: {result.error}", file=sys.stderr)
+            courses.extend(result.courses)
+        return courses
+    cache = CatalogCache(args.from_cache)
+    courses = []
+    for department in cache.departments(args.term):
+        courses.extend(cache.snapshot(department, args.term)[1])
+    return courses
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write a snapshot")
+    export.add_argument("path")
+    export.add_argument("--term", default="202510")
+    export.add_argument("--from-cache", default="catalog_cache.sqlite3")
+    export.add_argument("--scrape", action="store_true", help="scrape every subject instead of reading the cache")
+    export.add_argument("--codes", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "js", "all_carleton_course_codes.txt"))
+    export.add_argument("--concurrency", type=int, default=4)
+    info = sub.add_parser("info", help="describe a snapshot")
+    info.add_argument("path")
+    args = ap.parse_args()
+
+    if args.command == "export":
+        count = write_snapshot(args.path, _collect_courses(args), term_code=args.term)
+        print(f"Wrote {count} sections to {args.path}")
+    else:
+        snapshot = CatalogSnapshot(args.path)
+        print(json.dumps({
+            "term_code": snapshot.term_code,
+            "sections": len(snapshot),
+            "subjects": len(snapshot.subjects),
+            "links": len(snapshot.links()),
+        }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
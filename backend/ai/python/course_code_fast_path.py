@@ -0,0 +1,114 @@
+"""
+Local fast path for course-code extraction: unambiguous requests ("COMP
+1405 and optionally MATH 1007, no classes on Friday") are answered with
+regexes and a hashed code lookup instead of an LLM call.
+"""
+import re
+import threading
+from typing import List, Optional, Union
+
+from course_code_index import FILLER_WORDS, CourseCodeIndex
+from planner_models import CourseCode, GetCourseCodesResponse, normalize_course_code
+
+
+_CODE_MENTION_RE = re.compile(r"\b([A-Za-z]{3,4})[\s-]?(\d{4})\b")
+_WORD_RE = re.compile(r"[a-z']+|\d+")
+_ELECTIVE_WORDS = {"optional", "optionally", "elective", "electives", "maybe", "possibly"}
+_MANDATORY_WORDS = {"mandatory", "mandatorily", "required", "must", "need", "needs"}
+_SPECIAL_REQUEST_RES = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r"\bno (?:classes? |lectures? |school )?(?:on )?(?:mon|tues|wednes|thurs|fri|satur|sun)days?\b",
+        r"\b(?:avoid|no|without) (?:early |late )?(?:mornings?|evenings?|nights?|(?:mon|tues|wednes|thurs|fri)days?)\b",
+        r"\b(?:nothing|no classes?|no class) (?:before|after) \d{1,2}(?::\d{2})?\s?(?:am|pm)?",
+        r"\b(?:mon|tues|wednes|thurs|fri)days? off\b",
+    )
+]
+
+
+class FastPathStats:
+    """
+    Counts how often extract_course_codes_locally answered without the LLM.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.fallbacks
+        return self.hits / total if total else 0.0
+
+
+FAST_PATH_STATS = FastPathStats()
+
+
+def extract_course_codes_locally(
+    user_query: str,
+    allowed_codes: Union[List[str], "CourseCodeIndex"],
+) -> Optional[GetCourseCodesResponse]:
+    """
+    Deterministic extractor for unambiguous inputs. Codes written as digits
+    ("COMP 1405", "comp1405") are matched against a hashed index of the
+    allowed codes. "optional"/"elective" switches the codes after it to
+    electives and "mandatory"/"required" switches back. Common special
+    requests ("no classes on Friday", "nothing before 10am") are recognized.
+
+    Returns None (low confidence: let the LLM decide) when no allowed code is
+    found, when an elective word follows the last code it could refer to, or
+    when any word is left over that is not a code, a keyword, filler or part
+    of a recognized special request (e.g. spelled-out numbers, "or").
+    """
+    index = (
+        allowed_codes.by_normalized if isinstance(allowed_codes, CourseCodeIndex)
+        else {normalize_course_code(c): c for c in allowed_codes}
+    )
+
+    special = []
+    remaining = user_query
+    for pattern in _SPECIAL_REQUEST_RES:
+        for match in pattern.finditer(remaining):
+            special.append(match.group(0).strip())
+        remaining = pattern.sub(" ", remaining)
+
+    mandatory, electives, seen = [], [], set()
+    mode_elective = False
+    pending_elective_word = False
+    position = 0
+    for match in _CODE_MENTION_RE.finditer(remaining):
+        for word in _WORD_RE.findall(remaining[position:match.start()].lower()):
+            if word in _ELECTIVE_WORDS:
+                mode_elective, pending_elective_word = True, True
+            elif word in _MANDATORY_WORDS:
+                mode_elective = False
+            elif word not in FILLER_WORDS:
+                return None
+        position = match.end()
+        code = index.get(normalize_course_code(match.group(1) + match.group(2)))
+        if code is None or code in seen:
+            continue
+        seen.add(code)
+        pending_elective_word = False
+        (electives if mode_elective else mandatory).append(CourseCode(course_code=code))
+
+    for word in _WORD_RE.findall(remaining[position:].lower()):
+        if word not in FILLER_WORDS and word not in _MANDATORY_WORDS:
+            return None
+    if not seen or pending_elective_word:
+        return None
+
+    return GetCourseCodesResponse(
+        status="success",
+        requested_input=user_query,
+        special_request="; ".join(special),
+        mandatory=mandatory,
+        electives=electives,
+    )
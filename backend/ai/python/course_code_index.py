@@ -0,0 +1,183 @@
+"""
+CourseCodeIndex: candidate retrieval over the allowed course codes, so the
+extraction prompt lists the few codes a transcript plausibly refers to
+(including spoken numbers such as "comp fourteen oh five") instead of the
+whole catalogue.
+"""
+import re
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+
+from planner_models import normalize_course_code
+from result_cache import codes_fingerprint
+
+
+_UNIT_WORDS = {
+    "zero": 0, "oh": 0, "o": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+_TEEN_WORDS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS_WORDS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_NUMBER_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+# Words that never name a course, in a spoken or typed request.
+FILLER_WORDS = {
+    "i", "im", "i'm", "i'd", "id", "want", "wanna", "would", "like", "to", "register", "registering",
+    "take", "taking", "enroll", "enrol", "in", "into", "for", "and", "also", "the", "a", "an",
+    "course", "courses", "class", "classes", "please", "me", "my", "with", "plus", "as", "well",
+    "this", "term", "semester", "fall", "winter", "is", "are", "be", "should", "then", "too",
+}
+
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _spoken_digits(words: List[str]) -> str:
+    """
+    ["fourteen", "oh", "five"] -> "1405"; ["one", "four", "zero", "five"] -> "1405";
+    ["twenty", "eight", "oh", "four"] -> "2804"; ["fourteen", "hundred", "five"] -> "1405".
+    Digit tokens are passed through ("14", "05" -> "1405").
+    """
+    digits = ""
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word.isdigit():
+            digits += word
+        elif word in _TEEN_WORDS:
+            digits += str(_TEEN_WORDS[word])
+        elif word in _TENS_WORDS:
+            value = _TENS_WORDS[word]
+            if i + 1 < len(words) and words[i + 1] in _UNIT_WORDS and _UNIT_WORDS[words[i + 1]]:
+                value += _UNIT_WORDS[words[i + 1]]
+                i += 1
+            digits += str(value)
+        elif word in _UNIT_WORDS:
+            digits += str(_UNIT_WORDS[word])
+        elif word == "hundred":
+            rest = _spoken_digits([w for w in words[i + 1:] if w != "and"])
+            return digits + (rest.zfill(2) if rest else "00")
+        i += 1
+    return digits
+
+
+class CourseCodeIndex:
+    """
+    Prebuilt index over the allowed course codes:
+    - a set / dict for exact membership ("COMP1405" in index),
+    - per-subject sorted course numbers for prefix (trie-style) lookups,
+    - a course-number -> codes map for numbers spoken without a subject,
+    - character trigrams of the subjects for misheard subject words.
+
+    candidates(text) picks the few codes relevant to a transcript, so the
+    extraction prompt no longer has to list the whole catalogue.
+    """
+
+    def __init__(self, codes: Iterable[str]):
+        self.codes = list(dict.fromkeys(codes))
+        self.by_normalized = {normalize_course_code(c): c for c in self.codes}
+        self._code_set = set(self.codes)
+        self._numbers_by_subject = {}
+        self._codes_by_number = {}
+        for norm, code in self.by_normalized.items():
+            match = re.match(r"^([A-Z]+)(\d+)$", norm)
+            if not match:
+                continue
+            subject, number = match.groups()
+            self._numbers_by_subject.setdefault(subject, []).append(number)
+            self._codes_by_number.setdefault(number, []).append(code)
+        for numbers in self._numbers_by_subject.values():
+            numbers.sort()
+        self._subject_trigrams = {s.lower(): _trigrams(s.lower()) for s in self._numbers_by_subject}
+        self.fingerprint = codes_fingerprint(self.codes)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CourseCodeIndex":
+        """
+        Loads a comma- or newline-separated code list such as
+        all_carleton_course_codes.txt.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(c.strip() for c in re.split(r"[,\n]", f.read()) if c.strip())
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._code_set or normalize_course_code(code) in self.by_normalized
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _match_subject(self, word: str) -> Optional[str]:
+        if word.upper() in self._numbers_by_subject:
+            return word.upper()
+        if len(word) < 3:
+            return None
+        grams = _trigrams(word)
+        best, best_score = None, 0.0
+        for subject, subject_grams in self._subject_trigrams.items():
+            score = len(grams & subject_grams) / len(grams | subject_grams)
+            if score > best_score:
+                best, best_score = subject, score
+        return best.upper() if best_score >= 0.5 else None
+
+    def _with_prefix(self, subject: str, prefix: str) -> List[str]:
+        numbers = self._numbers_by_subject.get(subject, [])
+        start = bisect_left(numbers, prefix)
+        found = []
+        for number in numbers[start:]:
+            if not number.startswith(prefix):
+                break
+            found.append(self.by_normalized[subject + number])
+        return found
+
+    def candidates(self, text: str, limit: int = 40) -> List[str]:
+        """
+        Codes plausibly referred to in 'text', best matches first:
+        exact codes, then same-subject codes sharing the spoken number's
+        leading digits, then all codes with a bare 4-digit number.
+        """
+        words = _NUMBER_TOKEN_RE.findall(text.lower())
+        exact, near = [], []
+        i = 0
+        while i < len(words):
+            subject = None if words[i] in _UNIT_WORDS or words[i] in FILLER_WORDS else self._match_subject(words[i])
+            j = i + 1
+            while j < len(words) and (
+                words[j].isdigit() or words[j] in _UNIT_WORDS or words[j] in _TEEN_WORDS
+                or words[j] in _TENS_WORDS or words[j] in ("hundred", "and")
+            ):
+                j += 1
+            run = words[i + 1:j] if subject else words[i:j]
+            digits = _spoken_digits([w for w in run if w != "and"])
+            if subject:
+                code = self.by_normalized.get(subject + digits)
+                if code is not None:
+                    exact.append(code)
+                else:
+                    for width in (3, 2, 1, 0):
+                        matches = self._with_prefix(subject, digits[:width]) if len(digits) >= width else []
+                        if matches:
+                            near.extend(matches[:limit])
+                            break
+                i = j
+            elif len(digits) == 4:
+                near.extend(self._codes_by_number.get(digits, []))
+                i = j
+            else:
+                i += 1
+        return list(dict.fromkeys(exact + near))[:limit]
+
+    def prompt_codes(self, text: str, limit: int = 40) -> List[str]:
+        """
+        Codes to list in the extraction prompt: everything for small lists,
+        otherwise only candidates(text).
+        """
+        if len(self.codes) <= limit:
+            return self.codes
+        return self.candidates(text, limit=limit)
@@ -1,101 +1,287 @@
 import os
+import asyncio
+import codecs
 import json
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+try:
+    import lxml.html as lxml_html
+except ImportError:  # optional: only needed for parser="lxml"
+    lxml_html = None
 from dotenv import load_dotenv
-from typing import List, Optional
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
 from pydantic import BaseModel
-# For Pydantic v2 you can import field_validator:
-from pydantic import field_validator
-from groq import Groq
+from groq import AsyncGroq, Groq
+from planner_tracing import TRACER, propagate_context, usage_attributes
+from audio_preprocessing import (
+    AudioPreprocessing,
+    ffmpeg_binary,
+    transcribe_audio,
+    transcribe_audio_async,
+    transcription_request,
+)
+# Schemas, section links, caching, course-code retrieval, constraints and
+# validation live in their own modules; their public names are re-exported
+# here so existing `from course_planner import ...` imports keep working.
+from planner_models import (
+    DAY_INDEX,
+    MAX_SCHEDULE_CREDITS,
+    SLOT_MINUTES,
+    SLOTS_PER_DAY,
+    CompactSection,
+    CourseCode,
+    GenerateSchedulesResponse,
+    GetCourseCodesResponse,
+    RequestedCourses,
+    ScheduleCourse,
+    SingleSchedule,
+    as_schedule_course,
+    masks_overlap,
+    meeting_mask,
+    normalize_course_code,
+    normalize_query,
+    to_minutes,
+)
+from section_links import SectionLinks, is_primary_section, section_key
+from result_cache import DiskLRUStore, MemoryLRUStore, ResultCache, codes_fingerprint
+from course_code_index import CourseCodeIndex
+from course_code_fast_path import FAST_PATH_STATS, FastPathStats, extract_course_codes_locally
+from schedule_constraints import ScheduleConstraints, compile_special_request, filter_sections, mask_days
+from schedule_validation import ScheduleRepairReport, ScheduleValidator, SectionIndex
 
 # ----------------------------------------------------------------------
-# 1) SCHEMA FOR GET_COURSE_CODES
+# 1) GET_COURSE_CODES FUNCTION (audio OR raw text)
 # ----------------------------------------------------------------------
-class CourseCode(BaseModel):
+def _course_codes_error(requested_input: str) -> GetCourseCodesResponse:
+    return GetCourseCodesResponse(
+        status="error",
+        requested_input=requested_input,
+        special_request="",
+        mandatory=[],
+        electives=[]
+    )
+
+
+def _read_audio(
+    audio_file_path: str,
+    cache: Optional["ResultCache"],
+    transcription_model: str,
+    prompt: Optional[str],
+) -> tuple:
     """
-    Represents a single course code.
+    Returns (audio_bytes, transcript_key, cached_transcript_or_None).
     """
-    course_code: str
+    with open(audio_file_path, "rb") as audio_file:
+        audio_bytes = audio_file.read()
+    if cache is None:
+        return audio_bytes, None, None
+    transcript_key = cache.transcript_key(audio_bytes, transcription_model, prompt or "")
+    return audio_bytes, transcript_key, cache.get_transcript(transcript_key)
+
 
-class GetCourseCodesResponse(BaseModel):
+def _course_codes_shortcut(
+    user_query: str,
+    code_index: "CourseCodeIndex",
+    model: str,
+    cache: Optional["ResultCache"],
+    fast_path: bool,
+) -> tuple:
     """
-    JSON response schema for get_course_codes.
+    Tries the local fast path and the extraction cache before any LLM call.
+    Returns (response_or_None, extraction_key).
+    """
+    if fast_path:
+        local = extract_course_codes_locally(user_query, code_index)
+        hit = local is not None
+        FAST_PATH_STATS.record(hit)
+        TRACER.current().set(fast_path_hits=int(hit), fast_path_fallbacks=int(not hit))
+        if hit:
+            TRACER.current().set(extraction="fast_path")
+            return local, None
 
-    We split recognized codes into two lists:
-    - mandatory
-    - electives
+    extraction_key = cache.extraction_key(user_query, model, code_index) if cache is not None else None
+    if cache is not None:
+        cached = cache.get_extraction(extraction_key)
+        if cached is not None:
+            cached.requested_input = user_query
+            TRACER.current().set(extraction="cache")
+            return cached, extraction_key
+    return None, extraction_key
 
-    If unspecified, codes go into mandatory.
-    'special_request' captures additional scheduling requirements
-    (e.g., "no classes on Friday").
-    """
-    status: str               # "success" or "error"
-    requested_input: str      # The transcribed user speech or raw text
-    special_request: str      # The user's special request
-    mandatory: List[CourseCode] = []
-    electives: List[CourseCode] = []
 
-# ----------------------------------------------------------------------
-# 2) SCHEMA FOR GENERATE_SCHEDULES
-# ----------------------------------------------------------------------
-class ScheduleCourse(BaseModel):
+@lru_cache(maxsize=None)
+def schema_text(model: type) -> str:
     """
-    Represents a single class’s schedule information.
+    Pretty-printed JSON schema of a response model, generated once per process.
     """
-    status: str               # e.g. "open", "registration closed"
-    crn: str                  # random numeric identifier; we force it to be a string
-    course_code: str
-    section: str              # e.g. "A", "B"
-    course_title: str         # e.g. "Intro to Programming"
-    credits: float            # e.g. 0, 0.5, or 1
-    schedule_type: str        # "lecture" or "tutorial"
-    instructor: str           # e.g. "Jane Smith"
-    day: str
-    start_time: str
-    end_time: str
-    also_register_in: Optional[str] = None   # NEW FIELD: extra registration options
+    return json.dumps(model.model_json_schema(), indent=2)
 
-    # This validator will convert a numeric crn into a string before validation.
-    @field_validator('crn', mode='before')
-    def coerce_crn_to_str(cls, v):
-        return str(v)
 
-class SingleSchedule(BaseModel):
-    """
-    Represents one complete schedule option.
-    """
-    schedule_id: int
-    courses: List[ScheduleCourse] = []
+def course_codes_messages(user_query: str, code_index: "CourseCodeIndex") -> list:
+    schema = schema_text(GetCourseCodesResponse)
+    system_prompt = (
+        "You are a course code extraction assistant. You must output JSON that "
+        "matches this schema:\n\n"
+        f"{schema}\n\n"
+        "Schema fields:\n"
+        "- 'mandatory': list of courses the user explicitly wants\n"
+        "- 'electives': list of courses the user says are optional\n"
+        "- 'special_request': if the user mentions any scheduling preference (e.g., 'avoid Fridays'), "
+        "store it here.\n"
+        "\nIf the user doesn't mention an 'elective' or 'optional' phrase, default it to 'mandatory'.\n\n"
+        "The ONLY valid course codes are listed below. If the user mentions codes not in this list, ignore them:\n"
+        f"Allowed codes: {code_index.prompt_codes(user_query)}\n\n"
+        "Ensure you strictly follow the JSON schema."
+    )
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_query},
+    ]
+
+
+def _allowed_course_codes(codes: List[CourseCode], code_index: "CourseCodeIndex") -> List[CourseCode]:
+    allowed = []
+    for c in codes:
+        code = code_index.by_normalized.get(normalize_course_code(c.course_code))
+        if code is not None:
+            allowed.append(CourseCode(course_code=code))
+    return allowed
+
+
+def _finish_course_codes(
+    content: str,
+    user_query: str,
+    code_index: "CourseCodeIndex",
+    cache: Optional["ResultCache"],
+    extraction_key: Optional[str],
+) -> GetCourseCodesResponse:
+    parsed_response = GetCourseCodesResponse.model_validate_json(content)
 
-class RequestedCourses(BaseModel):
+    # Filter out any codes not in allowed_codes, answering with the allowed
+    # spelling ("comp1405" -> "COMP 1405").
+    parsed_response.mandatory = _allowed_course_codes(parsed_response.mandatory, code_index)
+    parsed_response.electives = _allowed_course_codes(parsed_response.electives, code_index)
+    parsed_response.status = "success"
+    parsed_response.requested_input = user_query
+
+    if cache is not None:
+        cache.set_extraction(extraction_key, parsed_response)
+    return parsed_response
+
+
+def _course_codes_steps(
+    code_index: "CourseCodeIndex",
+    audio_file_path: Optional[str],
+    raw_text: Optional[str],
+    transcription_model: str,
+    prompt: Optional[str],
+    model: str,
+    cache: Optional["ResultCache"],
+    fast_path: bool,
+    audio_preprocessing: Optional["AudioPreprocessing"],
+):
     """
-    Stores mandatory/elective courses inside a sub-model.
+    The get_course_codes logic with its I/O left to the caller: a generator
+    that yields (kind, payload) steps, receives each result, and returns the
+    GetCourseCodesResponse. Kinds:
+    - "blocking":         payload() reads the audio file / transcript cache
+    - "transcribe_audio": transcribe_audio(client, *payload)
+    - "transcription":    client.audio.transcriptions.create(**payload)
+    - "extraction":       client.chat.completions.create(**payload)
+    get_course_codes and get_course_codes_async only differ in how they run
+    the steps (see _run_steps / _run_steps_async).
     """
-    mandatory: List[CourseCode] = []
-    electives: List[CourseCode] = []
+    if raw_text is not None and raw_text.strip():
+        user_query = raw_text.strip()
+    elif audio_file_path is not None:
+        try:
+            audio_bytes, transcript_key, user_query = yield "blocking", (
+                lambda: _read_audio(audio_file_path, cache, transcription_model, prompt)
+            )
+            if user_query is None:
+                with TRACER.span("transcription", model=transcription_model, audio_bytes=len(audio_bytes)) as span:
+                    if audio_preprocessing is not None:
+                        user_query, report = yield "transcribe_audio", (
+                            audio_file_path, audio_bytes, transcription_model, prompt, audio_preprocessing
+                        )
+                        span.set(uploaded_bytes=report.uploaded_bytes, chunks=report.chunks)
+                    else:
+                        transcription = yield "transcription", transcription_request(
+                            audio_file_path, audio_bytes, transcription_model, prompt
+                        )
+                        user_query = transcription.text or ""
+                if cache is not None and user_query.strip():
+                    cache.set_transcript(transcript_key, user_query)
+        except FileNotFoundError:
+            return _course_codes_error(f"File not found: {audio_file_path}")
+        except Exception as e:
+            return _course_codes_error(str(e) or type(e).__name__)
+    else:
+        return _course_codes_error("No input provided (neither audio nor raw text).")
+
+    if not user_query.strip():
+        return _course_codes_error("Input text was empty.")
+
+    shortcut, extraction_key = _course_codes_shortcut(user_query, code_index, model, cache, fast_path)
+    if shortcut is not None:
+        return shortcut
 
-class GenerateSchedulesResponse(BaseModel):
+    try:
+        with TRACER.span("extraction_completion", model=model) as span:
+            chat_completion = yield "extraction", dict(
+                model=model,
+                messages=course_codes_messages(user_query, code_index),
+                temperature=0,
+                stream=False,
+                response_format={"type": "json_object"},
+            )
+            span.set(**usage_attributes(chat_completion))
+        return _finish_course_codes(
+            chat_completion.choices[0].message.content, user_query, code_index, cache, extraction_key
+        )
+    except Exception:
+        return _course_codes_error(user_query)
+
+
+def _run_steps(steps, run_step):
     """
-    JSON response schema for generate_schedules.
+    Drives a step generator with a synchronous run_step(kind, payload); an
+    exception from a step is raised inside the generator at its yield.
     """
-    status: str                 # "success" or "error"
-    requested_courses: RequestedCourses
-    special_requests: Optional[str]
-    schedules: List[SingleSchedule] = []
+    result, error = None, None
+    while True:
+        try:
+            kind, payload = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = run_step(kind, payload), None
+        except Exception as e:
+            result, error = None, e
 
-# ----------------------------------------------------------------------
-# 3) GET_COURSE_CODES FUNCTION (audio OR raw text)
-# ----------------------------------------------------------------------
+
+@TRACER.traced("get_course_codes")
 def get_course_codes(
     client: Groq,
-    allowed_codes: List[str],
+    allowed_codes: Union[List[str], "CourseCodeIndex"],
     audio_file_path: Optional[str] = None,
     raw_text: Optional[str] = None,
     transcription_model: str = "whisper-large-v3-turbo",
     prompt: Optional[str] = None,
     model: str = "llama3-70b-8192",
+    cache: Optional["ResultCache"] = None,
+    fast_path: bool = True,
+    audio_preprocessing: Optional["AudioPreprocessing"] = None,
 ) -> GetCourseCodesResponse:
     """
     Uses an audio file if provided; otherwise uses raw text.
@@ -105,149 +291,114 @@ def get_course_codes(
        splitting recognized codes into 'mandatory' or 'electives'. If not specified,
        default them to 'mandatory'.
     3) The 'allowed_codes' restricts recognized courses to a predefined set.
+       Pass a prebuilt CourseCodeIndex for large catalogues: only the codes
+       relevant to the user's input are then listed in the prompt.
     4) Also extracts a 'special_request' from the user's input if present.
-    """
-    # Determine the user query.
-    if raw_text is not None and raw_text.strip():
-        user_query = raw_text.strip()
-    elif audio_file_path is not None:
-        try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    file=(audio_file_path, audio_file.read()),
-                    model=transcription_model,
-                    prompt=prompt or "",
-                    language="en",
-                    temperature=0.0
-                )
-            user_query = transcription.text or ""
-        except FileNotFoundError:
-            return GetCourseCodesResponse(
-                status="error",
-                requested_input=f"File not found: {audio_file_path}",
-                special_request="",
-                mandatory=[],
-                electives=[]
-            )
-        except Exception as e:
-            return GetCourseCodesResponse(
-                status="error",
-                requested_input=str(e),
-                special_request="",
-                mandatory=[],
-                electives=[]
-            )
-    else:
-        return GetCourseCodesResponse(
-            status="error",
-            requested_input="No input provided (neither audio nor raw text).",
-            special_request="",
-            mandatory=[],
-            electives=[]
-        )
 
-    if not user_query.strip():
-        return GetCourseCodesResponse(
-            status="error",
-            requested_input="Input text was empty.",
-            special_request="",
-            mandatory=[],
-            electives=[]
-        )
+    With a ResultCache, a repeated recording (same bytes, model and prompt)
+    reuses its transcript, and a repeated sentence (same normalized text,
+    model and allowed codes) reuses its extraction, skipping Groq entirely.
 
-    schema_text = json.dumps(GetCourseCodesResponse.model_json_schema(), indent=2)
-    system_prompt = (
-        "You are a course code extraction assistant. You must output JSON that "
-        "matches this schema:\n\n"
-        f"{schema_text}\n\n"
-        "Schema fields:\n"
-        "- 'mandatory': list of courses the user explicitly wants\n"
-        "- 'electives': list of courses the user says are optional\n"
-        "- 'special_request': if the user mentions any scheduling preference (e.g., 'avoid Fridays'), "
-        "store it here.\n"
-        "\nIf the user doesn't mention an 'elective' or 'optional' phrase, default it to 'mandatory'.\n\n"
-        "The ONLY valid course codes are listed below. If the user mentions codes not in this list, ignore them:\n"
-        f"Allowed codes: {allowed_codes}\n\n"
-        "Ensure you strictly follow the JSON schema."
-    )
-
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_query},
-    ]
-
-    try:
-        chat_completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0,
-            stream=False,
-            response_format={"type": "json_object"},
-        )
-        parsed_response = GetCourseCodesResponse.model_validate_json(
-            chat_completion.choices[0].message.content
-        )
+    With fast_path=True, plain inputs such as "mandatory COMP 1405, MATH 1007"
+    are handled by extract_course_codes_locally and only inputs it is not
+    confident about go to the chat model (see FAST_PATH_STATS; with tracing
+    on, the fast_path_hits/fast_path_fallbacks counters).
 
-        # Filter out any codes not in allowed_codes.
-        filtered_mandatory = [
-            c for c in parsed_response.mandatory if c.course_code in allowed_codes
-        ]
-        filtered_electives = [
-            c for c in parsed_response.electives if c.course_code in allowed_codes
-        ]
+    With an AudioPreprocessing config the recording is resampled, trimmed
+    and split before upload (see transcribe_audio); the cache still keys on
+    the original file.
 
-        parsed_response.mandatory = filtered_mandatory
-        parsed_response.electives = filtered_electives
-        parsed_response.status = "success"
-        parsed_response.requested_input = user_query
+    See get_course_codes_async for the asyncio version.
+    """
+    code_index = allowed_codes if isinstance(allowed_codes, CourseCodeIndex) else CourseCodeIndex(allowed_codes)
+    steps = _course_codes_steps(
+        code_index, audio_file_path, raw_text, transcription_model, prompt, model, cache, fast_path,
+        audio_preprocessing,
+    )
 
-        return parsed_response
+    def run_step(kind: str, payload):
+        if kind == "blocking":
+            return payload()
+        if kind == "transcribe_audio":
+            return transcribe_audio(client, *payload)
+        if kind == "transcription":
+            return client.audio.transcriptions.create(**payload)
+        return client.chat.completions.create(**payload)
 
-    except Exception as e:
-        return GetCourseCodesResponse(
-            status="error",
-            requested_input=user_query,
-            special_request="",
-            mandatory=[],
-            electives=[]
-        )
+    return _run_steps(steps, run_step)
 
 # ----------------------------------------------------------------------
-# 4) GENERATE SCHEDULES FUNCTION
+# 2) GENERATE SCHEDULES FUNCTION
 # ----------------------------------------------------------------------
-def generate_schedules(
-    client: Groq,
+def _schedules_error(
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+) -> GenerateSchedulesResponse:
+    return GenerateSchedulesResponse(
+        status="error",
+        requested_courses=_requested_courses(mandatory_courses, elective_courses),
+        special_requests=special_requests,
+        schedules=[]
+    )
+
+
+def _solver_schedules(
     md_file_path: str,
+    courses: Optional[List[ScheduleCourse]],
     mandatory_courses: List[str],
     elective_courses: List[str],
-    special_requests: Optional[str] = None,
-    model: str = "llama3-70b-8192",
+    special_requests: Optional[str],
+    max_schedules: Optional[int],
+    constraints: Optional["ScheduleConstraints"] = None,
+    links: Optional["SectionLinks"] = None,
+    top_k: Optional[int] = None,
+    weights: Optional["RankingWeights"] = None,
 ) -> GenerateSchedulesResponse:
+    if courses is None:
+        try:
+            courses = read_courses_markdown(md_file_path)
+        except FileNotFoundError:
+            return _schedules_error(mandatory_courses, elective_courses, special_requests)
+    return solve_schedules(
+        courses=courses,
+        mandatory_courses=mandatory_courses,
+        elective_courses=elective_courses,
+        special_requests=special_requests,
+        max_schedules=max_schedules,
+        constraints=constraints,
+        links=links,
+        top_k=top_k,
+        weights=weights,
+    )
+
+
+def _schedule_context(
+    md_file_path: str,
+    courses: Optional[List[ScheduleCourse]],
+    context_encoding: str,
+    links: Optional["SectionLinks"] = None,
+) -> str:
     """
-    Generates possible schedules based on:
-    - a Markdown file (describing class times; created by the scraper)
-    - lists of mandatory/elective courses and any special constraints.
-    
-    Uses chat completion in JSON mode to return a GenerateSchedulesResponse.
+    The course list pasted into the prompt. Raises FileNotFoundError when it
+    has to come from a missing markdown file.
     """
-    try:
-        with open(md_file_path, "r", encoding="utf-8") as f:
-            md_content = f.read()
-    except FileNotFoundError:
-        return GenerateSchedulesResponse(
-            status="error",
-            requested_courses=RequestedCourses(
-                mandatory=[CourseCode(course_code=c) for c in mandatory_courses],
-                electives=[CourseCode(course_code=c) for c in elective_courses],
-            ),
-            special_requests=special_requests,
-            schedules=[]
+    if context_encoding == "compact":
+        return encode_courses_compact(
+            courses if courses is not None else read_courses_markdown(md_file_path), links
         )
+    if courses is not None:
+        return encode_courses_markdown(courses)
+    with open(md_file_path, "r", encoding="utf-8") as f:
+        return f.read()
 
-    schema_text = json.dumps(GenerateSchedulesResponse.model_json_schema(), indent=2)
-    system_prompt = (
+
+@lru_cache(maxsize=None)
+def schedule_system_prompt() -> str:
+    schema = schema_text(GenerateSchedulesResponse)
+    return (
         "You are a scheduling assistant. You must output JSON that matches this schema:\n\n"
-        f"{schema_text}\n\n"
+        f"{schema}\n\n"
         "Each course in the schedules array must include:\n"
         "- status (open or registration closed)\n"
         "- crn (random numeric ID as a string)\n"
@@ -264,59 +415,316 @@ def generate_schedules(
         "Ensure your JSON strictly follows the schema."
     )
 
+
+def schedule_messages(
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+    md_content: str,
+    context_encoding: str,
+) -> list:
     user_msg = (
         f"MANDATORY COURSES: {mandatory_courses}, "
         f"ELECTIVE COURSES: {elective_courses}, "
         f"SPECIAL REQUESTS: {special_requests or 'None'}, "
-        f"MARKDOWN FILE CONTENT: {md_content}, "
+        f"{'COURSE LIST' if context_encoding == 'compact' else 'MARKDOWN FILE CONTENT'}: {md_content}, "
         f"GENERATION INSTRUCTIONS: Generate multiple course schedules (aim for atleast 3) (each with a maximum of 2.5 credits) from the provided course list. For courses with tutorials, always select the tutorial that corresponds to the chosen lecture section, and only register for a tutorial if its parent lecture is included in the schedule. You cannot register for two tutorials for the same class. You must only output scheduels that contain every mandatory course."
     )
 
-    messages = [
-        {"role": "system", "content": system_prompt},
+    return [
+        {"role": "system", "content": schedule_system_prompt()},
         {"role": "user", "content": user_msg},
     ]
 
-    try:
-        chat_completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0,
-            stream=False,
-            response_format={"type": "json_object"},
+
+def _finish_schedules(
+    parsed: GenerateSchedulesResponse,
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+) -> GenerateSchedulesResponse:
+    parsed.status = "success"
+    parsed.requested_courses = _requested_courses(mandatory_courses, elective_courses)
+    parsed.special_requests = special_requests
+    return parsed
+
+
+@TRACER.traced("generate_schedules")
+def generate_schedules(
+    client: Groq,
+    md_file_path: str,
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str] = None,
+    model: str = "llama3-70b-8192",
+    engine: str = "llm",
+    courses: Optional[List[ScheduleCourse]] = None,
+    max_schedules: Optional[int] = None,
+    context_encoding: str = "markdown",
+    constraints: Optional["ScheduleConstraints"] = None,
+    validate: bool = True,
+    min_schedules: int = 3,
+    max_repair_rounds: int = 1,
+    links: Optional["SectionLinks"] = None,
+    top_k: Optional[int] = None,
+    weights: Optional["RankingWeights"] = None,
+) -> GenerateSchedulesResponse:
+    """
+    Generates possible schedules based on:
+    - a Markdown file (describing class times; created by the scraper)
+    - lists of mandatory/elective courses and any special constraints.
+    
+    Uses chat completion in JSON mode to return a GenerateSchedulesResponse.
+
+    With engine="solver" no model is called: the sections (either 'courses'
+    or the ones read back from md_file_path) are handed to solve_schedules,
+    which enumerates every conflict-free combination locally; 'top_k' and
+    'weights' then keep only the best-ranked ones (see solve_schedules).
+
+    context_encoding="compact" sends the course list to the model in the
+    encode_courses_compact format instead of the raw markdown file, which
+    needs several times fewer prompt tokens.
+
+    'special_requests' is compiled into ScheduleConstraints (unless
+    'constraints' is given) and sections that violate them are removed before
+    either engine sees the course list.
+
+    With validate=True every model schedule goes through ScheduleValidator:
+    invented CRNs, conflicts, orphan tutorials and missing mandatory courses
+    are corrected or the schedule is dropped. If fewer than 'min_schedules'
+    survive, up to 'max_repair_rounds' follow-up calls ask only for the
+    missing ones (compact context, accepted schedules as CRN lists).
+
+    'links' is the lecture/tutorial SectionLinks graph of the catalog (see
+    CatalogCache.links); it is built from the sections when not given.
+
+    See generate_schedules_async / stream_schedules for the asyncio versions.
+    """
+    if constraints is None:
+        constraints = compile_special_request(special_requests)
+    if engine == "solver":
+        return _solver_schedules(
+            md_file_path, courses, mandatory_courses, elective_courses, special_requests, max_schedules,
+            constraints, links, top_k, weights,
         )
 
+    try:
+        with TRACER.span("schedule_context", encoding=context_encoding) as span:
+            if links is None and courses is not None:
+                links = SectionLinks.from_courses(courses)
+            courses = _constrained_courses(md_file_path, courses, constraints, links)
+            md_content = _schedule_context(md_file_path, courses, context_encoding, links)
+            span.set(context_chars=len(md_content))
+            if validate and courses is None:
+                courses = read_courses_markdown(md_file_path)
+    except FileNotFoundError:
+        return _schedules_error(mandatory_courses, elective_courses, special_requests)
+
+    try:
+        with TRACER.span("schedule_completion", model=model) as span:
+            chat_completion = client.chat.completions.create(
+                model=model,
+                messages=schedule_messages(
+                    mandatory_courses, elective_courses, special_requests, md_content, context_encoding
+                ),
+                temperature=0,
+                stream=False,
+                response_format={"type": "json_object"},
+            )
+            span.set(**usage_attributes(chat_completion))
+
         parsed = GenerateSchedulesResponse.model_validate_json(
             chat_completion.choices[0].message.content
         )
-
-        parsed.status = "success"
-        parsed.requested_courses = RequestedCourses(
-            mandatory=[CourseCode(course_code=c) for c in mandatory_courses],
-            electives=[CourseCode(course_code=c) for c in elective_courses],
-        )
-        parsed.special_requests = special_requests
-
-        return parsed
+        if validate:
+            with TRACER.span("schedule_validation"):
+                parsed.schedules = _validated_schedules(
+                    client, parsed, courses, mandatory_courses, elective_courses, special_requests,
+                    model, min_schedules, max_repair_rounds, links, constraints.max_campus_days,
+                )
+        return _finish_schedules(parsed, mandatory_courses, elective_courses, special_requests)
 
     except Exception as e:
-        return GenerateSchedulesResponse(
-            status="error",
-            requested_courses=RequestedCourses(
-                mandatory=[CourseCode(course_code=c) for c in mandatory_courses],
-                electives=[CourseCode(course_code=c) for c in elective_courses],
-            ),
-            special_requests=special_requests,
-            schedules=[]
-        )
+        return _schedules_error(mandatory_courses, elective_courses, special_requests)
 
 # ----------------------------------------------------------------------
-# 5) SCRAPER: fetch_courses_for_department
+# 3) SCRAPER: fetch_courses_for_department
 # ----------------------------------------------------------------------
-def fetch_courses_for_department(department: str, term_code: str = "202510") -> List[ScheduleCourse]:
+BANNER_SEARCH_URL = "https://central.carleton.ca/prod/bwysched.p_course_search"
+
+_COURSE_FIELDS = (
+    "status", "crn", "course_code", "section", "course_title", "credits",
+    "schedule_type", "instructor", "day", "start_time", "end_time", "also_register_in",
+)
+
+
+_ROW_COLORS = ("#C0C0C0", "#DCDCDC")
+_DAYS_RE = re.compile(r"Days:\s*(.+?)\s*Time:")
+_TIME_RE = re.compile(r"Time:\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})")
+_ALSO_REGISTER_RE = re.compile(r"Also Register in:", flags=re.IGNORECASE)
+
+
+def _bs4_rows(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    rows = soup.find_all("tr", bgcolor=list(_ROW_COLORS))
+    cells = lambda row: [td.get_text(strip=True) for td in row.find_all("td", recursive=False)]
+    text = lambda row: row.get_text(separator=" ", strip=True)
+    return rows, cells, text
+
+
+def _lxml_rows(html: str):
+    if lxml_html is None:
+        raise ImportError("parser='lxml' requires the lxml package")
+    tree = lxml_html.document_fromstring(html)
+    rows = tree.xpath("//tr[@bgcolor='%s' or @bgcolor='%s']" % _ROW_COLORS)
+    cells = lambda row: [
+        "".join(t.strip() for t in td.itertext()) for td in row.iterchildren("td")
+    ]
+    text = lambda row: " ".join(t for t in (t.strip() for t in row.itertext()) if t)
+    return rows, cells, text
+
+
+HTML_PARSERS = {
+    "bs4": _bs4_rows,
+    "lxml": _lxml_rows,
+}
+# bs4 stays the default until lxml has been checked against a real saved
+# Banner page, not only the synthesized fixtures; pass parser="lxml" to opt in.
+DEFAULT_HTML_PARSER = "bs4"
+
+
+class CatalogCache:
     """
-    Makes a POST request for a given department code,
-    parses the returned HTML, and returns a list of ScheduleCourse objects.
+    SQLite-backed cache of parsed department listings keyed by
+    (department, term_code), stored together with their SectionLinks graph.
+    Entries older than 'ttl_seconds' are treated as missing; invalidate()
+    drops entries explicitly.
+    """
+
+    def __init__(self, path: str = "catalog_cache.sqlite3", ttl_seconds: float = 3600, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog ("
+            " department TEXT NOT NULL,"
+            " term_code TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " rows TEXT NOT NULL,"
+            " links TEXT,"
+            " PRIMARY KEY (department, term_code))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(catalog)")}
+        if "links" not in columns:   # caches written before the links column existed
+            self._conn.execute("ALTER TABLE catalog ADD COLUMN links TEXT")
+        self._conn.commit()
+
+    def get(self, department: str, term_code: str, compact: bool = False) -> Optional[List[ScheduleCourse]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, rows FROM catalog WHERE department = ? AND term_code = ?",
+                (department.upper(), term_code),
+            ).fetchone()
+        if row is None or self._clock() - row[0] > self.ttl_seconds:
+            return None
+        record_type = CompactSection if compact else ScheduleCourse
+        return [record_type(**fields) for fields in json.loads(row[1])]
+
+    def departments(self, term_code: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT department FROM catalog WHERE term_code = ? ORDER BY department", (term_code,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def snapshot(self, department: str, term_code: str) -> Optional[tuple]:
+        """
+        (fetched_at, courses) of the stored entry regardless of its age, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, rows FROM catalog WHERE department = ? AND term_code = ?",
+                (department.upper(), term_code),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], [ScheduleCourse(**fields) for fields in json.loads(row[1])]
+
+    def links(self, department: str, term_code: str) -> Optional["SectionLinks"]:
+        """
+        The lecture/tutorial graph stored with a fresh entry, or None. Entries
+        written without one get it built from their rows.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, rows, links FROM catalog WHERE department = ? AND term_code = ?",
+                (department.upper(), term_code),
+            ).fetchone()
+        if row is None or self._clock() - row[0] > self.ttl_seconds:
+            return None
+        if row[2] is None:
+            return SectionLinks.from_courses(CompactSection(**fields) for fields in json.loads(row[1]))
+        return SectionLinks.from_dict(json.loads(row[2]))
+
+    def put(self, department: str, term_code: str, courses: List[ScheduleCourse]) -> None:
+        rows = json.dumps([{f: getattr(c, f) for f in _COURSE_FIELDS} for c in courses])
+        links = json.dumps(SectionLinks.from_courses(courses).to_dict())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog (department, term_code, fetched_at, rows, links)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (department.upper(), term_code, self._clock(), rows, links),
+            )
+            self._conn.commit()
+
+    def invalidate(self, department: Optional[str] = None, term_code: Optional[str] = None) -> int:
+        """
+        Drops matching entries (all of them when both arguments are None) and
+        returns how many were removed.
+        """
+        clauses, params = [], []
+        if department is not None:
+            clauses.append("department = ?")
+            params.append(department.upper())
+        if term_code is not None:
+            clauses.append("term_code = ?")
+            params.append(term_code)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM catalog{where}", params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host by at least 'min_interval' seconds,
+    across threads.
+    """
+
+    def __init__(self, min_interval: float = 0.25):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str) -> None:
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _course_search_request(department: str, term_code: str) -> tuple:
+    """
+    Returns the (headers, form_data) of a Banner course-search POST.
     """
     form_data_template = (
         "wsea_code=EXT&term_code={term_code}&session_id=22963932&ws_numb=&sel_aud=dummy&"
@@ -354,110 +762,1206 @@ def fetch_courses_for_department(department: str, term_code: str = "202510") ->
         "sec-ch-ua-mobile": "?0",
         "sec-ch-ua-platform": "macOS",
     }
+    return headers, form_data
+
 
-    response = requests.post(
-        "https://central.carleton.ca/prod/bwysched.p_course_search",
-        headers=headers,
-        data=form_data
+def fetch_course_search_html(
+    department: str,
+    term_code: str = "202510",
+    url: str = BANNER_SEARCH_URL,
+    session: Optional[requests.Session] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> str:
+    """
+    POSTs the course search for one department and returns the raw HTML page.
+    """
+    headers, form_data = _course_search_request(department, term_code)
+    if rate_limiter is not None:
+        with TRACER.span("rate_limit_wait"):
+            rate_limiter.wait(url)
+    with TRACER.span("banner_request", department=department) as span:
+        response = (session or requests).post(
+            url,
+            headers=headers,
+            data=form_data
+        )
+        span.set(http_status=response.status_code, bytes_downloaded=len(response.content))
+        response.raise_for_status()
+    return response.text
+
+
+@TRACER.traced("fetch_courses_for_department")
+def fetch_courses_for_department(
+    department: str,
+    term_code: str = "202510",
+    compact: bool = False,
+    cache: Optional[CatalogCache] = None,
+    url: str = BANNER_SEARCH_URL,
+    session: Optional[requests.Session] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    parser: str = DEFAULT_HTML_PARSER,
+) -> List[ScheduleCourse]:
+    """
+    Makes a POST request for a given department code,
+    parses the returned HTML, and returns a list of ScheduleCourse objects.
+    With compact=True the rows are returned as CompactSection records instead.
+    If a CatalogCache is given, a fresh entry is returned without any network
+    request or parsing, and newly parsed rows are stored in it.
+    Pass a shared requests.Session to reuse keep-alive connections.
+    """
+    TRACER.current().set(department=department)
+    if cache is not None:
+        cached = cache.get(department, term_code, compact=compact)
+        if cached is not None:
+            TRACER.current().set(cache_hit=True)
+            return cached
+
+    html = fetch_course_search_html(
+        department, term_code, url=url, session=session, rate_limiter=rate_limiter
     )
-    response.raise_for_status()
+    courses = parse_course_search_html(html, compact=compact, parser=parser)
+    if cache is not None:
+        cache.put(department, term_code, courses)
+    return courses
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    courses = []
 
-    all_rows = soup.find_all("tr", bgcolor=["#C0C0C0", "#DCDCDC"])
-    row_count = len(all_rows)
-    i = 0
+class DepartmentFetchResult(BaseModel):
+    """
+    Outcome of one department in fetch_courses_for_departments.
+    'error' is set (and 'courses' empty) when that department failed.
+    """
+    department: str
+    courses: List[ScheduleCourse] = []
+    error: Optional[str] = None
+
 
-    while i < row_count:
-        row = all_rows[i]
-        tds = row.find_all("td", recursive=False)
+@TRACER.traced("fetch_courses_for_departments")
+def fetch_courses_for_departments(
+    departments: List[str],
+    term_code: str = "202510",
+    max_concurrency: int = 4,
+    min_request_interval: float = 0.25,
+    cache: Optional[CatalogCache] = None,
+    url: str = BANNER_SEARCH_URL,
+    session: Optional[requests.Session] = None,
+) -> List[DepartmentFetchResult]:
+    """
+    Scrapes several departments in parallel over one pooled keep-alive session.
+    Requests to the Banner host are spaced by 'min_request_interval' seconds.
+    Results follow the order of 'departments' (duplicates removed); a failing
+    department is reported in its result instead of failing the batch.
+    """
+    unique = list(dict.fromkeys(d.upper() for d in departments))
+    if not unique:
+        return []
+
+    owns_session = session is None
+    if owns_session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    limiter = HostRateLimiter(min_request_interval)
+
+    def fetch_one(dept: str) -> DepartmentFetchResult:
+        try:
+            courses = fetch_courses_for_department(
+                dept, term_code, cache=cache, url=url, session=session, rate_limiter=limiter
+            )
+            return DepartmentFetchResult(department=dept, courses=courses)
+        except Exception as e:
+            return DepartmentFetchResult(department=dept, error=f"{type(e).__name__}: {e}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(unique)))) as pool:
+            return list(pool.map(propagate_context(fetch_one), unique))
+    finally:
+        if owns_session:
+            session.close()
+
+
+def parse_course_search_html(
+    html: str,
+    compact: bool = False,
+    parser: str = DEFAULT_HTML_PARSER,
+) -> List[ScheduleCourse]:
+    """
+    Parses a Banner course-search results page into ScheduleCourse objects
+    (or CompactSection records when compact=True).
+
+    'parser' picks the HTML backend from HTML_PARSERS: "bs4" (BeautifulSoup
+    html.parser, always available, the default) or "lxml" (much faster,
+    needs lxml). Both produce identical results on the fixture pages.
+    """
+    with TRACER.span("parse_html", parser=parser) as span:
+        all_rows, row_cells, row_text = HTML_PARSERS[parser](html)
+        record_type = CompactSection if compact else ScheduleCourse
+        courses = list(_iter_course_blocks(all_rows, row_cells, row_text, record_type))
+        span.set(rows_parsed=len(courses))
+    return courses
 
+
+def _iter_course_blocks(rows, row_cells, row_text, record_type):
+    """
+    Walks the highlighted result rows in order. A row with 11+ cells starts a
+    course; the "Meeting Date" / "Also Register in" rows after it fill in its
+    times and links, and a "Section Information" row (or any other row)
+    closes it. Each course is yielded as soon as its block is complete.
+    """
+    pending = None
+
+    def finish(fields):
+        also_register_in = fields.pop("also_register_in")
+        return record_type(**fields, also_register_in=also_register_in if also_register_in else None)
+
+    for row in rows:
+        if pending is not None:
+            # Process subsequent rows that belong to the same course entry.
+            next_text = row_text(row)
+            lowered = next_text.lower()
+            if "meeting date:" in lowered:
+                # Extract day and time info.
+                day_match = _DAYS_RE.search(next_text)
+                time_match = _TIME_RE.search(next_text)
+                if day_match:
+                    pending["day"] = day_match.group(1).strip()
+                if time_match:
+                    pending["start_time"] = time_match.group(1)
+                    pending["end_time"] = time_match.group(2)
+                continue
+            elif "also register in:" in lowered:
+                # Extract additional registration info.
+                parts = _ALSO_REGISTER_RE.split(next_text)
+                if len(parts) > 1:
+                    pending["also_register_in"] = parts[1].strip()
+                continue
+            elif "section information:" in lowered:
+                # Do not capture section information for now; skip it and close the course.
+                yield finish(pending)
+                pending = None
+                continue
+            else:
+                yield finish(pending)
+                pending = None
+
+        tds = row_cells(row)
         if len(tds) >= 11:
-            status_text = tds[1].get_text(strip=True)
-            crn = tds[2].get_text(strip=True)
-            course_and_number = tds[3].get_text(strip=True)
-            section = tds[4].get_text(strip=True)
-            course_title = tds[5].get_text(strip=True)
-            credits_text = tds[6].get_text(strip=True)
-            schedule_type = tds[7].get_text(strip=True)
-            instructor = tds[10].get_text(strip=True)
+            try:
+                credits = float(tds[6])
+            except ValueError:
+                credits = 0.0
+
+            # Day/time/links may come from subsequent rows.
+            pending = {
+                "status": tds[1],
+                "crn": tds[2],
+                "course_code": tds[3],
+                "section": tds[4],
+                "course_title": tds[5],
+                "credits": credits,
+                "schedule_type": tds[7],
+                "instructor": tds[10],
+                "day": "",
+                "start_time": "",
+                "end_time": "",
+                "also_register_in": "",
+            }
+
+    if pending is not None:
+        yield finish(pending)
+
+
+class _BannerRowParser(HTMLParser):
+    """
+    Incremental (feed()-based) extractor of the highlighted result rows.
+    Each completed row is appended to 'rows' as (cell_texts, row_text) with the
+    same whitespace handling as BeautifulSoup's get_text(strip=True) and
+    get_text(separator=" ", strip=True). Only the current row is kept in memory.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._tr_depth = 0          # depth of <tr> nesting inside the current row
+        self._td_depth = 0          # depth of <td> nesting inside the current cell
+        self._cells = None          # completed cell strings of the current row
+        self._cell = None           # stripped strings of the current cell
+        self._strings = None        # stripped strings of the whole row
+        self._text = []             # raw text since the last tag
+
+    def _flush_text(self):
+        if self._text and self._strings is not None:
+            piece = "".join(self._text).strip()
+            if piece:
+                self._strings.append(piece)
+                if self._cell is not None:
+                    self._cell.append(piece)
+        self._text = []
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._cells.append("".join(self._cell))
+            self._cell = None
+            self._td_depth = 0
+
+    def _close_row(self):
+        self._close_cell()
+        self.rows.append((self._cells, " ".join(self._strings)))
+        self._cells = self._strings = None
+        self._tr_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag == "tr":
+            if self._strings is None:
+                if dict(attrs).get("bgcolor") in _ROW_COLORS:
+                    self._cells, self._strings, self._tr_depth = [], [], 1
+            elif self._td_depth == 0:
+                # A new row while the previous one is still open closes it.
+                self._close_row()
+                self.handle_starttag(tag, attrs)
+            else:
+                self._tr_depth += 1
+        elif tag == "td" and self._strings is not None:
+            if self._tr_depth == 1 and self._td_depth <= 1:
+                self._close_cell()
+                self._cell, self._td_depth = [], 1
+            else:
+                self._td_depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if self._strings is None:
+            return
+        if tag == "tr":
+            if self._tr_depth <= 1:
+                self._close_row()
+            else:
+                self._tr_depth -= 1
+        elif tag == "td":
+            if self._td_depth <= 1 and self._tr_depth == 1:
+                self._close_cell()
+            else:
+                self._td_depth -= 1
+        elif tag in ("table", "tbody", "body", "html") and self._tr_depth <= 1 and self._td_depth == 0:
+            self._close_row()
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_data(self, data):
+        if self._strings is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        if self._strings is not None:
+            self._close_row()
+
+
+def iter_course_search_html(chunks: Iterable[str], compact: bool = False) -> Iterator[ScheduleCourse]:
+    """
+    Parses a Banner results page delivered as an iterable of text chunks and
+    yields each course as soon as its block of rows has been read.
+    """
+    parser = _BannerRowParser()
+    record_type = CompactSection if compact else ScheduleCourse
+
+    def rows():
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from parser.rows
+            parser.rows.clear()
+        parser.close()
+        yield from parser.rows
+        parser.rows.clear()
+
+    yield from _iter_course_blocks(rows(), lambda r: r[0], lambda r: r[1], record_type)
+
+
+def stream_courses_for_department(
+    department: str,
+    term_code: str = "202510",
+    compact: bool = False,
+    url: str = BANNER_SEARCH_URL,
+    session: Optional[requests.Session] = None,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    chunk_size: int = 16 * 1024,
+) -> Iterator[ScheduleCourse]:
+    """
+    Streaming variant of fetch_courses_for_department: reads the response body
+    in chunks and yields ScheduleCourse objects while the download is still in
+    progress, without holding the page or a DOM in memory.
+    """
+    headers, form_data = _course_search_request(department, term_code)
+    if rate_limiter is not None:
+        rate_limiter.wait(url)
+    with (session or requests).post(url, headers=headers, data=form_data, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+
+        def text_chunks():
+            for raw in response.iter_content(chunk_size=chunk_size):
+                yield decoder.decode(raw)
+            yield decoder.decode(b"", final=True)
+
+        yield from iter_course_search_html(text_chunks(), compact=compact)
+
+# ----------------------------------------------------------------------
+# 4) LOCAL SOLVER: solve_schedules (no network, deterministic)
+# ----------------------------------------------------------------------
+def _requested_courses(mandatory_courses: List[str], elective_courses: List[str]) -> RequestedCourses:
+    return RequestedCourses(
+        mandatory=[CourseCode(course_code=c) for c in mandatory_courses],
+        electives=[CourseCode(course_code=c) for c in elective_courses],
+    )
+
+
+def _sections_by_id(sections: Iterable) -> Dict[str, list]:
+    """
+    Section id -> [(position, section)]; a course can list the same id twice.
+    """
+    by_id: Dict[str, list] = {}
+    for position, section in enumerate(sections):
+        by_id.setdefault(section.section.strip().upper(), []).append((position, section))
+    return by_id
+
+
+def _linked_tutorials(lecture, links: SectionLinks, by_id: Dict[str, list]) -> list:
+    """
+    The sections in 'by_id' linked to 'lecture', in their original order.
+    """
+    found = [entry for section in links.tutorials_of(lecture) for entry in by_id.get(section, ())]
+    found.sort(key=lambda entry: entry[0])
+    return [section for _, section in found]
+
+
+def _course_bundles(sections: List[ScheduleCourse], links: SectionLinks) -> List[tuple]:
+    """
+    Builds every registrable option for one course code: a lecture on its own
+    when it has no tutorials, otherwise the lecture plus exactly one of its
+    linked tutorials (looked up in 'links'). Bundles that conflict internally
+    are dropped.
+    """
+    secondaries = _sections_by_id(s for s in sections if not is_primary_section(s))
+    bundles = []
+    for lecture in (s for s in sections if is_primary_section(s)):
+        tutorials = _linked_tutorials(lecture, links, secondaries)
+        if not tutorials:
+            bundles.append((lecture,))
+            continue
+        for tutorial in tutorials:
+            if not lecture.overlaps(tutorial):
+                bundles.append((lecture, tutorial))
+    return bundles
+
+
+def _bundle_mask(bundle: tuple) -> int:
+    mask = 0
+    for section in bundle:
+        mask |= section.meeting_mask
+    return mask
+
+
+@TRACER.traced("solve_schedules")
+def solve_schedules(
+    courses: List[ScheduleCourse],
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str] = None,
+    max_credits: float = MAX_SCHEDULE_CREDITS,
+    max_schedules: Optional[int] = None,
+    constraints: Optional["ScheduleConstraints"] = None,
+    links: Optional[SectionLinks] = None,
+    top_k: Optional[int] = None,
+    weights: Optional["RankingWeights"] = None,
+) -> GenerateSchedulesResponse:
+    """
+    Enumerates every conflict-free schedule that:
+    - contains every mandatory course,
+    - optionally adds any subset of the electives,
+    - stays at or under 'max_credits',
+    - pairs each lecture with exactly one of its matching tutorials.
 
+    Backtracking goes through the mandatory courses first (fewest options first)
+    and prunes as soon as a time conflict appears or the credits of the
+    remaining mandatory courses can no longer fit. 'special_requests' is only
+    echoed back; pass 'constraints' (see compile_special_request) to filter
+    the sections first and cap the number of days on campus. Lecture/tutorial
+    pairs come from 'links' (e.g. the graph stored with the catalog), built
+    from the sections when not given. Runs locally and never touches the
+    network.
+
+    With 'top_k' and/or 'weights' the enumerated schedules are scored by
+    schedule_ranking.ScheduleRanker (default RankingWeights) and only the
+    'top_k' best are returned, best first; 'max_schedules' still caps how
+    many are enumerated before ranking.
+    """
+    if links is None:
+        links = SectionLinks.from_courses(courses)
+    max_days = None
+    if constraints is not None:
+        courses = filter_sections(courses, constraints, links)
+        max_days = constraints.max_campus_days
+
+    by_code = {}
+    for course in courses:
+        by_code.setdefault(normalize_course_code(course.course_code), []).append(course)
+
+    mandatory_keys = list(dict.fromkeys(normalize_course_code(c) for c in mandatory_courses))
+    elective_keys = [
+        k for k in dict.fromkeys(normalize_course_code(c) for c in elective_courses)
+        if k not in mandatory_keys
+    ]
+
+    options = {key: _course_bundles(by_code.get(key, []), links) for key in mandatory_keys + elective_keys}
+    position = {id(course): i for i, course in enumerate(courses)}
+    indices = {key: [tuple(position[id(s)] for s in b) for b in bundles] for key, bundles in options.items()}
+    if any(not options[key] for key in mandatory_keys):
+        return GenerateSchedulesResponse(
+            status="error",
+            requested_courses=_requested_courses(mandatory_courses, elective_courses),
+            special_requests=special_requests,
+            schedules=[]
+        )
+
+    requested_rank = {key: n for n, key in enumerate(mandatory_keys + elective_keys)}
+    mandatory_keys.sort(key=lambda k: len(options[k]))
+    order = [(key, True) for key in mandatory_keys] + [(key, False) for key in elective_keys]
+
+    # Cheapest credits still owed by the mandatory courses from position i onward.
+    min_remaining = [0.0] * (len(order) + 1)
+    for i in range(len(order) - 1, -1, -1):
+        key, required = order[i]
+        cheapest = min(sum(s.credits for s in b) for b in options[key]) if required else 0.0
+        min_remaining[i] = min_remaining[i + 1] + cheapest
+
+    masks = {key: [_bundle_mask(bundle) for bundle in options[key]] for key, _ in order}
+    day_masks = {key: [mask_days(m) for m in masks[key]] for key, _ in order}
+    found: List[List[int]] = []     # positions in 'courses'
+    chosen: List[tuple] = []
+
+    def backtrack(i: int, credits: float, taken: int, days: int = 0) -> bool:
+        if max_schedules is not None and len(found) >= max_schedules:
+            return False
+        if credits + min_remaining[i] > max_credits + 1e-9:
+            return True
+        if i == len(order):
+            ordered = sorted(chosen, key=lambda kb: requested_rank[kb[0]])
+            found.append([s for _, bundle in ordered for s in bundle])
+            return True
+        key, required = order[i]
+        for bundle, bundle_indices, bundle_mask, bundle_days in zip(
+                options[key], indices[key], masks[key], day_masks[key]):
+            bundle_credits = sum(s.credits for s in bundle)
+            if credits + bundle_credits > max_credits + 1e-9:
+                continue
+            if taken & bundle_mask:
+                continue
+            if max_days is not None and bin(days | bundle_days).count("1") > max_days:
+                continue
+            chosen.append((key, bundle_indices))
+            keep_going = backtrack(i + 1, credits + bundle_credits, taken | bundle_mask, days | bundle_days)
+            chosen.pop()
+            if not keep_going:
+                return False
+        if not required:
+            return backtrack(i + 1, credits, taken, days)
+        return True
+
+    backtrack(0, 0.0, 0)
+
+    if top_k is not None or weights is not None:
+        from schedule_ranking import ScheduleRanker
+
+        with TRACER.span("schedule_ranking", candidates=len(found)):
+            ranker = ScheduleRanker(courses)
+            best, _ = ranker.top_k(ranker.pack(found), len(found) if top_k is None else top_k, weights)
+            found = [found[i] for i in best.tolist()]
+
+    return GenerateSchedulesResponse(
+        status="success",
+        requested_courses=_requested_courses(mandatory_courses, elective_courses),
+        special_requests=special_requests,
+        schedules=[
+            SingleSchedule(schedule_id=n, courses=[as_schedule_course(courses[i]) for i in combo])
+            for n, combo in enumerate(found, start=1)
+        ]
+    )
+
+
+_MD_HEADER_RE = re.compile(r"^##\s+(.+?)\s+\(Section\s+(.+?)\)\s*$")
+_MD_FIELD_RE = re.compile(r"^-\s+\*\*(.+?)\*\*:\s?(.*)$")
+
+
+def read_courses_markdown(md_file_path: str) -> List[ScheduleCourse]:
+    """
+    Reads a scraped_courses.md file (as written by the main pipeline) back into
+    ScheduleCourse records.
+    """
+    courses = []
+    current = None
+
+    def flush():
+        if current is not None:
+            start, _, end = current.pop("time", " - ").partition("-")
             try:
-                credits = float(credits_text)
+                credits = float(current.pop("credits", "0") or 0)
             except ValueError:
                 credits = 0.0
+            courses.append(ScheduleCourse(
+                status=current.get("status", ""),
+                crn=current.get("crn", ""),
+                course_code=current["course_code"],
+                section=current["section"],
+                course_title=current.get("title", ""),
+                credits=credits,
+                schedule_type=current.get("schedule type", ""),
+                instructor=current.get("instructor", ""),
+                day=current.get("days", ""),
+                start_time=start.strip(),
+                end_time=end.strip(),
+                also_register_in=current.get("also register in") or None,
+            ))
+
+    with open(md_file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            header = _MD_HEADER_RE.match(line)
+            if header:
+                flush()
+                current = {"course_code": header.group(1), "section": header.group(2)}
+                continue
+            field = _MD_FIELD_RE.match(line)
+            if field and current is not None:
+                current[field.group(1).strip().lower()] = field.group(2).strip()
+    flush()
+    return courses
 
-            # Initialize fields that may come from subsequent rows.
-            meeting_day = ""
-            start_time = ""
-            end_time = ""
-            also_register_in = ""
 
-            # Process subsequent rows that belong to the same course entry.
+def _constrained_courses(
+    md_file_path: str,
+    courses: Optional[List[ScheduleCourse]],
+    constraints: ScheduleConstraints,
+    links: Optional[SectionLinks] = None,
+) -> Optional[List[ScheduleCourse]]:
+    """
+    The section list after filter_sections, read from md_file_path if needed.
+    Returns 'courses' untouched (possibly None) when nothing needs filtering.
+    Raises FileNotFoundError for a missing markdown file.
+    """
+    if constraints.is_empty():
+        return courses
+    if courses is None:
+        courses = read_courses_markdown(md_file_path)
+    return filter_sections(courses, constraints, links)
+
+# ----------------------------------------------------------------------
+# 5) PROMPT CONTEXT ENCODERS (markdown vs compact)
+# ----------------------------------------------------------------------
+def encode_courses_markdown(courses: List[ScheduleCourse]) -> str:
+    """
+    The verbose scraped_courses.md format (one header + bullet list per section).
+    """
+    parts = ["# Course List\n\n"]
+    for c in courses:
+        parts.append(f"## {c.course_code} (Section {c.section})\n\n")
+        parts.append(f"- **CRN**: {c.crn}\n")
+        parts.append(f"- **Title**: {c.course_title}\n")
+        parts.append(f"- **Status**: {c.status}\n")
+        parts.append(f"- **Credits**: {c.credits}\n")
+        parts.append(f"- **Schedule Type**: {c.schedule_type}\n")
+        parts.append(f"- **Instructor**: {c.instructor}\n")
+        parts.append(f"- **Days**: {c.day}\n")
+        parts.append(f"- **Time**: {c.start_time} - {c.end_time}\n")
+        if c.also_register_in:
+            parts.append(f"- **Also Register in**: {c.also_register_in}\n")
+        parts.append("\n---\n\n")
+    return "".join(parts)
+
+
+COMPACT_CONTEXT_LEGEND = (
+    "Format: '# <course_code>|<course_title>' starts a course. Each section is one line "
+    "crn|section|schedule_type|credits|status|days|start-end|instructor|also_register_in. "
+    "Indented lines are tutorials/labs of the lecture above. '^' = same value as that lecture. "
+    "also_register_in omits the course code when it is the same course."
+)
+
+
+def _format_credits(credits: float) -> str:
+    return f"{credits:g}"
+
+
+def encode_courses_compact(courses: List[ScheduleCourse], links: Optional[SectionLinks] = None) -> str:
+    """
+    One pipe-separated line per section, grouped by course code, with each
+    tutorial placed under its (first) linked lecture and repeated fields
+    deduplicated. Keeps every ScheduleCourse field (see decode_courses_compact).
+    """
+    if links is None:
+        links = SectionLinks.from_courses(courses)
+    by_code = {}
+    for course in courses:
+        by_code.setdefault(course.course_code, []).append(course)
+
+    lines = [COMPACT_CONTEXT_LEGEND]
+    for code, sections in by_code.items():
+        title = sections[0].course_title
+        lines.append(f"# {code}|{title}")
+
+        primaries = [s for s in sections if is_primary_section(s)]
+        secondaries = _sections_by_id(s for s in sections if not is_primary_section(s))
+        children = {id(p): [] for p in primaries}
+        placed = set()
+        for p in primaries:
+            for t in _linked_tutorials(p, links, secondaries):
+                if id(t) not in placed:
+                    placed.add(id(t))
+                    children[id(p)].append(t)
+        orphans = [s for s in sections if not is_primary_section(s) and id(s) not in placed]
+
+        def line(s: ScheduleCourse, parent: Optional[ScheduleCourse]) -> str:
+            def same(field: str) -> str:
+                value = getattr(s, field)
+                return "^" if parent is not None and value == getattr(parent, field) and value else value
+
+            links = s.also_register_in or ""
+            if links.startswith(code + " "):
+                links = links[len(code) + 1:]
+            fields = [
+                s.crn, s.section, same("schedule_type"), _format_credits(s.credits), same("status"),
+                s.day, f"{s.start_time}-{s.end_time}" if s.start_time or s.end_time else "",
+                same("instructor"), links,
+            ]
+            if s.course_title != title:
+                fields.append(s.course_title)
+            return "|".join(fields)
+
+        for p in primaries:
+            lines.append(line(p, None))
+            lines.extend("  " + line(t, p) for t in children[id(p)])
+        lines.extend(line(t, None) for t in orphans)
+    return "\n".join(lines) + "\n"
+
+
+def decode_courses_compact(text: str) -> List[ScheduleCourse]:
+    """
+    Inverse of encode_courses_compact (course order within a code follows the
+    lecture/tutorial grouping).
+    """
+    courses = []
+    code = title = ""
+    parent = None
+    for raw in text.splitlines():
+        if not raw.strip() or raw.startswith("Format:"):
+            continue
+        if raw.startswith("# "):
+            code, _, title = raw[2:].partition("|")
+            parent = None
+            continue
+        indented = raw.startswith("  ")
+        fields = raw.strip().split("|")
+        crn, section, schedule_type, credits, status, day, times, instructor, links = fields[:9]
+        ref = parent if indented else None
+
+        def inherit(value: str, field: str) -> str:
+            return getattr(ref, field) if value == "^" and ref is not None else value
+
+        start, _, end = times.partition("-")
+        if links and not re.match(r"^[A-Z]{3,4}\s?\d{4}", links):
+            links = f"{code} {links}"
+        course = ScheduleCourse(
+            status=inherit(status, "status"),
+            crn=crn,
+            course_code=code,
+            section=section,
+            course_title=fields[9] if len(fields) > 9 else title,
+            credits=float(credits),
+            schedule_type=inherit(schedule_type, "schedule_type"),
+            instructor=inherit(instructor, "instructor"),
+            day=day,
+            start_time=start,
+            end_time=end,
+            also_register_in=links or None,
+        )
+        courses.append(course)
+        if not indented:
+            parent = course
+    return courses
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count of 'text' with tiktoken's cl100k_base when installed,
+    otherwise a word/punctuation split that tracks it closely for this data.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return len(re.findall(r"\w+|[^\w\s]", text))
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def context_token_report(courses: List[ScheduleCourse]) -> dict:
+    """
+    Compares the prompt size of the markdown and compact encodings.
+    """
+    markdown = encode_courses_markdown(courses)
+    compact = encode_courses_compact(courses)
+    report = {
+        "sections": len(courses),
+        "markdown": {"chars": len(markdown), "tokens": estimate_tokens(markdown)},
+        "compact": {"chars": len(compact), "tokens": estimate_tokens(compact)},
+    }
+    report["token_ratio"] = round(report["markdown"]["tokens"] / max(1, report["compact"]["tokens"]), 2)
+    return report
+
+# ----------------------------------------------------------------------
+# 6) ASYNC / STREAMING VARIANTS
+# ----------------------------------------------------------------------
+class ScheduleStreamParser:
+    """
+    Incremental parser for a streamed GenerateSchedulesResponse JSON document.
+    feed() takes the next text delta and returns every SingleSchedule whose
+    object inside the top-level "schedules" array has just been closed.
+    Anything before the first '{' (e.g. a code fence) is ignored; schedule
+    objects that fail validation are skipped and counted in 'skipped'.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._last_key = None
+        self._in_schedules = False
+        self._object_start = None
+        self.skipped = 0
+
+    def feed(self, chunk: str) -> List[SingleSchedule]:
+        self._text += chunk
+        found = []
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start + 1:i]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._last_key = self._last_string
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == "schedules":
+                    self._in_schedules = True
+                elif ch == "{" and self._depth == 2 and self._in_schedules:
+                    self._object_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._depth == 2 and self._object_start is not None:
+                    try:
+                        found.append(SingleSchedule.model_validate_json(text[self._object_start:i + 1]))
+                    except ValueError:
+                        self.skipped += 1
+                    self._object_start = None
+                elif ch == "]" and self._depth == 1:
+                    self._in_schedules = False
             i += 1
-            while i < row_count:
-                next_text = all_rows[i].get_text(separator=" ", strip=True)
-                lowered = next_text.lower()
-                if "meeting date:" in lowered:
-                    # Extract day and time info.
-                    day_match = re.search(r"Days:\s*(.+?)\s*Time:", next_text)
-                    time_match = re.search(r"Time:\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})", next_text)
-                    if day_match:
-                        meeting_day = day_match.group(1).strip()
-                    if time_match:
-                        start_time = time_match.group(1)
-                        end_time = time_match.group(2)
-                    i += 1
-                    continue
-                elif "also register in:" in lowered:
-                    # Extract additional registration info.
-                    parts = re.split(r"Also Register in:", next_text, flags=re.IGNORECASE)
-                    if len(parts) > 1:
-                        also_register_in = parts[1].strip()
-                    i += 1
-                    continue
-                elif "section information:" in lowered:
-                    # Do not capture section information for now; skip it and break.
-                    i += 1
-                    break
-                else:
+
+        # Drop text that can no longer be part of a pending schedule or key.
+        keep_from = i
+        if self._object_start is not None:
+            keep_from = self._object_start
+        elif self._in_string:
+            keep_from = self._string_start
+        self._text = text[keep_from:]
+        self._pos = i - keep_from
+        if self._object_start is not None:
+            self._object_start -= keep_from
+        if self._in_string:
+            self._string_start -= keep_from
+        return found
+
+
+async def _within(awaitable, deadline: Optional[float]):
+    """
+    Awaits 'awaitable', raising TimeoutError once the loop clock passes 'deadline'.
+    """
+    if deadline is None:
+        return await awaitable
+    remaining = deadline - asyncio.get_running_loop().time()
+    return await asyncio.wait_for(awaitable, timeout=max(0.0, remaining))
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    return asyncio.get_running_loop().time() + timeout if timeout is not None else None
+
+
+async def _run_steps_async(steps, run_step):
+    """
+    _run_steps with an async run_step. Cancellation is not an Exception, so
+    it propagates instead of being fed into the generator.
+    """
+    result, error = None, None
+    while True:
+        try:
+            kind, payload = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = await run_step(kind, payload), None
+        except Exception as e:
+            result, error = None, e
+
+
+@TRACER.traced("get_course_codes")
+async def get_course_codes_async(
+    client: AsyncGroq,
+    allowed_codes: Union[List[str], "CourseCodeIndex"],
+    audio_file_path: Optional[str] = None,
+    raw_text: Optional[str] = None,
+    transcription_model: str = "whisper-large-v3-turbo",
+    prompt: Optional[str] = None,
+    model: str = "llama3-70b-8192",
+    cache: Optional["ResultCache"] = None,
+    fast_path: bool = True,
+    timeout: Optional[float] = None,
+    audio_preprocessing: Optional["AudioPreprocessing"] = None,
+) -> GetCourseCodesResponse:
+    """
+    asyncio version of get_course_codes on an AsyncGroq client, sharing its
+    prompt, fast path, cache and filtering. 'timeout' (seconds) bounds the
+    whole call; running out returns an error response. Cancelling the task
+    cancels the in-flight request.
+    """
+    deadline = _deadline(timeout)
+    code_index = allowed_codes if isinstance(allowed_codes, CourseCodeIndex) else CourseCodeIndex(allowed_codes)
+    steps = _course_codes_steps(
+        code_index, audio_file_path, raw_text, transcription_model, prompt, model, cache, fast_path,
+        audio_preprocessing,
+    )
+
+    async def run_step(kind: str, payload):
+        if kind == "blocking":
+            return await asyncio.to_thread(payload)
+        if kind == "transcribe_audio":
+            return await _within(transcribe_audio_async(client, *payload), deadline)
+        if kind == "transcription":
+            return await _within(client.audio.transcriptions.create(**payload), deadline)
+        return await _within(client.chat.completions.create(**payload), deadline)
+
+    return await _run_steps_async(steps, run_step)
+
+
+async def stream_schedules(
+    client: AsyncGroq,
+    md_file_path: str,
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str] = None,
+    model: str = "llama3-70b-8192",
+    courses: Optional[List[ScheduleCourse]] = None,
+    context_encoding: str = "markdown",
+    timeout: Optional[float] = None,
+    constraints: Optional["ScheduleConstraints"] = None,
+    links: Optional[SectionLinks] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[SingleSchedule]:
+    """
+    Sends the generate_schedules prompt with stream=True and yields each
+    SingleSchedule as soon as its JSON object is complete, long before the
+    whole response has arrived. JSON mode is not combined with streaming,
+    so the prompt's schema instructions alone keep the output in shape.
+
+    Raises FileNotFoundError for a missing markdown file and TimeoutError when
+    'timeout' seconds pass ('deadline', an event-loop time, replaces the
+    timeout when a caller shares one budget across several calls). Closing or
+    cancelling the consumer closes the HTTP stream. Sections are filtered by
+    'constraints' (compiled from 'special_requests' when not given) as in
+    generate_schedules.
+    """
+    if deadline is None:
+        deadline = _deadline(timeout)
+    if constraints is None:
+        constraints = compile_special_request(special_requests)
+    with TRACER.span("schedule_context", encoding=context_encoding) as span:
+        courses = _constrained_courses(md_file_path, courses, constraints, links)
+        md_content = _schedule_context(md_file_path, courses, context_encoding, links)
+        span.set(context_chars=len(md_content))
+    messages = schedule_messages(mandatory_courses, elective_courses, special_requests, md_content, context_encoding)
+    with TRACER.span("schedule_completion", model=model, stream=True) as span:
+        stream = await _within(client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0,
+            stream=True,
+        ), deadline)
+        parser = ScheduleStreamParser()
+        chunks = stream.__aiter__()
+        streamed = 0
+        try:
+            while True:
+                try:
+                    chunk = await _within(chunks.__anext__(), deadline)
+                except StopAsyncIteration:
                     break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    for schedule in parser.feed(delta):
+                        streamed += 1
+                        yield schedule
+        finally:
+            span.set(schedules=streamed)
+            close = getattr(stream, "close", None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
 
-            # Now create a ScheduleCourse with all the captured data.
-            course = ScheduleCourse(
-                status=status_text,
-                crn=crn,
-                course_code=course_and_number,
-                section=section,
-                course_title=course_title,
-                credits=credits,
-                schedule_type=schedule_type,
-                instructor=instructor,
-                day=meeting_day,
-                start_time=start_time,
-                end_time=end_time,
-                also_register_in=also_register_in if also_register_in else None
+
+@TRACER.traced("generate_schedules")
+async def generate_schedules_async(
+    client: AsyncGroq,
+    md_file_path: str,
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str] = None,
+    model: str = "llama3-70b-8192",
+    engine: str = "llm",
+    courses: Optional[List[ScheduleCourse]] = None,
+    max_schedules: Optional[int] = None,
+    context_encoding: str = "markdown",
+    timeout: Optional[float] = None,
+    on_schedule=None,
+    constraints: Optional["ScheduleConstraints"] = None,
+    validate: bool = True,
+    min_schedules: int = 3,
+    max_repair_rounds: int = 1,
+    links: Optional[SectionLinks] = None,
+    top_k: Optional[int] = None,
+    weights: Optional["RankingWeights"] = None,
+) -> GenerateSchedulesResponse:
+    """
+    asyncio version of generate_schedules. The LLM engine streams the answer
+    through stream_schedules; 'on_schedule' (if given) is called with each
+    SingleSchedule as it arrives (with validate=True, only the accepted,
+    corrected ones). A timeout or API failure returns an error response,
+    unless schedules were already delivered: those are kept, and a failing
+    repair round likewise keeps what was accepted. 'timeout' bounds the
+    stream and the repair rounds together. Cancellation propagates to the
+    caller.
+    """
+    if constraints is None:
+        constraints = compile_special_request(special_requests)
+    if engine == "solver":
+        return _solver_schedules(
+            md_file_path, courses, mandatory_courses, elective_courses, special_requests, max_schedules,
+            constraints, links, top_k, weights,
+        )
+
+    deadline = _deadline(timeout)
+    schedules = []
+    validator = None
+    try:
+        if links is None and courses is not None:
+            links = SectionLinks.from_courses(courses)
+        if validate:
+            courses = _constrained_courses(md_file_path, courses, constraints, links)
+            index_courses = courses if courses is not None else read_courses_markdown(md_file_path)
+            validator = ScheduleValidator(
+                SectionIndex(index_courses, links), mandatory_courses, max_campus_days=constraints.max_campus_days,
             )
-            courses.append(course)
-        else:
-            i += 1
+    except Exception:
+        return _schedules_error(mandatory_courses, elective_courses, special_requests)
+
+    try:
+        async for schedule in stream_schedules(
+            client, md_file_path, mandatory_courses, elective_courses, special_requests,
+            model=model, courses=courses, context_encoding=context_encoding,
+            constraints=ScheduleConstraints() if validator is not None else constraints,  # already applied
+            links=links, deadline=deadline,
+        ):
+            if validator is not None:
+                schedule = validator.accept(schedule)
+                if schedule is None:
+                    continue
+            schedules.append(schedule)
+            if on_schedule is not None:
+                on_schedule(schedule)
+    except Exception as e:
+        if not schedules:
+            return _schedules_error(mandatory_courses, elective_courses, special_requests)
+        if validator is not None:
+            validator.report.add_error(e)
+            max_repair_rounds = 0   # the stream broke off: keep what was delivered
+    if validator is not None:
+        steps = _repair_steps(
+            validator, schedules, index_courses, mandatory_courses, elective_courses, special_requests,
+            model, min_schedules, max_repair_rounds, on_schedule,
+        )
+
+        async def run_step(kind: str, request: dict):
+            return await _within(client.chat.completions.create(**request), deadline)
+
+        with TRACER.span("schedule_validation"):   # the repair report lands here, as in generate_schedules
+            await _run_steps_async(steps, run_step)
+
+    return _finish_schedules(
+        GenerateSchedulesResponse(
+            status="success",
+            requested_courses=RequestedCourses(),
+            special_requests=special_requests,
+            schedules=schedules,
+        ),
+        mandatory_courses, elective_courses, special_requests,
+    )
+
+# ----------------------------------------------------------------------
+# 7) SCHEDULE REPAIR: ask the model for the schedules the validator dropped
+# ----------------------------------------------------------------------
+def _repair_messages(
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+    courses: List[ScheduleCourse],
+    missing: int,
+    validator: ScheduleValidator,
+) -> list:
+    """
+    Follow-up prompt asking only for the missing schedules. Always uses the
+    compact course list, and lists the accepted schedules by CRN only.
+    """
+    messages = schedule_messages(
+        mandatory_courses, elective_courses, special_requests,
+        encode_courses_compact(courses, validator.index.links), "compact",
+    )
+    messages[1]["content"] += (
+        f" REPAIR: only {missing} more valid schedule(s) are needed. Use only CRNs from the course list, "
+        "include each lecture's tutorial, and avoid time conflicts. Do not repeat these accepted "
+        f"schedules (CRNs): {validator.accepted_crns() or 'none'}."
+    )
+    return messages
+
+
+def _validated_schedules(
+    client: Groq,
+    parsed: GenerateSchedulesResponse,
+    courses: List[ScheduleCourse],
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+    model: str,
+    min_schedules: int,
+    max_repair_rounds: int,
+    links: Optional[SectionLinks] = None,
+    max_campus_days: Optional[int] = None,
+) -> List[SingleSchedule]:
+    """
+    Runs every schedule of 'parsed' through a ScheduleValidator and, while
+    fewer than 'min_schedules' survive, asks the model for just the missing
+    ones (at most 'max_repair_rounds' extra calls). A failing repair call
+    ends the repair; the schedules accepted so far are still returned.
+    """
+    validator = ScheduleValidator(SectionIndex(courses, links), mandatory_courses, max_campus_days=max_campus_days)
+    schedules = [s for s in map(validator.accept, parsed.schedules) if s is not None]
+    steps = _repair_steps(
+        validator, schedules, courses, mandatory_courses, elective_courses, special_requests,
+        model, min_schedules, max_repair_rounds,
+    )
+    return _run_steps(steps, lambda kind, request: client.chat.completions.create(**request))
 
-    return courses
+
+def _repair_steps(
+    validator: ScheduleValidator,
+    schedules: List[SingleSchedule],
+    courses: List[ScheduleCourse],
+    mandatory_courses: List[str],
+    elective_courses: List[str],
+    special_requests: Optional[str],
+    model: str,
+    min_schedules: int,
+    max_repair_rounds: int,
+    on_schedule=None,
+):
+    """
+    The repair loop as a step generator (see _course_codes_steps): while
+    fewer than 'min_schedules' schedules were accepted, yields ("repair",
+    request) for client.chat.completions.create and appends the accepted
+    schedules of the answer to 'schedules' (passing each to 'on_schedule').
+    Every call counts as a repair round, failed or not; a failed call is
+    recorded in the report and ends the repair. Returns 'schedules'.
+    """
+    while len(schedules) < min_schedules and validator.report.repair_rounds < max_repair_rounds:
+        validator.report.repair_rounds += 1
+        missing = min_schedules - len(schedules)
+        try:
+            with TRACER.span("schedule_repair", missing=missing) as span:
+                chat_completion = yield "repair", _repair_request(
+                    validator, courses, mandatory_courses, elective_courses, special_requests, model, missing,
+                )
+                span.set(**usage_attributes(chat_completion))
+        except Exception as e:   # e.g. a 429: keep what was already accepted
+            validator.report.add_error(e)
+            break
+        for schedule in _repaired(validator, chat_completion):
+            schedules.append(schedule)
+            if on_schedule is not None:
+                on_schedule(schedule)
+    _record_repair(validator.report)
+    return schedules
+
+
+def _repair_request(validator, courses, mandatory_courses, elective_courses, special_requests, model, missing) -> dict:
+    return dict(
+        model=model,
+        messages=_repair_messages(mandatory_courses, elective_courses, special_requests, courses, missing, validator),
+        temperature=0,
+        stream=False,
+        response_format={"type": "json_object"},
+    )
+
+
+def _repaired(validator: ScheduleValidator, chat_completion) -> List[SingleSchedule]:
+    try:
+        more = GenerateSchedulesResponse.model_validate_json(chat_completion.choices[0].message.content)
+    except ValueError:
+        return []
+    return [s for s in map(validator.accept, more.schedules) if s is not None]
+
+
+def _record_repair(report: ScheduleRepairReport) -> None:
+    TRACER.current().set(
+        **report.model_dump(exclude={"dropped", "errors"}),
+        dropped=sum(report.dropped.values()),
+        errors=len(report.errors),
+    )
 
 # ----------------------------------------------------------------------
-# 6) MAIN USAGE: Combining all functionality
+# 8) MAIN USAGE: Combining all functionality
 # ----------------------------------------------------------------------
 if __name__ == "__main__":
     load_dotenv()
     client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
     # Define valid course codes.
-    valid_codes = [
+    valid_codes = CourseCodeIndex([
         "COMP1405", "COMP1805", "COMP2804", "COMP1406",
         "BUSI1001", "BUSI2001", "BUSI2002", "BUSI3001", 
         "MATH1007", "BIOL1902", "PSYC1001"
-    ]
+    ])
 
     # ------------------------------------------------------------------
     # (A) GET COURSE CODES (prefer audio if provided, else use raw text)
@@ -466,6 +1970,10 @@ if __name__ == "__main__":
     audio_file_path = ""
     raw_text_input = "I want to mandatory register COMP 1405, COMP 1805, MATH 1007, BIOL1902, PSYC1001"
 
+    result_cache = ResultCache(
+        transcripts=DiskLRUStore(".result_cache/transcripts"),
+        extractions=DiskLRUStore(".result_cache/extractions"),
+    )
     codes_response = get_course_codes(
         client=client,
         allowed_codes=valid_codes,
@@ -473,7 +1981,9 @@ if __name__ == "__main__":
         raw_text=raw_text_input,
         transcription_model="whisper-large-v3-turbo",
         prompt="Clarify domain-specific terms if needed.",
-        model="llama-3.1-8b-instant"
+        model="llama-3.1-8b-instant",
+        cache=result_cache,
+        audio_preprocessing=AudioPreprocessing() if ffmpeg_binary() else None,
     )
 
     print("\n--- GET COURSE CODES RESPONSE ---")
@@ -499,11 +2009,13 @@ if __name__ == "__main__":
             departments.add(match.group(1))
 
     # Scrape everything from relevant departments
+    catalog_cache = CatalogCache(ttl_seconds=float(os.getenv("CATALOG_CACHE_TTL", "3600")))
+    print(f"Fetching courses for departments: {', '.join(sorted(departments))}")
     all_scraped_courses = []
-    for dept in departments:
-        print(f"Fetching courses for department: {dept}")
-        dept_courses = fetch_courses_for_department(dept)
-        all_scraped_courses.extend(dept_courses)
+    for result in fetch_courses_for_departments(sorted(departments), cache=catalog_cache):
+        if result.error:
+            print(f"Failed to fetch {result.department}: {result.error}")
+        all_scraped_courses.extend(result.courses)
 
     # ------------------------------------------------------------------
     # FILTER RELEVANT SCRAPED COURSES ONLY
@@ -520,21 +2032,8 @@ if __name__ == "__main__":
     # WRITE ONLY THE RELEVANT COURSES TO .MD
     # ------------------------------------------------------------------
     output_file = "scraped_courses.md"
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("# Course List\n\n")
-        for c in relevant_courses:
-            f.write(f"## {c.course_code} (Section {c.section})\n\n")
-            f.write(f"- **CRN**: {c.crn}\n")
-            f.write(f"- **Title**: {c.course_title}\n")
-            f.write(f"- **Status**: {c.status}\n")
-            f.write(f"- **Credits**: {c.credits}\n")
-            f.write(f"- **Schedule Type**: {c.schedule_type}\n")
-            f.write(f"- **Instructor**: {c.instructor}\n")
-            f.write(f"- **Days**: {c.day}\n")
-            f.write(f"- **Time**: {c.start_time} - {c.end_time}\n")
-            if c.also_register_in:
-                f.write(f"- **Also Register in**: {c.also_register_in}\n")
-            f.write("\n---\n\n")
+    with TRACER.span("write_markdown", rows=len(relevant_courses)), open(output_file, "w", encoding="utf-8") as f:
+        f.write(encode_courses_markdown(relevant_courses))
 
     print(f"\nWrote {len(relevant_courses)} relevant courses to {output_file}")
 
@@ -550,8 +2049,18 @@ if __name__ == "__main__":
         mandatory_courses=mandatory_list,
         elective_courses=elective_list,
         special_requests=codes_response.special_request,
-        model="llama3-70b-8192"
+        model="llama3-70b-8192",
+        engine=os.getenv("SCHEDULE_ENGINE", "llm"),  # "solver" skips the LLM entirely
+        courses=relevant_courses,
+        context_encoding=os.getenv("SCHEDULE_CONTEXT", "markdown"),  # or "compact"
+        # Solver only: keep the best-ranked schedules (see schedule_ranking).
+        top_k=int(os.getenv("SCHEDULE_TOP_K")) if os.getenv("SCHEDULE_TOP_K") else None,
     )
 
     print("\n--- GENERATE SCHEDULES RESPONSE ---")
-    print(schedules_response.model_dump_json(indent=2))
\ No newline at end of file
+    print(schedules_response.model_dump_json(indent=2))
+
+    # COURSE_PLANNER_TRACE=1 COURSE_PLANNER_METRICS_FILE=metrics.prom enables this.
+    metrics_file = TRACER.write_metrics()
+    if metrics_file:
+        print(f"\nWrote stage metrics to {metrics_file}")
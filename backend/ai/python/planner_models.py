@@ -0,0 +1,204 @@
+"""
+Pydantic schemas shared by the planner modules: the get_course_codes and
+generate_schedules responses, ScheduleCourse with its weekly slot bitmask,
+and the CompactSection rows the scraper produces in bulk. Also holds the
+small normalizers every module keys its lookups by.
+"""
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic import BaseModel
+# For Pydantic v2 you can import field_validator:
+from pydantic import field_validator
+
+MAX_SCHEDULE_CREDITS = 2.5
+
+
+# ----------------------------------------------------------------------
+# 1) SCHEMA FOR GET_COURSE_CODES
+# ----------------------------------------------------------------------
+class CourseCode(BaseModel):
+    """
+    Represents a single course code.
+    """
+    course_code: str
+
+class GetCourseCodesResponse(BaseModel):
+    """
+    JSON response schema for get_course_codes.
+
+    We split recognized codes into two lists:
+    - mandatory
+    - electives
+
+    If unspecified, codes go into mandatory.
+    'special_request' captures additional scheduling requirements
+    (e.g., "no classes on Friday").
+    """
+    status: str               # "success" or "error"
+    requested_input: str      # The transcribed user speech or raw text
+    special_request: str      # The user's special request
+    mandatory: List[CourseCode] = []
+    electives: List[CourseCode] = []
+
+# ----------------------------------------------------------------------
+# 2) SCHEMA FOR GENERATE_SCHEDULES
+# ----------------------------------------------------------------------
+# Weekly meeting times are packed into a single int: one bit per 5-minute
+# slot, 288 slots per day, Monday first. Two sections overlap iff a & b != 0.
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+DAY_INDEX = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+def to_minutes(hhmm: str) -> Optional[int]:
+    try:
+        hours, minutes = hhmm.strip().split(":")
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def meeting_mask(day: str, start_time: str, end_time: str) -> int:
+    """
+    ("Mon Wed", "10:05", "11:25") -> bitmask of the 5-minute slots occupied
+    during the week. Missing days/times (e.g. online sections) give 0.
+    """
+    start = to_minutes(start_time) if start_time else None
+    end = to_minutes(end_time) if end_time else None
+    if start is None or end is None or end <= start:
+        return 0
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)
+    daily = ((1 << (last - first)) - 1) << first
+    mask = 0
+    for token in day.split():
+        index = DAY_INDEX.get(token[:3].lower())
+        if index is not None:
+            mask |= daily << (index * SLOTS_PER_DAY)
+    return mask
+
+
+def masks_overlap(a: int, b: int) -> bool:
+    return (a & b) != 0
+
+
+class ScheduleCourse(BaseModel):
+    """
+    Represents a single class’s schedule information.
+    """
+    status: str               # e.g. "open", "registration closed"
+    crn: str                  # random numeric identifier; we force it to be a string
+    course_code: str
+    section: str              # e.g. "A", "B"
+    course_title: str         # e.g. "Intro to Programming"
+    credits: float            # e.g. 0, 0.5, or 1
+    schedule_type: str        # "lecture" or "tutorial"
+    instructor: str           # e.g. "Jane Smith"
+    day: str
+    start_time: str
+    end_time: str
+    also_register_in: Optional[str] = None   # NEW FIELD: extra registration options
+
+    @property
+    def meeting_mask(self) -> int:
+        """
+        Bitmask of the current meeting times (see meeting_mask(), cached per
+        distinct time), so it follows assignments and model_copy(update=...).
+        Kept out of the instance so equal sections always compare equal.
+        """
+        return meeting_mask(self.day, self.start_time, self.end_time)
+
+    def overlaps(self, other) -> bool:
+        """
+        Time conflict with another ScheduleCourse or CompactSection.
+        """
+        return masks_overlap(self.meeting_mask, other.meeting_mask)
+
+    # This validator will convert a numeric crn into a string before validation.
+    @field_validator('crn', mode='before')
+    def coerce_crn_to_str(cls, v):
+        return str(v)
+
+
+class CompactSection:
+    """
+    Lightweight __slots__ record for bulk scraper output. Holds the same fields
+    as ScheduleCourse plus the meeting bitmask, without pydantic overhead.
+    The solver and the schedule validator accept these rows directly and
+    convert only the sections they output (see as_schedule_course).
+    """
+    __slots__ = (
+        "status", "crn", "course_code", "section", "course_title", "credits",
+        "schedule_type", "instructor", "day", "start_time", "end_time",
+        "also_register_in", "meeting_mask",
+    )
+
+    def __init__(self, status, crn, course_code, section, course_title, credits,
+                 schedule_type, instructor, day, start_time, end_time,
+                 also_register_in=None):
+        self.status = status
+        self.crn = str(crn)
+        self.course_code = course_code
+        self.section = section
+        self.course_title = course_title
+        self.credits = credits
+        self.schedule_type = schedule_type
+        self.instructor = instructor
+        self.day = day
+        self.start_time = start_time
+        self.end_time = end_time
+        self.also_register_in = also_register_in
+        self.meeting_mask = meeting_mask(day, start_time, end_time)
+
+    def overlaps(self, other) -> bool:
+        return masks_overlap(self.meeting_mask, other.meeting_mask)
+
+    def to_schedule_course(self) -> ScheduleCourse:
+        return ScheduleCourse(**{f: getattr(self, f) for f in self.__slots__[:-1]})
+
+
+def as_schedule_course(section) -> ScheduleCourse:
+    """
+    A ScheduleCourse for a schedule's output, owned by that schedule.
+    """
+    if isinstance(section, CompactSection):
+        return section.to_schedule_course()
+    return section.model_copy()
+
+
+class SingleSchedule(BaseModel):
+    """
+    Represents one complete schedule option.
+    """
+    schedule_id: int
+    courses: List[ScheduleCourse] = []
+
+class RequestedCourses(BaseModel):
+    """
+    Stores mandatory/elective courses inside a sub-model.
+    """
+    mandatory: List[CourseCode] = []
+    electives: List[CourseCode] = []
+
+class GenerateSchedulesResponse(BaseModel):
+    """
+    JSON response schema for generate_schedules.
+    """
+    status: str                 # "success" or "error"
+    requested_courses: RequestedCourses
+    special_requests: Optional[str]
+    schedules: List[SingleSchedule] = []
+
+
+def normalize_course_code(code: str) -> str:
+    """
+    "COMP 1405" / "comp1405" -> "COMP1405"
+    """
+    return code.upper().replace(" ", "")
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
@@ -0,0 +1,430 @@
+"""
+Resident planner service: keeps everything course_planner needs warm and
+answers requests over local HTTP or a Unix socket.
+
+    python planner_service.py --port 8700
+    python planner_service.py --unix /tmp/course_planner.sock --snapshot catalog_snapshot
+
+Kept in memory across requests: the Groq client (with its connection pool),
+the allowed-code index, the generated JSON-schema prompt text, and the parsed
+catalog per department (loaded from a catalog snapshot and/or scraped on
+first use through the CatalogCache). Requests run concurrently on threads.
+
+Endpoints (JSON in, JSON out):
+- POST /course-codes   {"raw_text" | "audio_base64" | "audio_path", "model"?}
+                       ("audio_path" only inside --upload-dir)
+- POST /schedules      {"mandatory", "electives", "special_requests"?, "engine"?,
+                        "context_encoding"?, "max_schedules"?, "top_k"?, "weights"?}
+                       ("top_k"/"weights" rank the solver's schedules, see
+                       schedule_ranking.RankingWeights)
+- POST /plan           course-codes input plus the /schedules options, with
+                       "extraction_model"? / "schedule_model"? in place of "model"
+                       -> {"course_codes", "schedules"}
+- GET  /healthz        warm-state summary
+- GET  /metrics        Prometheus text from planner_tracing
+"""
+import argparse
+import base64
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from groq import Groq
+
+from audio_preprocessing import AudioPreprocessing, ffmpeg_binary
+from course_planner import (
+    BANNER_SEARCH_URL,
+    CatalogCache,
+    CourseCodeIndex,
+    GenerateSchedulesResponse,
+    GetCourseCodesResponse,
+    HostRateLimiter,
+    ScheduleCourse,
+    SectionLinks,
+    fetch_courses_for_department,
+    generate_schedules,
+    get_course_codes,
+    normalize_course_code,
+    schedule_system_prompt,
+    schema_text,
+)
+from planner_tracing import TRACER
+
+DEFAULT_CODES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "js", "all_carleton_course_codes.txt"
+)
+
+
+class BadRequest(ValueError):
+    """
+    A request the service refuses; answered with HTTP 400.
+    """
+
+
+# /schedules options that /plan passes through.
+_SCHEDULE_OPTIONS = ("engine", "context_encoding", "max_schedules", "top_k", "weights")
+
+
+def _positive_int(body: dict, key: str) -> Optional[int]:
+    value = body.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise BadRequest(f"{key} must be a positive integer")
+    return value
+
+
+class WarmCatalog:
+    """
+    Parsed sections per department, with their lecture/tutorial
+    SectionLinks, kept in memory for 'ttl_seconds'. Misses go through the
+    CatalogCache (if any) and then the scraper; a department is fetched by
+    one request at a time while others wait for it.
+    """
+
+    def __init__(self, term_code: str = "202510", cache: Optional[CatalogCache] = None,
+                 ttl_seconds: float = 3600, min_request_interval: float = 0.25,
+                 url: str = BANNER_SEARCH_URL):
+        self.term_code = term_code
+        self.url = url
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self.session = requests.Session()
+        self.rate_limiter = HostRateLimiter(min_request_interval)
+        self._departments: Dict[str, tuple] = {}     # dept -> (loaded_at, by normalized code, links)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Preloads every department of a catalog_snapshot directory; returns
+        the number of sections.
+        """
+        from catalog_snapshot import CatalogSnapshot
+
+        snapshot = CatalogSnapshot(path)
+        now = time.monotonic()
+        for subject in snapshot.subjects:
+            self._store(subject, snapshot.courses(snapshot.subject_range(subject)), now,
+                        snapshot.links([subject]))
+        return len(snapshot)
+
+    def _store(self, department: str, courses: List[ScheduleCourse], loaded_at: float,
+               links: Optional[SectionLinks] = None) -> tuple:
+        by_code: Dict[str, List[ScheduleCourse]] = {}
+        for course in courses:
+            by_code.setdefault(normalize_course_code(course.course_code), []).append(course)
+        entry = (loaded_at, by_code, links if links is not None else SectionLinks.from_courses(courses))
+        with self._lock:
+            self._departments[department] = entry
+        return entry
+
+    def _entry(self, department: str) -> tuple:
+        department = department.upper()
+        with self._lock:
+            entry = self._departments.get(department)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                return entry
+            future = self._inflight.get(department)
+            owner = future is None
+            if owner:
+                future = self._inflight[department] = Future()
+        if owner:
+            try:
+                courses = fetch_courses_for_department(
+                    department, self.term_code, cache=self.cache, url=self.url,
+                    session=self.session, rate_limiter=self.rate_limiter,
+                )
+                links = self.cache.links(department, self.term_code) if self.cache is not None else None
+                future.set_result(self._store(department, courses, time.monotonic(), links))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(department, None)
+        return future.result()
+
+    def department(self, department: str) -> Dict[str, List[ScheduleCourse]]:
+        return self._entry(department)[1]
+
+    def sections(self, course_codes: List[str]) -> List[ScheduleCourse]:
+        keys = list(dict.fromkeys(normalize_course_code(c) for c in course_codes))
+        departments = list(dict.fromkeys(k.rstrip("0123456789") for k in keys))
+        loaded = {d: self.department(d) for d in departments}
+        return [s for k in keys for s in loaded[k.rstrip("0123456789")].get(k, [])]
+
+    def links(self, course_codes: List[str]) -> SectionLinks:
+        """
+        The stored lecture/tutorial graphs of every department in 'course_codes'.
+        """
+        departments = dict.fromkeys(normalize_course_code(c).rstrip("0123456789") for c in course_codes)
+        links = SectionLinks()
+        for department in departments:
+            links.update(self._entry(department)[2])
+        return links
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {d: sum(map(len, by_code.values())) for d, (_, by_code, _) in self._departments.items()}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class PlannerService:
+    """
+    The warm state plus one method per endpoint. Handlers only parse JSON
+    and call these, so the service can also be used in-process.
+
+    Audio normally arrives as "audio_base64". "audio_path" names a file the
+    service reads itself, so it is only accepted when 'upload_dir' is set and
+    the path resolves (symlinks included) to a file inside it.
+    """
+
+    def __init__(
+        self,
+        client,
+        code_index: CourseCodeIndex,
+        catalog: WarmCatalog,
+        extraction_model: str = "llama-3.1-8b-instant",
+        schedule_model: str = "llama3-70b-8192",
+        audio_preprocessing: Optional[AudioPreprocessing] = None,
+        upload_dir: Optional[str] = None,
+    ):
+        self.client = client
+        self.code_index = code_index
+        self.catalog = catalog
+        self.extraction_model = extraction_model
+        self.schedule_model = schedule_model
+        self.audio_preprocessing = audio_preprocessing
+        self.upload_dir = os.path.realpath(upload_dir) if upload_dir else None
+        self.started = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+        # Build the prompt text now instead of on the first request.
+        schema_text(GetCourseCodesResponse)
+        schedule_system_prompt()
+
+    def _count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _upload_path(self, audio_path: str) -> str:
+        if self.upload_dir is None:
+            raise BadRequest("audio_path is disabled; send audio_base64")
+        path = os.path.realpath(os.path.join(self.upload_dir, audio_path))
+        if os.path.commonpath([path, self.upload_dir]) != self.upload_dir:
+            raise BadRequest("audio_path must be inside the upload directory")
+        return path
+
+    def course_codes(self, body: dict) -> GetCourseCodesResponse:
+        self._count()
+        raw_text = body.get("raw_text")
+        if raw_text is not None and not isinstance(raw_text, str):
+            raise BadRequest("raw_text must be a string")
+        audio_path = temp_path = None
+        if not (raw_text and raw_text.strip()):   # raw_text wins, as in get_course_codes
+            if body.get("audio_base64"):
+                try:
+                    audio_bytes = base64.b64decode(body["audio_base64"], validate=True)
+                except (TypeError, ValueError):
+                    raise BadRequest("audio_base64 is not valid base64")
+                suffix = os.path.splitext(body.get("audio_filename") or "audio.m4a")[1] or ".m4a"
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+                    f.write(audio_bytes)
+                    audio_path = temp_path = f.name
+            elif body.get("audio_path"):
+                audio_path = self._upload_path(body["audio_path"])
+        try:
+            return get_course_codes(
+                client=self.client,
+                allowed_codes=self.code_index,
+                audio_file_path=audio_path,
+                raw_text=raw_text,
+                model=body.get("model") or self.extraction_model,
+                audio_preprocessing=self.audio_preprocessing,
+            )
+        finally:
+            if temp_path is not None:
+                os.unlink(temp_path)
+
+    def schedules(self, body: dict) -> GenerateSchedulesResponse:
+        self._count()
+        mandatory = list(body.get("mandatory") or [])
+        electives = list(body.get("electives") or [])
+        max_schedules = _positive_int(body, "max_schedules")
+        top_k = _positive_int(body, "top_k")
+        weights = body.get("weights")
+        if weights is not None:
+            from schedule_ranking import RankingWeights
+
+            try:
+                weights = RankingWeights(**weights)
+            except (TypeError, ValueError) as e:
+                raise BadRequest(f"invalid weights: {e}")
+        return generate_schedules(
+            client=self.client,
+            md_file_path="",
+            mandatory_courses=mandatory,
+            elective_courses=electives,
+            special_requests=body.get("special_requests"),
+            model=body.get("model") or self.schedule_model,
+            engine=body.get("engine", "llm"),
+            courses=self.catalog.sections(mandatory + electives),
+            max_schedules=max_schedules,
+            context_encoding=body.get("context_encoding", "compact"),
+            links=self.catalog.links(mandatory + electives),
+            top_k=top_k,
+            weights=weights,
+        )
+
+    def plan(self, body: dict) -> dict:
+        """
+        /course-codes then /schedules. The two steps use different models, so
+        they are chosen with "extraction_model" and "schedule_model".
+        """
+        codes = self.course_codes({**body, "model": body.get("extraction_model")})
+        result = {"course_codes": codes.model_dump(), "schedules": None}
+        if codes.status == "success":
+            options = {key: body[key] for key in _SCHEDULE_OPTIONS if key in body}
+            result["schedules"] = self.schedules({
+                **options,
+                "model": body.get("schedule_model"),
+                "mandatory": [c.course_code for c in codes.mandatory],
+                "electives": [c.course_code for c in codes.electives],
+                "special_requests": codes.special_request,
+            }).model_dump()
+        return result
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "allowed_codes": len(self.code_index),
+            "catalog_sections": self.catalog.summary(),
+        }
+
+
+def make_handler(service: PlannerService):
+    routes = {
+        "/course-codes": lambda body: service.course_codes(body).model_dump(),
+        "/schedules": lambda body: service.schedules(body).model_dump(),
+        "/plan": service.plan,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload) -> None:
+            self._send(status, json.dumps(payload).encode("utf-8"))
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._json(200, service.health())
+            elif self.path == "/metrics":
+                self._send(200, TRACER.export_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                self._json(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            route = routes.get(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if route is None:
+                self._json(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError as e:
+                self._json(400, {"error": f"invalid JSON: {e}"})
+                return
+            try:
+                self._json(200, route(body))
+            except BadRequest as e:
+                self._json(400, {"error": str(e)})
+            except Exception as e:
+                self._json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)   # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def make_server(service: PlannerService, host: str = "127.0.0.1", port: int = 8700,
+                unix_socket: Optional[str] = None):
+    handler = make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        return _UnixHTTPServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8700)
+    ap.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    ap.add_argument("--codes", default=DEFAULT_CODES_FILE, help="allowed course codes file")
+    ap.add_argument("--term", default="202510")
+    ap.add_argument("--cache", default="catalog_cache.sqlite3", help="catalog cache path ('' to disable)")
+    ap.add_argument("--snapshot", help="catalog_snapshot directory to preload")
+    ap.add_argument("--catalog-ttl", type=float, default=3600, help="seconds a department stays in memory")
+    ap.add_argument("--upload-dir", help="directory whose files requests may name with audio_path")
+    args = ap.parse_args()
+
+    load_dotenv()
+    catalog = WarmCatalog(args.term, CatalogCache(args.cache) if args.cache else None, args.catalog_ttl)
+    if args.snapshot:
+        print(f"preloaded {catalog.load_snapshot(args.snapshot)} sections from {args.snapshot}")
+    service = PlannerService(
+        Groq(api_key=os.getenv("GROQ_API_KEY")),
+        CourseCodeIndex.from_file(args.codes),
+        catalog,
+        audio_preprocessing=AudioPreprocessing() if ffmpeg_binary() else None,
+        upload_dir=args.upload_dir,
+    )
+    server = make_server(service, args.host, args.port, args.unix)
+    print(f"course planner service on {args.unix or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        catalog.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
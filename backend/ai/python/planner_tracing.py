@@ -0,0 +1,335 @@
+"""
+Per-stage tracing and metrics for the course_planner pipeline.
+
+Spans nest through a contextvar (asyncio tasks inherit it; use
+propagate_context for thread pools) and record a duration plus attributes
+such as prompt/completion tokens, bytes downloaded and rows parsed.
+Finished spans can be written as JSON lines, and are aggregated into
+Prometheus-style metrics:
+
+    course_planner_span_duration_seconds{span="..."}   histogram
+    course_planner_<attribute>_total{span="..."}       counter, see COUNTED_ATTRIBUTES
+    course_planner_span_errors_total{span="..."}       counter
+
+Tracing is off by default. Enable it with configure(enabled=True, ...) or
+the environment:
+
+    COURSE_PLANNER_TRACE=1
+    COURSE_PLANNER_TRACE_FILE=spans.jsonl      # optional JSON-lines sink
+    COURSE_PLANNER_METRICS_FILE=metrics.prom   # optional, see write_metrics()
+
+When disabled, span() returns a shared no-op object and traced() functions
+cost one attribute check per call.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+COUNTED_ATTRIBUTES = (
+    "prompt_tokens",
+    "completion_tokens",
+    "bytes_downloaded",
+    "audio_bytes",
+    "uploaded_bytes",
+    "rows_parsed",
+    "fast_path_hits",
+    "fast_path_fallbacks",
+)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_span = contextvars.ContextVar("course_planner_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    One timed stage. Use as a context manager (see Tracer.span).
+    """
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start", "duration",
+                 "attributes", "error", "_started", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+        self.duration = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self._started
+        try:
+            _current_span.reset(self._token)
+        except ValueError:   # closed from another context, e.g. an async generator finalized by the loop
+            pass
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_s": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Metrics:
+    """
+    Aggregates finished spans into a duration histogram and counters, per
+    span name.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._durations: Dict[str, list] = {}     # name -> [count, sum, bucket counts...]
+        self._counters: Dict[tuple, float] = {}   # (metric, name) -> value
+        self._lock = threading.Lock()
+
+    def observe(self, span: Span) -> None:
+        with self._lock:
+            histogram = self._durations.get(span.name)
+            if histogram is None:
+                histogram = self._durations[span.name] = [0, 0.0] + [0] * len(self.buckets)
+            histogram[0] += 1
+            histogram[1] += span.duration
+            for i, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    histogram[2 + i] += 1
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)):
+                    key = (attribute, span.name)
+                    self._counters[key] = self._counters.get(key, 0) + value
+            if span.error is not None:
+                key = ("span_errors", span.name)
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            if self._durations:
+                lines.append("# TYPE course_planner_span_duration_seconds histogram")
+            for name, histogram in sorted(self._durations.items()):
+                label = f'span="{name}"'
+                for bound, count in zip(self.buckets, histogram[2:]):
+                    lines.append(f'course_planner_span_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'course_planner_span_duration_seconds_bucket{{{label},le="+Inf"}} {histogram[0]}')
+                lines.append(f"course_planner_span_duration_seconds_sum{{{label}}} {histogram[1]:.6f}")
+                lines.append(f"course_planner_span_duration_seconds_count{{{label}}} {histogram[0]}")
+            for metric in sorted({m for m, _ in self._counters}):
+                lines.append(f"# TYPE course_planner_{metric}_total counter")
+                for (m, name), value in sorted(self._counters.items()):
+                    if m == metric:
+                        lines.append(f'course_planner_{metric}_total{{span="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+class Tracer:
+    """
+    Creates spans, feeds them to the metrics and to every sink, and keeps
+    the most recent 'max_spans' finished spans in 'finished'.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 10000):
+        self.enabled = enabled
+        self.metrics = Metrics()
+        self.finished = deque(maxlen=max_spans)
+        self.metrics_path: Optional[str] = None
+        self._sinks: List[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def current(self):
+        """
+        The innermost open span (NOOP_SPAN when disabled or outside any span),
+        for adding attributes from deeper in the call stack.
+        """
+        return (_current_span.get() or NOOP_SPAN) if self.enabled else NOOP_SPAN
+
+    def traced(self, name: Optional[str] = None):
+        """
+        Decorator wrapping every call in a span. A returned object with a
+        'status' attribute (the pipeline responses) sets the span's status.
+        """
+        def decorate(fn):
+            span_name = name or fn.__name__
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with Span(self, span_name, {}) as span:
+                        result = await fn(*args, **kwargs)
+                        _record_status(span, result)
+                        return result
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, span_name, {}) as span:
+                    result = fn(*args, **kwargs)
+                    _record_status(span, result)
+                    return result
+            return wrapper
+        return decorate
+
+    def add_sink(self, sink: Callable[[Span], None]) -> None:
+        self._sinks.append(sink)
+
+    def _finish(self, span: Span) -> None:
+        self.metrics.observe(span)
+        with self._lock:
+            self.finished.append(span)
+            for sink in self._sinks:
+                sink(span)
+
+    def export_jsonl(self, stream) -> int:
+        """
+        Writes every kept span as one JSON line; returns how many.
+        """
+        with self._lock:
+            spans = list(self.finished)
+        for span in spans:
+            stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+        return len(spans)
+
+    def export_prometheus(self) -> str:
+        return self.metrics.to_prometheus()
+
+    def write_metrics(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Writes the Prometheus text to 'path' (or the configured metrics file)
+        and returns the path, or None when there is nowhere to write.
+        """
+        path = path or self.metrics_path
+        if not path:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.export_prometheus())
+        return path
+
+    def reset(self) -> None:
+        with self._lock:
+            self.finished.clear()
+        self.metrics.reset()
+
+
+def _record_status(span: Span, result) -> None:
+    status = getattr(result, "status", None)
+    if isinstance(status, str):
+        span.set(status=status)
+
+
+def usage_attributes(response) -> dict:
+    """
+    prompt/completion token counts from a Groq chat completion's usage field.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+    }
+
+
+def jsonl_sink(path: str) -> Callable[[Span], None]:
+    """
+    Appends each finished span to 'path' as one JSON line.
+    """
+    lock = threading.Lock()
+
+    def write(span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    return write
+
+
+def propagate_context(fn: Callable) -> Callable:
+    """
+    Wraps 'fn' so calls made on other threads (e.g. a ThreadPoolExecutor)
+    see the span that was current when it was wrapped as their parent.
+    """
+    if not TRACER.enabled:
+        return fn
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def configure(enabled: bool = True, jsonl_path: Optional[str] = None, metrics_path: Optional[str] = None) -> "Tracer":
+    TRACER.enabled = enabled
+    if jsonl_path:
+        TRACER.add_sink(jsonl_sink(jsonl_path))
+    TRACER.metrics_path = metrics_path
+    return TRACER
+
+
+def configure_from_env() -> "Tracer":
+    if os.getenv("COURSE_PLANNER_TRACE", "").lower() in ("1", "true", "yes", "on"):
+        configure(
+            jsonl_path=os.getenv("COURSE_PLANNER_TRACE_FILE") or None,
+            metrics_path=os.getenv("COURSE_PLANNER_METRICS_FILE") or None,
+        )
+    return TRACER
+
+
+TRACER = Tracer()
+configure_from_env()
@@ -0,0 +1,192 @@
+"""
+Result cache for transcription and course-code extraction: an in-process
+and an on-disk LRU string store, and ResultCache keying transcripts by the
+audio bytes and extractions by the normalized query and allowed codes.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from planner_models import GetCourseCodesResponse, normalize_query
+
+
+class MemoryLRUStore:
+    """
+    In-process string store evicting least-recently-used entries once the
+    stored values exceed 'max_bytes'.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.encode("utf-8"))
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode("utf-8"))
+
+
+class DiskLRUStore:
+    """
+    One file per entry under 'directory'. Reads refresh the file's mtime and
+    writes evict the oldest files once the directory exceeds 'max_bytes', so
+    the store survives restarts and can be shared between processes.
+
+    Each write goes to its own temporary file (renamed into place), so
+    concurrent writers never share a path. The directory size is scanned once
+    up front and then tracked per write; it is only rescanned (which also
+    picks up other processes' writes) when the tracked total goes over
+    'max_bytes'.
+    """
+
+    _TMP_PREFIX = ".tmp-"
+
+    def __init__(self, directory: str = ".result_cache", max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _entries(self) -> List[tuple]:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self._TMP_PREFIX):
+                continue   # another writer's file, not renamed yet
+            try:
+                st = os.stat(self._path(name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        data = value.encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=self._TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp, path)
+                self._total += len(data) - replaced
+                if self._total > self.max_bytes:
+                    self._evict()
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def codes_fingerprint(allowed_codes: List[str]) -> str:
+    return _digest(*sorted(set(allowed_codes)))
+
+
+class ResultCache:
+    """
+    Two-level cache used by get_course_codes:
+    - transcripts:  sha256(audio bytes) + transcription model + prompt -> text
+    - extractions:  normalized user_query + model + allowed-codes fingerprint
+                    -> GetCourseCodesResponse (successful responses only)
+    Each level takes any store with get(key) / set(key, value), e.g.
+    MemoryLRUStore or DiskLRUStore. 'stats' counts hits and misses per level.
+    """
+
+    def __init__(self, transcripts=None, extractions=None):
+        self.transcripts = transcripts if transcripts is not None else MemoryLRUStore()
+        self.extractions = extractions if extractions is not None else MemoryLRUStore()
+        self.stats = {
+            "transcript_hits": 0, "transcript_misses": 0,
+            "extraction_hits": 0, "extraction_misses": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def transcript_key(audio_bytes: bytes, model: str, prompt: str) -> str:
+        return "t-" + _digest(hashlib.sha256(audio_bytes).hexdigest(), model, prompt)
+
+    def extraction_key(self, user_query: str, model: str, allowed_codes) -> str:
+        # A CourseCodeIndex carries its fingerprint; plain lists are hashed here.
+        fingerprint = getattr(allowed_codes, "fingerprint", None) or codes_fingerprint(allowed_codes)
+        return "e-" + _digest(normalize_query(user_query), model, fingerprint)
+
+    def get_transcript(self, key: str) -> Optional[str]:
+        value = self.transcripts.get(key)
+        self._count("transcript_hits" if value is not None else "transcript_misses")
+        return value
+
+    def set_transcript(self, key: str, text: str) -> None:
+        self.transcripts.set(key, text)
+
+    def get_extraction(self, key: str) -> Optional[GetCourseCodesResponse]:
+        value = self.extractions.get(key)
+        self._count("extraction_hits" if value is not None else "extraction_misses")
+        return GetCourseCodesResponse.model_validate_json(value) if value is not None else None
+
+    def set_extraction(self, key: str, response: GetCourseCodesResponse) -> None:
+        self.extractions.set(key, response.model_dump_json())
@@ -0,0 +1,256 @@
+"""
+Special-request constraints: the free-text request ("no classes on Friday,
+nothing before 10am") is compiled once into ScheduleConstraints, which then
+filter the section list cheaply before the solver or the model see it.
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from planner_models import (
+    DAY_INDEX,
+    SLOTS_PER_DAY,
+    ScheduleCourse,
+    meeting_mask,
+    normalize_course_code,
+    normalize_query,
+    to_minutes,
+)
+from section_links import SectionLinks, is_primary_section, section_key
+
+
+class ScheduleConstraints(BaseModel):
+    """
+    Structured form of a special request such as "no classes on Friday,
+    nothing before 10am, not with professor Smith".
+    """
+    blocked_days: List[str] = []              # e.g. ["Fri"]
+    earliest_start: Optional[str] = None      # "HH:MM"; no section may start earlier
+    latest_end: Optional[str] = None          # "HH:MM"; no section may end later
+    max_campus_days: Optional[int] = None
+    preferred_instructors: List[str] = []     # lower-case names, tried first
+    forbidden_instructors: List[str] = []     # lower-case names, filtered out
+
+    def is_empty(self) -> bool:
+        return self == ScheduleConstraints()
+
+
+_DAY_NAMES = {
+    "monday": "Mon", "mon": "Mon",
+    "tuesday": "Tue", "tues": "Tue", "tue": "Tue",
+    "wednesday": "Wed", "wed": "Wed",
+    "thursday": "Thu", "thurs": "Thu", "thu": "Thu",
+    "friday": "Fri", "fri": "Fri",
+    "saturday": "Sat", "sat": "Sat",
+    "sunday": "Sun", "sun": "Sun",
+}
+_DAY_WORD = r"(?:%s|weekend)s?" % "|".join(sorted(_DAY_NAMES, key=len, reverse=True))
+_DAY_LIST = rf"{_DAY_WORD}(?:\s*(?:,|and|or|&|/)\s*{_DAY_WORD})*"
+_TIME = r"(noon|\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)"
+_NUMBER = r"(\d|one|two|three|four|five|six|seven)"
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7}
+_CLASS_WORD = r"(?:classes|class|courses|course|lectures|lecture|school|anything)"
+_TITLE = r"(?:prof(?:essor)?\.?|dr\.?|instructor|teacher)"
+_NAME = r"([a-z][a-z'\-]+(?:\s+[a-z][a-z'\-]+)?)"
+
+_NEGATION = (
+    r"(?:don['’]?t|do not|doesn['’]?t|does not|can['’]?t|cannot|can not|won['’]?t|will not"
+    r"|rather not|prefer not to|(?:un|not )able to)"
+)
+_FILLER = r"(?:want|like|need|have|take|do|go|come|attend|be|schedule|book|put|to|in|any|me|there)"
+# "free"/"off" only block a day when asked for: "I'm free on Mondays" means the opposite.
+_WANT = r"(?:want|need|like|keep|prefer|leave)\s+(?:(?:to|have|keep|be|stay|my|the)\s+)*"
+
+_BLOCKED_DAY_RES = (
+    re.compile(rf"\b(?:no|not|nothing|avoid|without|except)\s+(?:{_CLASS_WORD}\s+)?(?:on\s+)?({_DAY_LIST})\b"),
+    # "I don't want classes on Tuesday", "can't do Fridays", "rather not come in on Mondays"
+    re.compile(rf"\b{_NEGATION}\s+(?:{_FILLER}\s+)*(?:{_CLASS_WORD}\s+)?(?:on\s+)?({_DAY_LIST})\b"),
+    re.compile(rf"\b(?:i['’]?m|i am)\s+(?:busy|working|unavailable|not available|away|at work)\s+(?:on\s+)?({_DAY_LIST})\b"),
+    re.compile(rf"\bi\s+(?:work|have work|have a job)\s+(?:on\s+)?({_DAY_LIST})\b"),
+    # "want Fridays off", "keep Friday free", "would like to be off on Mondays"
+    re.compile(rf"\b{_WANT}({_DAY_LIST})\s+(?:off|free)\b"),
+    re.compile(rf"\b{_WANT}(?:free|off)\s+(?:on\s+)?({_DAY_LIST})\b"),
+)
+_EARLIEST_RES = (
+    re.compile(rf"\b(?:no\s+{_CLASS_WORD}|nothing|not)\s+(?:before|earlier than)\s+{_TIME}"),
+    re.compile(rf"\b(?:start|starting|begin|beginning)\s+(?:after|at|from|no earlier than)\s+{_TIME}"),
+)
+_LATEST_RES = (
+    re.compile(rf"\b(?:no\s+{_CLASS_WORD}|nothing|not)\s+(?:after|later than|past)\s+{_TIME}"),
+    re.compile(rf"\b(?:finish|finished|end|ending|done|out|over)\s+(?:by|before|at|no later than)\s+{_TIME}"),
+)
+_NO_MORNINGS_RE = re.compile(rf"\bno\s+(?:{_CLASS_WORD}\s+in\s+the\s+)?mornings?\b|\bnot in the morning\b")
+_NO_EARLY_RE = re.compile(r"\bno\s+early\b|\bsleep\s+in\b")
+_NO_EVENINGS_RE = re.compile(r"\bno\s+(?:evening|night|late)s?\b|\bnot in the evening\b")
+_MAX_DAYS_RES = (
+    re.compile(rf"\b(?:at most|max(?:imum)?(?: of)?|only|no more than|up to)\s+{_NUMBER}\s+days?\b"),
+    re.compile(rf"\b{_NUMBER}\s+days?\s+(?:a|per)\s+week\b"),
+    re.compile(rf"\b{_NUMBER}\s+days?\s+on\s+campus\b"),
+)
+_FORBIDDEN_RES = (
+    re.compile(rf"\b(?:avoid|not with|no|without|don't want|do not want|anyone but|not)\s+{_TITLE}\s+{_NAME}"),
+    re.compile(rf"\bnot\s+(?:taught\s+by|with)\s+(?!{_TITLE}\s){_NAME}"),
+)
+_PREFERRED_RES = (
+    re.compile(rf"\b(?:prefer|preferably|with|want|like|taught by)\s+{_TITLE}\s+{_NAME}"),
+    re.compile(rf"\btaught\s+by\s+(?!{_TITLE}\s){_NAME}"),
+)
+_NAME_STOPWORDS = {
+    "and", "or", "on", "for", "please", "if", "but", "in", "the", "classes", "class",
+    "if", "possible", "only", "as", "so", "to", "at", "is", "who", "because",
+}
+
+
+def _request_time(text: str) -> Optional[str]:
+    """
+    "10", "10am", "2:30 pm", "noon" -> "HH:MM". Bare hours 1-7 are read as
+    afternoon, since nobody means 3am in a class schedule.
+    """
+    text = text.replace(".", "").replace(" ", "")
+    if text == "noon":
+        return "12:00"
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?(am|pm)?", text)
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hours < 12:
+        hours += 12
+    elif meridiem == "am" and hours == 12:
+        hours = 0
+    elif meridiem is None and 1 <= hours <= 7:
+        hours += 12
+    if hours > 23 or minutes > 59:
+        return None
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def _request_days(day_list: str) -> List[str]:
+    days = []
+    for word in re.findall(r"[a-z]+", day_list):
+        if word.endswith("s") and (word[:-1] in _DAY_NAMES or word[:-1] == "weekend"):
+            word = word[:-1]
+        if word == "weekend":
+            days += ["Sat", "Sun"]
+        elif word in _DAY_NAMES:
+            days.append(_DAY_NAMES[word])
+    return days
+
+
+def _request_name(name: str) -> Optional[str]:
+    words = name.split()
+    while words and words[-1] in _NAME_STOPWORDS:
+        words.pop()
+    if not words or words[0] in _NAME_STOPWORDS or _request_days(words[0]):
+        return None
+    return " ".join(words)
+
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(text: str) -> ScheduleConstraints:
+    blocked = [d for pattern in _BLOCKED_DAY_RES for m in pattern.finditer(text) for d in _request_days(m.group(1))]
+
+    earliest = [t for pattern in _EARLIEST_RES for m in pattern.finditer(text) if (t := _request_time(m.group(1)))]
+    if _NO_MORNINGS_RE.search(text):
+        earliest.append("12:00")
+    elif _NO_EARLY_RE.search(text):
+        earliest.append("10:00")
+    latest = [t for pattern in _LATEST_RES for m in pattern.finditer(text) if (t := _request_time(m.group(1)))]
+    if _NO_EVENINGS_RE.search(text):
+        latest.append("18:00")
+
+    max_days = [
+        int(_NUMBER_WORDS.get(m.group(1), m.group(1)))
+        for pattern in _MAX_DAYS_RES for m in pattern.finditer(text)
+    ]
+    forbidden = [n for pattern in _FORBIDDEN_RES for m in pattern.finditer(text) if (n := _request_name(m.group(1)))]
+    preferred = [
+        n for pattern in _PREFERRED_RES for m in pattern.finditer(text)
+        if (n := _request_name(m.group(1))) and n not in forbidden
+    ]
+
+    return ScheduleConstraints(
+        blocked_days=sorted(set(blocked), key=lambda d: DAY_INDEX[d.lower()]),
+        earliest_start=max(earliest, key=to_minutes) if earliest else None,
+        latest_end=min(latest, key=to_minutes) if latest else None,
+        max_campus_days=min(max_days) if max_days else None,
+        preferred_instructors=list(dict.fromkeys(preferred)),
+        forbidden_instructors=list(dict.fromkeys(forbidden)),
+    )
+
+
+def compile_special_request(special_requests: Optional[str]) -> ScheduleConstraints:
+    """
+    Turns the free-text special request into ScheduleConstraints with a set of
+    regexes (no model call). Results are cached by normalized text, so
+    repeated requests cost a dict lookup. Phrases that are not understood are
+    simply ignored; the original text still goes to the model.
+    """
+    if not special_requests:
+        return ScheduleConstraints()
+    return _compile_normalized(normalize_query(special_requests)).model_copy(deep=True)
+
+
+def _instructor_matches(instructor: str, names: List[str]) -> bool:
+    words = set(re.findall(r"[a-z'\-]+", instructor.lower()))
+    return any(all(w in words for w in name.split()) for name in names)
+
+
+def _section_allowed(course: ScheduleCourse, constraints: ScheduleConstraints, blocked_mask: int) -> bool:
+    if course.meeting_mask & blocked_mask:
+        return False
+    if course.meeting_mask and (constraints.earliest_start or constraints.latest_end):
+        start, end = to_minutes(course.start_time), to_minutes(course.end_time)
+        if constraints.earliest_start and start is not None and start < to_minutes(constraints.earliest_start):
+            return False
+        if constraints.latest_end and end is not None and end > to_minutes(constraints.latest_end):
+            return False
+    return not (constraints.forbidden_instructors
+                and _instructor_matches(course.instructor, constraints.forbidden_instructors))
+
+
+def filter_sections(
+    courses: List[ScheduleCourse],
+    constraints: ScheduleConstraints,
+    links: Optional[SectionLinks] = None,
+) -> List[ScheduleCourse]:
+    """
+    Drops every section that violates a per-section constraint (blocked day,
+    time window, forbidden instructor), then every lecture whose tutorials
+    were all dropped. Sections taught by a preferred instructor move to the
+    front, so the solver and the model see them first. Sections without a
+    meeting time (online) always pass the day and time checks.
+    max_campus_days depends on the whole schedule and is left to the solver
+    and to ScheduleValidator.
+    """
+    if constraints.is_empty():
+        return list(courses)
+    blocked_mask = meeting_mask(" ".join(constraints.blocked_days), "00:00", "23:59") \
+        if constraints.blocked_days else 0
+    kept = [c for c in courses if _section_allowed(c, constraints, blocked_mask)]
+
+    if len(kept) < len(courses):
+        if links is None:
+            links = SectionLinks.from_courses(courses)
+        listed = {section_key(c) for c in courses if not is_primary_section(c)}
+        kept_keys = {section_key(c) for c in kept if not is_primary_section(c)}
+
+        def orphaned(lecture: ScheduleCourse) -> bool:
+            code = normalize_course_code(lecture.course_code)
+            tutorials = [(code, t) for t in links.tutorials_of(lecture) if (code, t) in listed]
+            return bool(tutorials) and not any(t in kept_keys for t in tutorials)
+
+        kept = [c for c in kept if not (is_primary_section(c) and orphaned(c))]
+
+    if constraints.preferred_instructors:
+        kept.sort(key=lambda c: not _instructor_matches(c.instructor, constraints.preferred_instructors))
+    return kept
+
+
+def mask_days(mask: int) -> int:
+    """
+    Weekly slot mask -> 7-bit mask of the days it touches (bit 0 = Monday).
+    """
+    day_slots = (1 << SLOTS_PER_DAY) - 1
+    return sum(1 << day for day in range(7) if (mask >> (day * SLOTS_PER_DAY)) & day_slots)
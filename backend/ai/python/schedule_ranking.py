@@ -0,0 +1,168 @@
+"""
+Vectorized scoring and top-k ranking of candidate schedules.
+
+A candidate is a list of section indices into one shared section list (as
+enumerated by solve_schedules). Candidates are packed into an (n, L) index
+matrix padded with an empty section, and all features are computed with
+NumPy over (n, L, 7) per-day arrays:
+
+- gap_minutes:     idle time between the first and last class of each day
+- campus_days:     number of days with at least one class
+- early_minutes:   minutes before 'early_cutoff' of each day's first class
+- closed_sections: sections whose status is not open
+- credits:         total credits (a negative weight favours adding electives)
+
+The score is the weighted sum (lower is better); top_k uses argpartition.
+solve_schedules(top_k=..., weights=...) ranks its enumerated schedules
+with ScheduleRanker directly; rank_schedules ranks an existing response.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from planner_models import (
+    DAY_INDEX,
+    GenerateSchedulesResponse,
+    ScheduleCourse,
+    SingleSchedule,
+    to_minutes,
+)
+
+_NO_CLASS = np.float32(np.inf)
+
+
+class RankingWeights(BaseModel):
+    """
+    Per-feature weights; a weight of 60 on campus_days means one extra day on
+    campus costs as much as an hour of gaps.
+    """
+    gap_minutes: float = 1.0
+    campus_days: float = 60.0
+    early_minutes: float = 0.5
+    closed_sections: float = 120.0
+    credits: float = -240.0
+    early_cutoff: str = "10:00"
+
+
+def _is_open(status: str) -> bool:
+    return status.strip().lower() == "open"
+
+
+class ScheduleRanker:
+    """
+    Holds per-section lookup tables (start/end/busy minutes per weekday and a
+    closed flag) for one section list, and scores candidates against them.
+    """
+
+    def __init__(self, sections: Sequence[ScheduleCourse]):
+        self.sections = list(sections)
+        n = len(self.sections) + 1  # last row is the padding "no section"
+        self._start = np.full((n, 7), _NO_CLASS, dtype=np.float32)
+        self._end = np.full((n, 7), -_NO_CLASS, dtype=np.float32)
+        self._busy = np.zeros((n, 7), dtype=np.float32)
+        self._closed = np.zeros(n, dtype=np.float32)
+        self._credits = np.zeros(n, dtype=np.float32)
+        for i, s in enumerate(self.sections):
+            self._closed[i] = 0.0 if _is_open(s.status) else 1.0
+            self._credits[i] = s.credits
+            start = to_minutes(s.start_time) if s.start_time else None
+            end = to_minutes(s.end_time) if s.end_time else None
+            if start is None or end is None:
+                continue
+            for token in s.day.split():
+                day = DAY_INDEX.get(token[:3].lower())
+                if day is not None:
+                    self._start[i, day] = start
+                    self._end[i, day] = end
+                    self._busy[i, day] = end - start
+        self._padding = n - 1
+
+    def pack(self, candidates: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        List of section-index lists -> (n, L) int32 matrix padded with the
+        empty section.
+        """
+        width = max((len(c) for c in candidates), default=0)
+        matrix = np.full((len(candidates), max(width, 1)), self._padding, dtype=np.int32)
+        for row, candidate in enumerate(candidates):
+            matrix[row, :len(candidate)] = candidate
+        return matrix
+
+    def features(self, matrix: np.ndarray, early_cutoff: str = "10:00") -> Dict[str, np.ndarray]:
+        starts = self._start[matrix].min(axis=1)          # (n, 7)
+        ends = self._end[matrix].max(axis=1)
+        busy = self._busy[matrix].sum(axis=1)
+        has_class = np.isfinite(starts)
+        span = np.where(has_class, ends - starts, 0.0)
+        cutoff = to_minutes(early_cutoff) or 0
+        early = np.where(has_class, np.clip(cutoff - starts, 0.0, None), 0.0)
+        return {
+            "gap_minutes": np.clip(span - busy, 0.0, None).sum(axis=1),
+            "campus_days": has_class.sum(axis=1).astype(np.float32),
+            "early_minutes": early.sum(axis=1),
+            "closed_sections": self._closed[matrix].sum(axis=1),
+            "credits": self._credits[matrix].sum(axis=1),
+        }
+
+    def score(self, matrix: np.ndarray, weights: Optional[RankingWeights] = None) -> np.ndarray:
+        weights = weights or RankingWeights()
+        f = self.features(matrix, weights.early_cutoff)
+        return (
+            weights.gap_minutes * f["gap_minutes"]
+            + weights.campus_days * f["campus_days"]
+            + weights.early_minutes * f["early_minutes"]
+            + weights.closed_sections * f["closed_sections"]
+            + weights.credits * f["credits"]
+        )
+
+    def top_k(self, matrix: np.ndarray, k: int, weights: Optional[RankingWeights] = None) -> tuple:
+        """
+        (indices, scores) of the k best candidates, best first. Ties keep the
+        original candidate order, also at the k-th place: argpartition only
+        finds the k-th score, and the earliest candidates with it are kept.
+        """
+        scores = self.score(matrix, weights)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), scores[:0]
+        if k < len(scores):
+            kth = scores[np.argpartition(scores, k - 1)[k - 1]]
+            better = np.flatnonzero(scores < kth)
+            best = np.concatenate((better, np.flatnonzero(scores == kth)[:k - len(better)]))
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((best, scores[best]))]
+        return best, scores[best]
+
+
+def rank_schedules(
+    response: GenerateSchedulesResponse,
+    k: int = 10,
+    weights: Optional[RankingWeights] = None,
+) -> GenerateSchedulesResponse:
+    """
+    Returns a copy of 'response' keeping only its k best schedules, best
+    first, renumbered from 1.
+    """
+    sections: List[ScheduleCourse] = []
+    ids: Dict[tuple, int] = {}
+    candidates = []
+    for schedule in response.schedules:
+        row = []
+        for course in schedule.courses:
+            key = (course.crn, course.course_code, course.section)
+            if key not in ids:
+                ids[key] = len(sections)
+                sections.append(course)
+            row.append(ids[key])
+        candidates.append(row)
+
+    ranker = ScheduleRanker(sections)
+    best, _ = ranker.top_k(ranker.pack(candidates), k, weights)
+    return response.model_copy(update={
+        "schedules": [
+            SingleSchedule(schedule_id=n, courses=response.schedules[i].courses)
+            for n, i in enumerate(best.tolist(), start=1)
+        ]
+    })
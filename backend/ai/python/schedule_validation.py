@@ -0,0 +1,188 @@
+"""
+Validation of model-generated schedules against the section list the
+prompt was built from. ScheduleValidator corrects what can be corrected
+locally and drops the rest, counting each reason in a ScheduleRepairReport.
+"""
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from planner_models import (
+    MAX_SCHEDULE_CREDITS,
+    ScheduleCourse,
+    SingleSchedule,
+    as_schedule_course,
+    normalize_course_code,
+)
+from schedule_constraints import mask_days
+from section_links import SectionLinks, is_primary_section, section_key
+
+
+class ScheduleRepairReport(BaseModel):
+    """
+    What the validator did with the model's schedules. 'dropped' counts
+    rejected schedules per reason; 'errors' lists failed repair calls (and a
+    stream that broke off), after which the accepted schedules are kept.
+    """
+    received: int = 0
+    accepted: int = 0
+    corrected: int = 0
+    dropped: Dict[str, int] = {}
+    repair_rounds: int = 0
+    errors: List[str] = []
+
+    def add_error(self, error: Exception) -> None:
+        self.errors.append(f"{type(error).__name__}: {error}")
+
+
+class SectionIndex:
+    """
+    Hash indexes over the section list a prompt was built from: CRN ->
+    sections, (course code, section) -> section, plus the SectionLinks graph,
+    so each schedule is checked in O(sections). A CRN may map to more than
+    one section, so sections are identified by section_key everywhere else.
+    """
+
+    def __init__(self, courses: List[ScheduleCourse], links: Optional[SectionLinks] = None):
+        self.links = links if links is not None else SectionLinks.from_courses(courses)
+        self.by_crn: Dict[str, List[ScheduleCourse]] = {}
+        self.by_code_section: Dict[tuple, ScheduleCourse] = {}
+        for course in courses:
+            self.by_crn.setdefault(course.crn.strip(), []).append(course)
+            self.by_code_section.setdefault(section_key(course), course)
+
+    def tutorials(self, lecture: ScheduleCourse) -> List[ScheduleCourse]:
+        """
+        The listed tutorials linked to 'lecture', in catalog order.
+        """
+        code = normalize_course_code(lecture.course_code)
+        found = (self.by_code_section.get((code, t)) for t in self.links.tutorials_of(lecture))
+        return [t for t in found if t is not None]
+
+    def resolve(self, entry: ScheduleCourse) -> Optional[ScheduleCourse]:
+        """
+        The real section a model entry refers to: by CRN when the CRN exists
+        for that course code, else by (course code, section). None if invented.
+        """
+        code = normalize_course_code(entry.course_code)
+        for course in self.by_crn.get(entry.crn.strip(), ()):
+            if normalize_course_code(course.course_code) == code:
+                return course
+        return self.by_code_section.get((code, entry.section.strip().upper()))
+
+
+class ScheduleValidator:
+    """
+    Checks model schedules against a SectionIndex and repairs what can be
+    repaired locally:
+    - entries are replaced by the indexed section (fixing invented fields);
+      entries whose CRN and section both do not exist are removed,
+    - tutorials without their lecture are removed, as are extra tutorials
+      for the same lecture,
+    - a lecture missing its required tutorial gets the first linked tutorial
+      that fits.
+    Schedules that still have a time conflict, a missing mandatory course,
+    a course taken twice, too many credits or more campus days than
+    'max_campus_days' are dropped, as are duplicates of an already accepted
+    schedule.
+    """
+
+    def __init__(self, index: SectionIndex, mandatory_courses: List[str], max_credits: float = MAX_SCHEDULE_CREDITS,
+                 max_campus_days: Optional[int] = None):
+        self.index = index
+        self.mandatory = {normalize_course_code(c) for c in mandatory_courses}
+        self.max_credits = max_credits
+        self.max_campus_days = max_campus_days
+        self.report = ScheduleRepairReport()
+        self.accepted: List[List[ScheduleCourse]] = []
+        self._seen: set = set()
+
+    def _drop(self, reason: str) -> None:
+        self.report.dropped[reason] = self.report.dropped.get(reason, 0) + 1
+
+    def _check(self, schedule: SingleSchedule) -> tuple:
+        """
+        Returns (sections or None, corrected, reason).
+        """
+        corrected = False
+        chosen: Dict[tuple, ScheduleCourse] = {}
+        for entry in schedule.courses:
+            course = self.index.resolve(entry)
+            if course is None or course != entry:
+                corrected = True
+            if course is not None:
+                chosen.setdefault(section_key(course), course)
+
+        lectures: Dict[str, ScheduleCourse] = {}
+        for course in chosen.values():
+            if is_primary_section(course):
+                code = normalize_course_code(course.course_code)
+                if code in lectures:
+                    return None, corrected, "duplicate_course"
+                lectures[code] = course
+
+        taken_tutorials: Dict[str, ScheduleCourse] = {}   # course code -> its tutorial
+        for course in chosen.values():
+            if is_primary_section(course):
+                continue
+            code = normalize_course_code(course.course_code)
+            lecture = lectures.get(code)
+            if lecture is None or not self.index.links.linked(lecture, course) or code in taken_tutorials:
+                corrected = True          # orphan or second tutorial: remove it
+                continue
+            taken_tutorials[code] = course
+
+        sections = list(lectures.values())
+        mask = 0
+        for section in sections + list(taken_tutorials.values()):
+            if mask & section.meeting_mask:
+                return None, corrected, "time_conflict"
+            mask |= section.meeting_mask
+        for code, lecture in lectures.items():
+            tutorials = self.index.tutorials(lecture)
+            if tutorials and code not in taken_tutorials:
+                fit = next((t for t in tutorials if not mask & t.meeting_mask), None)
+                if fit is None:
+                    return None, corrected, "missing_tutorial"
+                taken_tutorials[code] = fit
+                mask |= fit.meeting_mask
+                corrected = True
+
+        if self.max_campus_days is not None and bin(mask_days(mask)).count("1") > self.max_campus_days:
+            return None, corrected, "too_many_days"
+        if not self.mandatory <= set(lectures):
+            return None, corrected, "missing_mandatory"
+        if sum(c.credits for c in lectures.values()) > self.max_credits + 1e-9:
+            return None, corrected, "too_many_credits"
+        ordered = []
+        for code, lecture in lectures.items():
+            ordered.append(lecture)
+            if code in taken_tutorials:
+                ordered.append(taken_tutorials[code])
+        return ordered, corrected, None
+
+    def accept(self, schedule: SingleSchedule) -> Optional[SingleSchedule]:
+        """
+        Validates one schedule; returns the (possibly corrected) schedule,
+        renumbered, or None when it was dropped.
+        """
+        self.report.received += 1
+        sections, corrected, reason = self._check(schedule)
+        if sections is None:
+            self._drop(reason)
+            return None
+        key = frozenset(map(section_key, sections))
+        if key in self._seen:
+            self._drop("duplicate_schedule")
+            return None
+        self._seen.add(key)
+        self.accepted.append(sections)
+        self.report.accepted += 1
+        self.report.corrected += corrected
+        return SingleSchedule(schedule_id=len(self.accepted), courses=[as_schedule_course(c) for c in sections])
+
+    def accepted_crns(self) -> str:
+        """
+        Compact list of accepted schedules for the repair prompt: "1:123,456; 2:...".
+        """
+        return "; ".join(f"{n}:{','.join(c.crn for c in sections)}" for n, sections in enumerate(self.accepted, 1))
@@ -0,0 +1,130 @@
+"""
+Lecture <-> tutorial/lab links between sections, parsed from the
+also_register_in text ("COMP 1405 A1 or A2"). Sections are identified by
+section_key() everywhere: a CRN can be listed more than once.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from planner_models import ScheduleCourse, normalize_course_code
+
+
+_SECTION_TOKEN_RE = re.compile(r"\b([A-Z]{1,2}\d{0,2}|[A-Z]?\d{1,2})\b")
+_COURSE_PREFIX_RE = re.compile(r"^\s*[A-Z]{3,4}\s?\d{4}\s*")
+
+
+@lru_cache(maxsize=4096)
+def _linked_sections(also_register_in: Optional[str]) -> frozenset:
+    """
+    "COMP 1405 A1 or A2 or A3 or A4" -> {"A1", "A2", "A3", "A4"}
+    """
+    if not also_register_in:
+        return frozenset()
+    text = _COURSE_PREFIX_RE.sub("", also_register_in.upper())
+    return frozenset(t for t in _SECTION_TOKEN_RE.findall(text) if t != "OR")
+
+
+def is_primary_section(course: ScheduleCourse) -> bool:
+    """
+    Lectures (and any other credit-bearing section) are primary; zero-credit
+    tutorials/labs are only taken together with their parent lecture.
+    """
+    return course.schedule_type.strip().lower() == "lecture" or course.credits > 0
+
+
+def section_key(course) -> tuple:
+    return normalize_course_code(course.course_code), course.section.strip().upper()
+
+
+_NO_LINKS: dict = {}
+
+
+class SectionLinks:
+    """
+    Lecture <-> tutorial/lab graph parsed once from the also_register_in text.
+    Nodes are (normalized course code, section) keys; a link exists when
+    either side names the other ("A" lists "A1 or A2", or "A1" lists "A"),
+    so pairing checks are dict lookups instead of re-parsing text pairwise.
+    Linked sections are kept in catalog order (dicts used as ordered sets).
+    """
+    __slots__ = ("tutorials", "lectures")
+
+    def __init__(self):
+        self.tutorials: Dict[tuple, Dict[str, None]] = {}   # lecture key -> tutorial sections
+        self.lectures: Dict[tuple, Dict[str, None]] = {}    # tutorial key -> lecture sections
+
+    def add(self, course_code: str, lecture: str, tutorial: str) -> None:
+        self.tutorials.setdefault((course_code, lecture), {})[tutorial] = None
+        self.lectures.setdefault((course_code, tutorial), {})[lecture] = None
+
+    @classmethod
+    def from_courses(cls, courses: Iterable) -> "SectionLinks":
+        """
+        Builds the graph in O(sections): each also_register_in string is parsed
+        once (and cached), then matched against the section ids of its course.
+        Works on ScheduleCourse and CompactSection records alike.
+        """
+        by_code: Dict[str, tuple] = {}
+        for course in courses:
+            code, section = section_key(course)
+            primaries, secondaries = by_code.setdefault(code, ({}, []))
+            if is_primary_section(course):
+                primaries.setdefault(section, set()).update(_linked_sections(course.also_register_in))
+            else:
+                secondaries.append((section, _linked_sections(course.also_register_in)))
+
+        links = cls()
+        for code, (primaries, secondaries) in by_code.items():
+            named_by: Dict[str, list] = {}
+            for lecture, named in primaries.items():
+                for section in named:
+                    named_by.setdefault(section, []).append(lecture)
+            for tutorial, named in secondaries:
+                for lecture in named_by.get(tutorial, ()):
+                    links.add(code, lecture, tutorial)
+                for lecture in named:
+                    if lecture in primaries:
+                        links.add(code, lecture, tutorial)
+        return links
+
+    def tutorials_of(self, lecture) -> Dict[str, None]:
+        """
+        Section ids of the tutorials/labs linked to 'lecture' (read-only).
+        """
+        return self.tutorials.get(section_key(lecture), _NO_LINKS)
+
+    def lectures_of(self, tutorial) -> Dict[str, None]:
+        return self.lectures.get(section_key(tutorial), _NO_LINKS)
+
+    def linked(self, lecture, tutorial) -> bool:
+        code, section = section_key(tutorial)
+        return normalize_course_code(lecture.course_code) == code and section in self.tutorials_of(lecture)
+
+    def update(self, other: "SectionLinks") -> "SectionLinks":
+        for (code, lecture), tutorials in other.tutorials.items():
+            for tutorial in tutorials:
+                self.add(code, lecture, tutorial)
+        return self
+
+    def __len__(self) -> int:
+        return sum(map(len, self.tutorials.values()))
+
+    def to_dict(self) -> Dict[str, Dict[str, List[str]]]:
+        """
+        {"COMP1405": {"A": ["A1", "A2"]}} - the form stored by CatalogCache
+        and catalog snapshots.
+        """
+        out: Dict[str, Dict[str, List[str]]] = {}
+        for (code, lecture), tutorials in self.tutorials.items():
+            out.setdefault(code, {})[lecture] = list(tutorials)
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[str]]]) -> "SectionLinks":
+        links = cls()
+        for code, lectures in data.items():
+            for lecture, tutorials in lectures.items():
+                for tutorial in tutorials:
+                    links.add(code, lecture, tutorial)
+        return links
@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qsl
+
+import pytest
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.dirname(HERE)
+sys.path.insert(0, PYTHON_DIR)
+sys.path.insert(0, os.path.join(PYTHON_DIR, "benchmarks"))
+
+from banner_fixtures import load_fixtures  # noqa: E402
+from course_planner import CompactSection, ScheduleCourse, read_courses_markdown  # noqa: E402
+from planner_tracing import TRACER  # noqa: E402
+
+SAMPLE_MARKDOWN = os.path.join(PYTHON_DIR, "scraped_courses.md")
+_CRNS = itertools.count(50000)
+SAMPLE_MANDATORY = ["COMP 1405", "COMP 1805", "MATH 1007", "BIOL 1902", "PSYC 1001"]
+FIXTURES = load_fixtures()
+
+
+def section(course_code, section, day="", start="", end="", schedule_type=None, credits=None,
+            links=None, crn=None, instructor="Jane Doe", status="open"):
+    """
+    Small ScheduleCourse factory: sections with a digit are zero-credit
+    tutorials unless told otherwise.
+    """
+    tutorial = any(ch.isdigit() for ch in section)
+    return ScheduleCourse(
+        status=status,
+        crn=crn or str(next(_CRNS)),
+        course_code=course_code,
+        section=section,
+        course_title=f"{course_code} title",
+        credits=credits if credits is not None else (0.0 if tutorial else 0.5),
+        schedule_type=schedule_type or ("Tutorial" if tutorial else "Lecture"),
+        instructor=instructor,
+        day=day,
+        start_time=start,
+        end_time=end,
+        also_register_in=links,
+    )
+
+
+@pytest.fixture
+def sample_courses():
+    return read_courses_markdown(SAMPLE_MARKDOWN)
+
+
+def section_rows(courses):
+    """
+    Every field plus the meeting mask, for comparing parser outputs.
+    """
+    fields = CompactSection.__slots__[:-1]
+    return [tuple(getattr(c, f) for f in fields) + (c.meeting_mask,) for c in courses]
+
+
+@pytest.fixture(params=sorted(FIXTURES))
+def page(request):
+    """
+    Each recorded Banner fixture page.
+    """
+    return FIXTURES[request.param]
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """
+    The global TRACER, enabled and emptied for one test.
+    """
+    monkeypatch.setattr(TRACER, "enabled", True)
+    TRACER.reset()
+    yield TRACER
+    TRACER.reset()
+
+
+def completion(content):
+    """
+    A non-streaming chat completion carrying 'content'.
+    """
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class FakeGroq:
+    """
+    Stand-in for Groq (or AsyncGroq with asynchronous=True). Every request is
+    recorded in 'requests' as (kind, request), kind being "transcription" or
+    "completion". Transcriptions return 'transcript'; chat completions return
+    the queued answers in order: a string is wrapped with completion(), an
+    Exception is raised, anything else (e.g. a fake stream) is returned as is.
+    Async calls first sleep 'delay' seconds.
+    """
+
+    def __init__(self, *answers, transcript="I need comp 1405 and maybe math 1007",
+                 asynchronous=False, delay=0.0):
+        self.answers = list(answers)
+        self.transcript = transcript
+        self.delay = delay
+        self.requests = []
+        transcribe, complete = self._transcribe, self._complete
+        if asynchronous:
+            transcribe, complete = self._awaitable(transcribe), self._awaitable(complete)
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=transcribe))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=complete))
+
+    def calls(self, kind):
+        return [request for k, request in self.requests if k == kind]
+
+    def _transcribe(self, **request):
+        self.requests.append(("transcription", request))
+        return SimpleNamespace(text=self.transcript)
+
+    def _complete(self, **request):
+        self.requests.append(("completion", request))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return completion(answer) if isinstance(answer, str) else answer
+
+    def _awaitable(self, function):
+        async def call(**request):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return function(**request)
+        return call
+
+
+class FakeSession:
+    """
+    Stand-in for requests.Session answering Banner course-search POSTs with
+    the recorded fixture page of the requested department; departments
+    without a page get a 503. 'posts' lists the department of every POST.
+    """
+
+    def __init__(self, pages=None):
+        self.pages = FIXTURES if pages is None else pages
+        self.posts = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def post(self, url, headers=None, data=""):
+        department = [v for k, v in parse_qsl(data) if k == "sel_subj"][-1]
+        with self._lock:
+            self.posts.append(department)
+        page = self.pages.get(department)
+        status = 200 if page is not None else 503
+        response = SimpleNamespace(status_code=status, text=page or "", content=(page or "").encode("utf-8"))
+
+        def raise_for_status():
+            if status != 200:
+                raise requests.HTTPError(f"{status} Service Unavailable for {department}")
+
+        response.raise_for_status = raise_for_status
+        return response
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,26 @@
+from audio_preprocessing import AUDIO_FRAME_SECONDS, AudioPreprocessing, plan_audio_chunks
+
+
+def _frames(seconds):
+    return round(seconds / AUDIO_FRAME_SECONDS)
+
+
+def test_silence_is_trimmed_to_keep_silence_seconds():
+    levels = [0.0] * 100 + [1000.0] * 50 + [0.0] * 100
+    config = AudioPreprocessing(keep_silence_seconds=0.3)
+    assert plan_audio_chunks(levels, config) == [(100 - _frames(0.3), 150 + _frames(0.3))]
+
+
+def test_all_silence_has_no_chunks():
+    assert plan_audio_chunks([0.0] * 50, AudioPreprocessing()) == []
+
+
+def test_long_recording_is_cut_in_its_pause():
+    speech, pause = [1000.0] * _frames(4), [0.0] * _frames(0.6)
+    levels = speech + pause + speech
+    config = AudioPreprocessing(keep_silence_seconds=0, max_chunk_seconds=6, min_pause_seconds=0.4)
+    chunks = plan_audio_chunks(levels, config)
+    assert len(chunks) == 2
+    (first_start, cut), (second_start, end) = chunks
+    assert first_start == 0 and second_start == cut and end == len(levels)
+    assert len(speech) <= cut <= len(speech) + len(pause)
@@ -0,0 +1,105 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+import batch_planner
+from batch_planner import DepartmentScrapes, TokenBucket, plan_item, run_batch
+from conftest import FIXTURES, FakeGroq, FakeSession
+from course_planner import CourseCodeIndex
+
+
+class FakeClock:
+    """
+    Clock and sleep in one: sleeping advances the clock.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_token_bucket_waits_for_the_refill(clock):
+    bucket = TokenBucket(per_minute=60, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.take()
+    bucket.take()
+    assert clock.slept == []
+    bucket.take()
+    assert clock.slept == [pytest.approx(1.0)]
+    clock.now += 10
+    bucket.take(5)   # more than the capacity: waits for a full bucket at most
+    assert len(clock.slept) == 1
+
+
+def test_token_bucket_adjust_charges_and_refunds(clock):
+    bucket = TokenBucket(per_minute=60, capacity=10, clock=clock, sleep=clock.sleep)
+    bucket.take(10)
+    bucket.adjust(-5)   # the call used 5 more units than estimated
+    bucket.take(1)
+    assert clock.slept == [pytest.approx(6.0)]
+    bucket.adjust(100)
+    bucket.take(10)   # refunds are capped at the capacity
+    assert clock.slept == [pytest.approx(6.0)]
+
+
+def _scrapes(pages=None):
+    session = FakeSession(pages)
+    return DepartmentScrapes(min_request_interval=0, session=session), session
+
+
+def test_concurrent_requests_for_a_department_share_one_scrape():
+    scrapes, session = _scrapes()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scrapes.get("comp"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert session.posts == ["COMP"] and scrapes.scrapes == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+
+def test_a_failed_scrape_is_retried_by_the_next_caller():
+    scrapes, session = _scrapes(pages={})
+    with pytest.raises(Exception):
+        scrapes.get("COMP")
+    session.pages = FIXTURES
+    assert scrapes.get("COMP")
+    assert session.posts == ["COMP", "COMP"]
+
+
+def test_an_unreachable_department_does_not_fail_the_item():
+    scrapes, _ = _scrapes(pages={"COMP": FIXTURES["COMP"]})
+    index = CourseCodeIndex(["COMP 1405", "MATH 1007"])
+    record = plan_item({"id": 7, "raw_text": "COMP 1405, optionally MATH 1007"}, FakeGroq(), index, scrapes,
+                       engine="solver")
+    assert record["status"] == "success"
+    assert record["scrape_errors"] == {"MATH": "HTTPError: 503 Service Unavailable for MATH"}
+    assert record["schedules"]["schedules"]
+
+
+def test_run_batch_writes_records_in_completion_order(monkeypatch):
+    def fake_plan_item(item, *args):
+        time.sleep(item["delay"])
+        return {"id": item["id"], "status": "success"}
+
+    monkeypatch.setattr(batch_planner, "plan_item", fake_plan_item)
+    out = io.StringIO()
+    items = [{"id": 1, "delay": 0.3}, {"id": 2, "delay": 0.0}, {"id": 3, "delay": 0.1}]
+    summary = run_batch(items, out, FakeGroq(), CourseCodeIndex([]), workers=3)
+    assert [json.loads(line)["id"] for line in out.getvalue().splitlines()] == [2, 3, 1]
+    assert summary["items"] == summary["succeeded"] == 3
@@ -0,0 +1,97 @@
+import pytest
+
+from conftest import FakeSession, section
+from course_planner import CatalogCache, CompactSection, SectionLinks, fetch_courses_for_department
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = CatalogCache(str(tmp_path / "catalog.sqlite3"), ttl_seconds=60, clock=clock)
+    yield cache
+    cache.close()
+
+
+COURSES = [
+    section("COMP 1405", "A", "Mon Wed", "10:05", "11:25", links="COMP 1405 A1", crn="11142"),
+    section("COMP 1405", "A1", "Thu", "11:35", "12:55", links="COMP 1405 A", crn="11143"),
+]
+
+
+def test_round_trip(cache):
+    assert cache.get("COMP", "202510") is None
+    cache.put("comp", "202510", COURSES)
+    assert cache.get("COMP", "202510") == COURSES
+    compact = cache.get("COMP", "202510", compact=True)
+    assert all(isinstance(c, CompactSection) for c in compact)
+    assert [c.crn for c in compact] == ["11142", "11143"]
+    assert cache.get("COMP", "202520") is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("COMP", "202510", COURSES)
+    clock.now += 60
+    assert cache.get("COMP", "202510") == COURSES
+    clock.now += 1
+    assert cache.get("COMP", "202510") is None
+    assert cache.links("COMP", "202510") is None
+    fetched_at, courses = cache.snapshot("COMP", "202510")
+    assert fetched_at == 1000.0 and courses == COURSES
+
+
+def test_put_refreshes_the_timestamp(cache, clock):
+    cache.put("COMP", "202510", COURSES)
+    clock.now += 61
+    cache.put("COMP", "202510", COURSES[:1])
+    assert cache.get("COMP", "202510") == COURSES[:1]
+
+
+def test_invalidate(cache):
+    for department in ("COMP", "MATH"):
+        for term in ("202510", "202520"):
+            cache.put(department, term, COURSES)
+    assert cache.invalidate("comp", "202510") == 1
+    assert cache.get("COMP", "202510") is None
+    assert cache.invalidate(term_code="202520") == 2
+    assert cache.departments("202510") == ["MATH"]
+    assert cache.invalidate() == 1
+    assert cache.departments("202510") == []
+
+
+def test_links_are_stored_with_the_entry(cache):
+    cache.put("COMP", "202510", COURSES)
+    links = cache.links("COMP", "202510")
+    assert links.to_dict() == SectionLinks.from_courses(COURSES).to_dict() == {"COMP1405": {"A": ["A1"]}}
+
+
+def test_cache_persists_across_instances(tmp_path, clock):
+    path = str(tmp_path / "catalog.sqlite3")
+    first = CatalogCache(path, ttl_seconds=60, clock=clock)
+    first.put("COMP", "202510", COURSES)
+    first.close()
+    second = CatalogCache(path, ttl_seconds=60, clock=clock)
+    assert second.get("COMP", "202510") == COURSES
+    second.close()
+
+
+def test_warm_fetch_makes_no_request_until_the_ttl_expires(cache, clock):
+    session = FakeSession()
+    first = fetch_courses_for_department("COMP", cache=cache, session=session)
+    assert session.posts == ["COMP"] and first
+    assert fetch_courses_for_department("COMP", cache=cache, session=session) == first
+    assert session.posts == ["COMP"]
+    clock.now += 61
+    assert fetch_courses_for_department("COMP", cache=cache, session=session) == first
+    assert session.posts == ["COMP", "COMP"]
@@ -0,0 +1,112 @@
+import io
+import json
+import threading
+
+import pytest
+
+from catalog_refresh import WATCHED_FIELDS, CatalogRefresher, diff_sections, jsonl_sink
+from conftest import section
+from course_planner import CatalogCache, DepartmentFetchResult
+
+LECTURE = section("COMP 1405", "A", "Mon Wed", "10:05", "11:25", crn="100")
+TUTORIAL = section("COMP 1405", "A1", "Fri", "09:05", "10:25", crn="101", links="COMP 1405 A")
+LAB = section("COMP 1405", "A2", "Fri", "11:05", "12:25", crn="102", links="COMP 1405 A")
+
+
+def _by_kind(changes):
+    return {(c.kind, c.crn): c.changes for c in changes}
+
+
+def test_diff_reports_added_removed_and_changed_sections():
+    full = LECTURE.model_copy(update={"status": "full", "start_time": "10:35"})
+    changes = diff_sections("COMP", "202510", [LECTURE, TUTORIAL], [full, LAB], detected_at=5.0)
+    assert _by_kind(changes) == {
+        ("changed", "100"): {"status": ["open", "full"], "start_time": ["10:05", "10:35"]},
+        ("added", "102"): {f: [None, getattr(LAB, f)] for f in WATCHED_FIELDS},
+        ("removed", "101"): {f: [getattr(TUTORIAL, f), None] for f in WATCHED_FIELDS},
+    }
+    assert all(c.department == "COMP" and c.term_code == "202510" and c.detected_at == 5.0 for c in changes)
+    assert next(c for c in changes if c.crn == "101").section == "A1"
+
+
+def test_unwatched_fields_and_reordering_are_not_changes():
+    renamed = LECTURE.model_copy(update={"course_title": "Renamed", "credits": 1.0})
+    assert diff_sections("COMP", "202510", [LECTURE, TUTORIAL], [TUTORIAL, renamed]) == []
+
+
+class FakeFetch:
+    """
+    Stand-in for fetch_courses_for_departments returning the queued
+    {department: courses or error message} scrapes in order.
+    """
+
+    def __init__(self, *scrapes):
+        self.scrapes = list(scrapes)
+        self.calls = []
+
+    def __call__(self, departments, term_code, max_concurrency):
+        self.calls.append(departments)
+        scrape = self.scrapes.pop(0)
+        return [
+            DepartmentFetchResult(department=d, error=scrape[d]) if isinstance(scrape[d], str)
+            else DepartmentFetchResult(department=d, courses=scrape[d])
+            for d in departments
+        ]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CatalogCache(str(tmp_path / "catalog.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_first_pass_records_the_baseline_then_changes_are_published(cache):
+    full = TUTORIAL.model_copy(update={"status": "full"})
+    fetch = FakeFetch({"COMP": [LECTURE, TUTORIAL]}, {"COMP": [LECTURE, full]})
+    refresher = CatalogRefresher(["comp", "COMP"], cache, fetch=fetch)
+    published = []
+    refresher.subscribe(published.append)
+
+    assert refresher.refresh_once() == []
+    assert cache.get("COMP", "202510") == [LECTURE, TUTORIAL]
+    changes = refresher.refresh_once()
+    assert _by_kind(changes) == {("changed", "101"): {"status": ["open", "full"]}}
+    assert published == changes
+    assert cache.get("COMP", "202510") == [LECTURE, full]
+    assert fetch.calls == [["COMP"], ["COMP"]]
+
+
+def test_emit_initial_reports_every_section_as_added(cache):
+    refresher = CatalogRefresher(["COMP"], cache, emit_initial=True, fetch=FakeFetch({"COMP": [LECTURE]}))
+    assert _by_kind(refresher.refresh_once()).keys() == {("added", "100")}
+
+
+def test_a_failed_department_keeps_its_snapshot(cache):
+    fetch = FakeFetch(
+        {"COMP": [LECTURE], "MATH": []},
+        {"COMP": "503 Service Unavailable", "MATH": []},
+        {"COMP": [LECTURE, TUTORIAL], "MATH": []},
+    )
+    refresher = CatalogRefresher(["COMP", "MATH"], cache, fetch=fetch)
+    refresher.refresh_once()
+    assert refresher.refresh_once() == []
+    assert refresher.errors == {"COMP": "503 Service Unavailable"}
+    assert cache.snapshot("COMP", "202510")[1] == [LECTURE]
+
+    assert _by_kind(refresher.refresh_once()).keys() == {("added", "101")}
+    assert refresher.errors == {}
+
+
+def test_run_refreshes_until_stopped_and_feeds_jsonl(cache):
+    stop = threading.Event()
+    fetch = FakeFetch({"COMP": [LECTURE]}, {"COMP": []})
+    refresher = CatalogRefresher(["COMP"], cache, interval=0, fetch=fetch)
+    feed = io.StringIO()
+    refresher.subscribe(jsonl_sink(feed))
+    refresher.subscribe(lambda change: stop.set())
+    refresher.run(stop)
+
+    assert len(fetch.calls) == 2
+    [line] = feed.getvalue().splitlines()
+    assert json.loads(line)["kind"] == "removed" and json.loads(line)["crn"] == "100"
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from catalog_snapshot import CatalogSnapshot, write_snapshot
+from conftest import section
+from course_planner import SectionLinks
+
+
+def _key(course):
+    return (course.course_code, course.section, course.crn)
+
+
+@pytest.fixture
+def snapshot(tmp_path, sample_courses):
+    path = str(tmp_path / "snapshot")
+    assert write_snapshot(path, sample_courses, term_code="202510") == len(sample_courses)
+    return CatalogSnapshot(path)
+
+
+def test_round_trip(snapshot, sample_courses):
+    assert snapshot.term_code == "202510"
+    assert len(snapshot) == len(sample_courses)
+    assert sorted(snapshot.courses(), key=_key) == sorted(sample_courses, key=_key)
+    assert [snapshot.meeting_mask(i) for i in range(len(snapshot))] == \
+        [c.meeting_mask for c in snapshot.courses()]
+
+
+def test_optional_and_unicode_strings_survive(tmp_path):
+    courses = [
+        section("FREN 1100", "A", "Tue Thu", "08:35", "09:55", crn="1", instructor="Léa Côté"),
+        section("FREN 1100", "B", crn="2", instructor=""),
+    ]
+    write_snapshot(str(tmp_path), courses)
+    assert CatalogSnapshot(str(tmp_path)).courses() == courses
+
+
+def test_code_range_and_filters(snapshot, sample_courses):
+    for code in {c.course_code for c in sample_courses}:
+        rows = snapshot.code_range(code)
+        assert len(rows) == sum(c.course_code == code for c in sample_courses)
+        assert {c.course_code for c in snapshot.courses(rows)} == {code}
+    assert snapshot.code_range("comp1405") == snapshot.code_range("COMP 1405")
+    assert len(snapshot.code_range("COMP 9999")) == 0
+    assert len(snapshot.code_range("HIST 1001")) == 0
+
+    comp = snapshot.subject_range("comp")
+    assert {c.course_code.split()[0] for c in snapshot.courses(comp)} == {"COMP"}
+    rows = snapshot.filter(subjects=["MATH"], codes=["COMP 1405", "MATH 1007"])
+    assert list(rows) == sorted(set(snapshot.subject_range("MATH")) | set(snapshot.code_range("COMP 1405")))
+    assert len(snapshot.filter()) == len(snapshot)
+    assert len(snapshot.filter(subjects=[])) == 0
+
+
+def test_links_match_the_courses(snapshot, sample_courses):
+    assert snapshot.links().to_dict() == SectionLinks.from_courses(sample_courses).to_dict()
+    comp = snapshot.links(subjects=["COMP"]).to_dict()
+    assert comp and all(code.startswith("COMP") for code in comp)
+
+
+def test_snapshots_without_links_rebuild_them(snapshot):
+    meta_path = os.path.join(snapshot.path, "meta.json")
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    del meta["links"]
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    assert CatalogSnapshot(snapshot.path).links().to_dict() == snapshot.links().to_dict()
+
+
+def test_unknown_versions_are_rejected(tmp_path):
+    write_snapshot(str(tmp_path), [])
+    meta_path = tmp_path / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    assert meta["sections"] == 0 and len(CatalogSnapshot(str(tmp_path))) == 0
+    meta_path.write_text(json.dumps({**meta, "version": 99}))
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        CatalogSnapshot(str(tmp_path))
@@ -0,0 +1,59 @@
+from conftest import section
+from course_planner import (
+    COMPACT_CONTEXT_LEGEND,
+    context_token_report,
+    decode_courses_compact,
+    encode_courses_compact,
+)
+
+
+def _key(course):
+    return (course.course_code, course.section, course.crn)
+
+
+def _assert_round_trip(courses):
+    decoded = decode_courses_compact(encode_courses_compact(courses))
+    assert sorted(decoded, key=_key) == sorted(courses, key=_key)
+
+
+def test_sample_catalogue_round_trips(sample_courses):
+    _assert_round_trip(sample_courses)
+
+
+def test_tutorials_are_nested_under_their_lecture_with_shared_fields_elided():
+    lecture = section("COMP 1405", "A", "Mon Wed", "10:05", "11:25", crn="100",
+                      links="COMP 1405 A1 or A2")
+    courses = [
+        lecture,
+        section("COMP 1405", "A1", "Fri", "09:05", "10:25", crn="101", links="COMP 1405 A"),
+        section("COMP 1405", "A2", "Fri", "11:05", "12:25", crn="102", links="COMP 1405 A",
+                instructor="John Roe"),
+    ]
+    text = encode_courses_compact(courses)
+    lines = text.splitlines()
+    assert lines[0] == COMPACT_CONTEXT_LEGEND
+    assert lines[1] == "# COMP 1405|COMP 1405 title"
+    assert lines[2] == "100|A|Lecture|0.5|open|Mon Wed|10:05-11:25|Jane Doe|A1 or A2"
+    assert lines[3] == "  101|A1|Tutorial|0|^|Fri|09:05-10:25|^|A"
+    assert lines[4] == "  102|A2|Tutorial|0|^|Fri|11:05-12:25|John Roe|A"
+    _assert_round_trip(courses)
+
+
+def test_unusual_sections_round_trip():
+    courses = [
+        # A tutorial whose lecture is not in the list stays at the top level.
+        section("MATH 1007", "B3", "Tue", "13:05", "14:25", crn="200", links="MATH 1007 B"),
+        # Unscheduled sections, a different title and another course's link.
+        section("BIOL 1902", "V", crn="300", instructor="", status="full",
+                links="BIOL 1000 A"),
+        section("BIOL 1902", "W", "Thu", "08:35", "09:55", crn="301"),
+    ]
+    courses[2] = courses[2].model_copy(update={"course_title": "Seminar"})
+    _assert_round_trip(courses)
+
+
+def test_compact_encoding_is_smaller_than_markdown(sample_courses):
+    report = context_token_report(sample_courses)
+    assert report["sections"] == len(sample_courses)
+    assert report["compact"]["chars"] < report["markdown"]["chars"]
+    assert report["token_ratio"] > 1
@@ -0,0 +1,105 @@
+import pytest
+
+from conftest import SAMPLE_MANDATORY, section
+from course_planner import meeting_mask, solve_schedules
+from schedule_constraints import ScheduleConstraints, compile_special_request, filter_sections, mask_days
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("no classes on Friday", {"blocked_days": ["Fri"]}),
+    ("I want Mondays and Wednesdays off", {"blocked_days": ["Mon", "Wed"]}),
+    ("keep Friday free", {"blocked_days": ["Fri"]}),
+    ("I'd like to be off on Thursdays", {"blocked_days": ["Thu"]}),
+    ("I'm free on Mondays and Wednesdays", {}),
+    ("I have Fridays off from work", {}),
+    ("nothing on the weekend", {}),
+    ("avoid weekends", {"blocked_days": ["Sat", "Sun"]}),
+    ("I don't want classes on Tuesday", {"blocked_days": ["Tue"]}),
+    ("I don’t want classes on Tuesday", {"blocked_days": ["Tue"]}),
+    ("i do not want any classes on tuesdays or thursdays", {"blocked_days": ["Tue", "Thu"]}),
+    ("I dont want to have class on Monday", {"blocked_days": ["Mon"]}),
+    ("I can't do Fridays", {"blocked_days": ["Fri"]}),
+    ("I'd rather not come in on Wednesday", {"blocked_days": ["Wed"]}),
+    ("no Friday classes", {"blocked_days": ["Fri"]}),
+    ("I work on Mondays", {"blocked_days": ["Mon"]}),
+    ("I'm busy Thursdays", {"blocked_days": ["Thu"]}),
+    ("I don't mind Mondays", {}),
+    ("I can't wait for Friday", {}),
+    ("nothing before 10am", {"earliest_start": "10:00"}),
+    ("no mornings please", {"earliest_start": "12:00"}),
+    ("I like to sleep in", {"earliest_start": "10:00"}),
+    ("done by 4", {"latest_end": "16:00"}),
+    ("no classes after 5:30 pm", {"latest_end": "17:30"}),
+    ("no evenings", {"latest_end": "18:00"}),
+    ("at most 3 days on campus", {"max_campus_days": 3}),
+    ("only two days a week", {"max_campus_days": 2}),
+    ("not with professor Smith", {"forbidden_instructors": ["smith"]}),
+    ("I'd prefer professor Collier", {"preferred_instructors": ["collier"]}),
+    ("taught by Alina Shaikhet if possible", {"preferred_instructors": ["alina shaikhet"]}),
+    ("", {}),
+    ("make it a good semester", {}),
+])
+def test_compile_special_request(text, expected):
+    assert compile_special_request(text) == ScheduleConstraints(**expected)
+
+
+def test_combined_request():
+    constraints = compile_special_request(
+        "No classes on Friday, nothing before 10am, not with professor Smith, max 4 days"
+    )
+    assert constraints == ScheduleConstraints(
+        blocked_days=["Fri"], earliest_start="10:00", max_campus_days=4, forbidden_instructors=["smith"],
+    )
+
+
+def test_compiled_constraints_are_not_shared():
+    first = compile_special_request("no classes on friday")
+    first.blocked_days.append("Mon")
+    assert compile_special_request("No classes on  Friday").blocked_days == ["Fri"]
+
+
+def test_filter_sections_drops_violations_and_orphaned_lectures():
+    courses = [
+        section("CHEM 1001", "A", "Mon", "10:05", "11:25", links="CHEM 1001 A1"),
+        section("CHEM 1001", "A1", "Fri", "10:05", "11:25", links="CHEM 1001 A"),
+        section("CHEM 1001", "B", "Tue", "08:35", "09:55"),
+        section("CHEM 1001", "C", "Wed", "13:05", "14:25", instructor="John Smith"),
+        section("CHEM 1001", "D", "Thu", "13:05", "14:25"),
+        section("CHEM 1001", "E"),   # online: no meeting time
+    ]
+    constraints = compile_special_request("no classes on friday, nothing before 10, not with professor smith")
+    kept = [c.section for c in filter_sections(courses, constraints)]
+    assert kept == ["D", "E"]
+
+
+def test_filter_sections_puts_preferred_instructors_first():
+    courses = [
+        section("CHEM 1001", "A", "Mon", "10:05", "11:25"),
+        section("CHEM 1001", "B", "Tue", "10:05", "11:25", instructor="Robert Collier"),
+    ]
+    kept = filter_sections(courses, compile_special_request("prefer professor collier"))
+    assert [c.section for c in kept] == ["B", "A"]
+
+
+def test_mask_days():
+    assert mask_days(meeting_mask("Mon Wed", "10:05", "11:25")) == 0b101
+    assert mask_days(0) == 0
+
+
+def test_solver_applies_constraints(sample_courses):
+    unconstrained = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    no_fridays = solve_schedules(
+        sample_courses, SAMPLE_MANDATORY, [], constraints=compile_special_request("no fridays")
+    )
+    assert 0 < len(no_fridays.schedules) < len(unconstrained.schedules)
+    assert all("Fri" not in c.day for s in no_fridays.schedules for c in s.courses)
+
+    three_days = solve_schedules(
+        sample_courses, SAMPLE_MANDATORY, [], constraints=compile_special_request("at most 3 days on campus")
+    )
+    assert three_days.schedules
+    for schedule in three_days.schedules:
+        days = 0
+        for course in schedule.courses:
+            days |= mask_days(course.meeting_mask)
+        assert bin(days).count("1") <= 3
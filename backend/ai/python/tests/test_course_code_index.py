@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import FakeGroq
+from course_code_index import CourseCodeIndex
+from course_planner import course_codes_messages, get_course_codes
+
+CODES = ["COMP 1405", "COMP 1406", "COMP 1805", "COMP 2402", "MATH 1007", "BIOL 1902", "STAT 1405"]
+
+
+@pytest.fixture
+def index():
+    return CourseCodeIndex(CODES)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("comp fourteen oh five", ["COMP 1405"]),
+    ("comp one four oh five", ["COMP 1405"]),
+    ("comp fourteen hundred and five", ["COMP 1405"]),
+    ("I want comp fourteen oh five and math ten oh seven", ["COMP 1405", "MATH 1007"]),
+    ("biology nineteen oh two", ["BIOL 1902"]),    # misheard subject, matched by trigrams
+    ("comp twenty four", ["COMP 2402"]),           # partial number, matched by prefix
+])
+def test_spoken_numbers_find_the_code(index, text, expected):
+    assert index.candidates(text) == expected
+
+
+def test_exact_matches_come_before_near_ones(index):
+    assert index.candidates("comp fourteen oh five and comp fourteen") == ["COMP 1405", "COMP 1406"]
+
+
+def test_a_number_without_a_subject_matches_every_subject(index):
+    assert index.candidates("fourteen oh five") == ["COMP 1405", "STAT 1405"]
+
+
+def test_membership_accepts_any_spelling(index):
+    assert "COMP 1405" in index and "comp1405" in index and "Comp 1405" in index
+    assert "COMP 9999" not in index
+
+
+def test_large_catalogues_only_prompt_the_candidates():
+    codes = [f"COMP {n}" for n in range(1000, 1100)] + ["COMP 1405"]
+    index = CourseCodeIndex(codes)
+    assert index.prompt_codes("comp fourteen oh five") == ["COMP 1405"]
+    assert CourseCodeIndex(CODES).prompt_codes("anything") == CODES
+    prompt = course_codes_messages("comp fourteen oh five", index)[0]["content"]
+    assert "COMP 1405" in prompt and "COMP 1050" not in prompt
+
+
+def test_model_spellings_are_answered_with_the_catalogue_spelling(index):
+    answer = (
+        '{"status": "success", "requested_input": "", "special_request": "",'
+        ' "mandatory": [{"course_code": "comp1405"}, {"course_code": "HIST 1001"}],'
+        ' "electives": [{"course_code": "math 1007"}]}'
+    )
+    result = get_course_codes(FakeGroq(answer), index, raw_text="comp fourteen oh five, maybe math ten oh seven")
+    assert [c.course_code for c in result.mandatory] == ["COMP 1405"]
+    assert [c.course_code for c in result.electives] == ["MATH 1007"]
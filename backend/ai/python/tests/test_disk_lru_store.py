@@ -0,0 +1,60 @@
+import os
+import threading
+
+from result_cache import DiskLRUStore
+
+
+def _files(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_concurrent_writes_to_one_key(tmp_path):
+    store = DiskLRUStore(str(tmp_path))
+    values = [str(n) * 1000 for n in range(10)]
+    errors = []
+
+    def write(value):
+        try:
+            for _ in range(20):
+                store.set("key", value)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(v,)) for v in values]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert store.get("key") in values
+    assert _files(tmp_path) == ["key"]
+    assert store._total == 1000
+
+
+def test_only_scans_when_over_the_limit(tmp_path, monkeypatch):
+    store = DiskLRUStore(str(tmp_path), max_bytes=100)
+    scans = []
+    original = store._entries
+    monkeypatch.setattr(store, "_entries", lambda: scans.append(1) or original())
+
+    for n in range(4):
+        store.set(f"k{n}", "x" * 20)
+    store.set("k0", "y" * 20)          # overwrite: total unchanged
+    assert store._total == 80 and scans == []
+
+    for n in range(4):
+        os.utime(tmp_path / f"k{n}", (n, n))
+    store.set("k4", "z" * 30)          # 110 > 100: evict the oldest
+    assert scans == [1]
+    assert _files(tmp_path) == ["k1", "k2", "k3", "k4"]
+    assert store._total == 90
+
+
+def test_existing_entries_count_towards_the_limit(tmp_path):
+    DiskLRUStore(str(tmp_path)).set("old", "x" * 60)
+    store = DiskLRUStore(str(tmp_path), max_bytes=100)
+    assert store._total == 60
+    os.utime(tmp_path / "old", (0, 0))
+    store.set("new", "y" * 60)
+    assert _files(tmp_path) == ["new"]
+    assert store.get("old") is None and store.get("new") == "y" * 60
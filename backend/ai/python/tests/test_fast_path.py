@@ -0,0 +1,69 @@
+import pytest
+
+from conftest import FakeGroq
+from course_code_fast_path import FAST_PATH_STATS, extract_course_codes_locally
+from course_code_index import CourseCodeIndex
+from course_planner import get_course_codes
+
+CODES = ["COMP 1405", "COMP 1805", "MATH 1007", "BIOL 1902"]
+ANSWER = (
+    '{"status": "success", "requested_input": "", "special_request": "",'
+    ' "mandatory": [{"course_code": "COMP 1405"}], "electives": []}'
+)
+
+
+def _codes(result):
+    return [c.course_code for c in result.mandatory], [c.course_code for c in result.electives]
+
+
+def test_optional_and_mandatory_switch_the_codes_after_them():
+    result = extract_course_codes_locally(
+        "I want comp1405 and COMP-1805, optionally math 1007, required BIOL 1902", CODES)
+    assert result.status == "success"
+    assert _codes(result) == (["COMP 1405", "COMP 1805", "BIOL 1902"], ["MATH 1007"])
+    assert result.requested_input.startswith("I want comp1405")
+
+
+def test_repeated_and_unknown_codes_are_ignored():
+    result = extract_course_codes_locally("COMP 1405, comp 1405 and HIST 1001", CODES)
+    assert _codes(result) == (["COMP 1405"], [])
+
+
+def test_special_requests_are_recognized():
+    result = extract_course_codes_locally(
+        "COMP 1405 and MATH 1007, no classes on Friday, nothing before 10am", CODES)
+    assert _codes(result) == (["COMP 1405", "MATH 1007"], [])
+    assert result.special_request == "no classes on Friday; nothing before 10am"
+
+
+def test_a_prebuilt_index_answers_with_the_catalogue_spelling():
+    index = CourseCodeIndex(["COMP1405", "MATH 1007"])
+    result = extract_course_codes_locally("comp 1405 and math1007", index)
+    assert _codes(result) == (["COMP1405", "MATH 1007"], [])
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "HIST 1001 please",                         # no allowed code
+    "COMP 1405 and maybe an elective",         # elective word with no code after it
+    "COMP 1405, optional",
+    "comp fourteen oh five",                    # spoken numbers need the model
+    "COMP 1405 or COMP 1805",                   # alternatives need the model
+    "COMP 1405 but only mornings",
+])
+def test_low_confidence_inputs_fall_back(query):
+    assert extract_course_codes_locally(query, CODES) is None
+
+
+def test_hits_and_fallbacks_are_counted(tracer):
+    hits, fallbacks = FAST_PATH_STATS.hits, FAST_PATH_STATS.fallbacks
+    local_client, model_client = FakeGroq(), FakeGroq(ANSWER)
+    assert get_course_codes(local_client, CODES, raw_text="COMP 1405").status == "success"
+    assert get_course_codes(model_client, CODES, raw_text="comp fourteen oh five").status == "success"
+
+    assert local_client.requests == []
+    assert len(model_client.calls("completion")) == 1
+    assert (FAST_PATH_STATS.hits - hits, FAST_PATH_STATS.fallbacks - fallbacks) == (1, 1)
+    metrics = tracer.export_prometheus()
+    assert 'course_planner_fast_path_hits_total{span="get_course_codes"} 1' in metrics
+    assert 'course_planner_fast_path_fallbacks_total{span="get_course_codes"} 1' in metrics
@@ -0,0 +1,37 @@
+from conftest import FIXTURES, FakeSession
+from course_planner import fetch_courses_for_departments, parse_course_search_html
+
+
+def _fetch(departments, session, **kwargs):
+    return fetch_courses_for_departments(departments, min_request_interval=0, session=session, **kwargs)
+
+
+def test_results_follow_the_requested_order_without_duplicates():
+    session = FakeSession()
+    results = _fetch(["MATH", "comp", "BIOL", "COMP", "math"], session, max_concurrency=3)
+    assert [r.department for r in results] == ["MATH", "COMP", "BIOL"]
+    assert sorted(session.posts) == ["BIOL", "COMP", "MATH"]
+    for result in results:
+        assert result.error is None
+        assert result.courses == parse_course_search_html(FIXTURES[result.department])
+
+
+def test_a_failing_department_is_reported_in_its_result():
+    results = _fetch(["COMP", "NOPE", "MATH"], FakeSession())
+    assert [r.department for r in results] == ["COMP", "NOPE", "MATH"]
+    failed = results[1]
+    assert failed.courses == [] and failed.error.startswith("HTTPError: 503")
+    assert results[0].courses and results[2].courses and results[0].error is results[2].error is None
+
+
+def test_a_given_session_is_shared_and_left_open():
+    session = FakeSession()
+    _fetch(sorted(FIXTURES), session, max_concurrency=4)
+    assert sorted(session.posts) == sorted(FIXTURES)
+    assert not session.closed
+
+
+def test_no_departments_makes_no_request():
+    session = FakeSession()
+    assert _fetch([], session) == []
+    assert session.posts == []
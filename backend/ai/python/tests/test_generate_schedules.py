@@ -0,0 +1,139 @@
+import asyncio
+from types import SimpleNamespace
+
+from conftest import SAMPLE_MANDATORY, SAMPLE_MARKDOWN, FakeGroq
+from course_planner import (
+    GenerateSchedulesResponse,
+    RequestedCourses,
+    generate_schedules,
+    generate_schedules_async,
+    solve_schedules,
+)
+
+
+def _schedules_json(sample_courses, count):
+    solved = solve_schedules(sample_courses, SAMPLE_MANDATORY, [], max_schedules=count)
+    return GenerateSchedulesResponse(
+        status="success", requested_courses=RequestedCourses(), special_requests=None, schedules=solved.schedules,
+    ).model_dump_json()
+
+
+def _generate(client, sample_courses, **kwargs):
+    return generate_schedules(
+        client, SAMPLE_MARKDOWN, SAMPLE_MANDATORY, [], None, courses=sample_courses, **kwargs
+    )
+
+
+def test_valid_answer_needs_no_repair(sample_courses):
+    client = FakeGroq(_schedules_json(sample_courses, 3))
+    result = _generate(client, sample_courses)
+    assert result.status == "success" and len(result.schedules) == 3
+    assert len(client.calls("completion")) == 1
+
+
+def test_repair_asks_only_for_the_missing_schedules(sample_courses):
+    client = FakeGroq(
+        _schedules_json(sample_courses, 2),
+        _schedules_json(sample_courses, 3),
+    )
+    result = _generate(client, sample_courses)
+    assert result.status == "success"
+    assert [s.schedule_id for s in result.schedules] == [1, 2, 3]
+    repair_prompt = client.calls("completion")[1]["messages"][1]["content"]
+    assert "only 1 more valid schedule" in repair_prompt
+
+
+def test_failed_repair_keeps_accepted_schedules(sample_courses):
+    client = FakeGroq(_schedules_json(sample_courses, 2), RuntimeError("429 Too Many Requests"))
+    result = _generate(client, sample_courses)
+    assert result.status == "success"
+    assert len(result.schedules) == 2
+    assert result.model_dump() == _generate(
+        FakeGroq(_schedules_json(sample_courses, 2)), sample_courses, validate=False
+    ).model_dump()
+
+
+def test_failed_first_call_is_an_error(sample_courses):
+    result = _generate(FakeGroq(RuntimeError("boom")), sample_courses)
+    assert result.status == "error" and result.schedules == []
+
+
+class FakeStream:
+    def __init__(self, text, fail_after=None, step=40):
+        self.pieces = [text[i:i + step] for i in range(0, len(text), step)]
+        self.fail_after = fail_after
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for n, piece in enumerate(self.pieces):
+            if self.fail_after is not None and n >= self.fail_after:
+                raise TimeoutError("stream stalled")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        pass
+
+
+def _generate_async(client, sample_courses, **kwargs):
+    delivered = []
+    result = asyncio.run(generate_schedules_async(
+        client, SAMPLE_MARKDOWN, SAMPLE_MANDATORY, [], None, courses=sample_courses,
+        on_schedule=delivered.append, **kwargs,
+    ))
+    return result, delivered
+
+
+def test_async_stream_failure_keeps_delivered_schedules(sample_courses):
+    text = _schedules_json(sample_courses, 3)
+    stream = FakeStream(text, fail_after=len(FakeStream(text).pieces) - 2)
+    result, delivered = _generate_async(FakeGroq(stream, asynchronous=True), sample_courses)
+    assert result.status == "success"
+    assert 0 < len(result.schedules) < 3
+    assert result.schedules == delivered
+
+
+def test_async_failed_repair_keeps_accepted_schedules(sample_courses):
+    client = FakeGroq(FakeStream(_schedules_json(sample_courses, 2)), RuntimeError("429"), asynchronous=True)
+    result, delivered = _generate_async(client, sample_courses)
+    assert result.status == "success"
+    assert len(result.schedules) == len(delivered) == 2
+
+
+def test_async_stream_failure_before_any_schedule_is_an_error(sample_courses):
+    stream = FakeStream(_schedules_json(sample_courses, 3), fail_after=1)
+    result, delivered = _generate_async(FakeGroq(stream, asynchronous=True), sample_courses)
+    assert result.status == "error" and delivered == []
+
+
+def test_async_repair_shares_the_timeout_with_the_stream(sample_courses):
+    # Each call fits in the timeout on its own, but not both together.
+    client = FakeGroq(
+        FakeStream(_schedules_json(sample_courses, 2)), _schedules_json(sample_courses, 3),
+        asynchronous=True, delay=0.3,
+    )
+    result, delivered = _generate_async(client, sample_courses, timeout=0.5)
+    assert result.status == "success"
+    assert len(result.schedules) == len(delivered) == 2
+
+
+def _spans(tracer):
+    return {span.name: span for span in tracer.finished}
+
+
+def test_sync_and_async_share_the_repair_loop(sample_courses, tracer):
+    _generate(FakeGroq(_schedules_json(sample_courses, 2), RuntimeError("429")), sample_courses)
+    sync_spans = _spans(tracer)
+    tracer.reset()
+    client = FakeGroq(FakeStream(_schedules_json(sample_courses, 2)), RuntimeError("429"), asynchronous=True)
+    _generate_async(client, sample_courses)
+    async_spans = _spans(tracer)
+
+    for spans in (sync_spans, async_spans):
+        assert {"schedule_context", "schedule_completion", "schedule_repair"} <= set(spans)
+        assert spans["schedule_repair"].error == "RuntimeError: 429"
+    repair_attributes = ("received", "accepted", "repair_rounds", "errors")
+    assert [sync_spans["schedule_validation"].attributes[a] for a in repair_attributes] == \
+        [async_spans["schedule_validation"].attributes[a] for a in repair_attributes] == [2, 2, 1, 1]
+    assert async_spans["schedule_completion"].attributes["schedules"] == 2
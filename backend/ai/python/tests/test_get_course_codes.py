@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from conftest import FakeGroq
+from course_planner import ResultCache, get_course_codes, get_course_codes_async
+
+CODES = ["COMP 1405", "COMP 1805", "MATH 1007"]
+ANSWER = (
+    '{"status": "success", "requested_input": "", "special_request": "no Friday classes",'
+    ' "mandatory": [{"course_code": "COMP 1405"}, {"course_code": "HIST 1001"}],'
+    ' "electives": [{"course_code": "MATH 1007"}]}'
+)
+
+
+def _both(**kwargs):
+    """
+    Runs get_course_codes and get_course_codes_async with the same arguments
+    and fresh fake clients; returns ((result, client), (result, client)).
+    """
+    sync_client, async_client = FakeGroq(ANSWER), FakeGroq(ANSWER, asynchronous=True)
+    sync_result = get_course_codes(sync_client, CODES, fast_path=False, **kwargs)
+    async_result = asyncio.run(get_course_codes_async(async_client, CODES, fast_path=False, **kwargs))
+    return (sync_result, sync_client), (async_result, async_client)
+
+
+def test_raw_text_is_extracted_and_filtered():
+    for result, client in _both(raw_text="  comp 1405, maybe math 1007  "):
+        assert result.status == "success"
+        assert result.requested_input == "comp 1405, maybe math 1007"
+        assert [c.course_code for c in result.mandatory] == ["COMP 1405"]
+        assert [c.course_code for c in result.electives] == ["MATH 1007"]
+        assert [kind for kind, _ in client.requests] == ["completion"]
+
+
+def test_audio_is_transcribed_once_per_recording(tmp_path):
+    audio = tmp_path / "request.wav"
+    audio.write_bytes(b"RIFF fake audio")
+    cache = ResultCache()
+    for result, client in _both(audio_file_path=str(audio), cache=cache):
+        assert result.status == "success"
+        assert result.requested_input == "I need comp 1405 and maybe math 1007"
+    # The async run reused the transcript and the extraction stored by the sync run.
+    (_, sync_client), (_, async_client) = _both(audio_file_path=str(audio), cache=cache)
+    assert sync_client.requests == async_client.requests == []
+
+
+@pytest.mark.parametrize("kwargs, requested_input", [
+    (dict(), "No input provided (neither audio nor raw text)."),
+    (dict(audio_file_path="/nonexistent/request.wav"), "File not found: /nonexistent/request.wav"),
+])
+def test_input_errors_match(kwargs, requested_input):
+    for result, client in _both(**kwargs):
+        assert result.status == "error"
+        assert result.requested_input == requested_input
+        assert client.requests == []
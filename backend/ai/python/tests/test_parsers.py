@@ -0,0 +1,40 @@
+import pytest
+
+from banner_fixtures import load_fixtures, render_course_search_html
+from conftest import FIXTURES, section, section_rows as _rows
+from course_planner import (
+    CompactSection,
+    HTML_PARSERS,
+    lxml_html,
+    parse_course_search_html,
+)
+
+
+def test_fixtures_are_present():
+    assert {"BIOL", "COMP", "MATH", "PSYC"} <= set(FIXTURES)
+
+
+@pytest.mark.skipif(lxml_html is None, reason="lxml not installed")
+def test_bs4_and_lxml_agree(page):
+    bs4 = parse_course_search_html(page, parser="bs4")
+    assert bs4
+    assert _rows(parse_course_search_html(page, parser="lxml")) == _rows(bs4)
+
+
+@pytest.mark.parametrize("parser", sorted(HTML_PARSERS))
+def test_compact_rows_match_schedule_courses(page, parser):
+    if parser == "lxml" and lxml_html is None:
+        pytest.skip("lxml not installed")
+    compact = parse_course_search_html(page, compact=True, parser=parser)
+    assert all(isinstance(c, CompactSection) for c in compact)
+    assert _rows(compact) == _rows(parse_course_search_html(page, parser=parser))
+
+
+def test_rendered_sections_round_trip():
+    courses = [
+        section("COMP 1405", "A", "Mon Wed", "10:05", "11:25", links="COMP 1405 A1 or A2", crn="11142"),
+        section("COMP 1405", "A1", "Thu", "11:35", "12:55", links="COMP 1405 A", crn="11143"),
+        section("BIOL 1902", "W", crn="10399", instructor="Mike Runtz & Co"),
+    ]
+    parsed = parse_course_search_html(render_course_search_html(courses), parser="bs4")
+    assert _rows(parsed) == _rows(courses)
@@ -0,0 +1,105 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from conftest import FakeGroq
+from course_planner import CourseCodeIndex
+from planner_service import BadRequest, PlannerService, WarmCatalog, make_server
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    directory = tmp_path / "uploads"
+    directory.mkdir()
+    (directory / "request.wav").write_bytes(b"RIFF upload")
+    (tmp_path / "secret.txt").write_text("not audio")
+    (directory / "escape.wav").symlink_to(tmp_path / "secret.txt")
+    return directory
+
+
+def _service(upload_dir=None):
+    catalog = WarmCatalog(cache=None)
+    return PlannerService(FakeGroq(transcript="mandatory COMP 1405"), CourseCodeIndex(["COMP 1405"]), catalog, upload_dir=upload_dir)
+
+
+def test_audio_path_is_refused_without_an_upload_dir(uploads):
+    service = _service()
+    with pytest.raises(BadRequest):
+        service.course_codes({"audio_path": str(uploads / "request.wav")})
+    assert service.client.requests == []
+
+
+@pytest.mark.parametrize("audio_path", ["../secret.txt", "escape.wav", "/etc/passwd"])
+def test_audio_path_must_stay_inside_the_upload_dir(uploads, audio_path):
+    service = _service(str(uploads))
+    with pytest.raises(BadRequest):
+        service.course_codes({"audio_path": audio_path})
+    assert service.client.requests == []
+
+
+@pytest.mark.parametrize("audio_path", ["request.wav", "{uploads}/request.wav"])
+def test_audio_path_inside_the_upload_dir_is_read(uploads, audio_path):
+    service = _service(str(uploads))
+    result = service.course_codes({"audio_path": audio_path.format(uploads=uploads)})
+    assert result.status == "success"
+    assert [c.course_code for c in result.mandatory] == ["COMP 1405"]
+    assert [r["file"][1] for r in service.client.calls("transcription")] == [b"RIFF upload"]
+
+
+def test_refused_audio_path_is_a_400(uploads):
+    server = make_server(_service(), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_address[1]}/course-codes",
+            data=json.dumps({"audio_path": "/etc/passwd"}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 400
+        assert "audio_base64" in json.loads(error.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_invalid_ranking_weights_are_refused():
+    with pytest.raises(BadRequest):
+        _service().schedules({"engine": "solver", "weights": {"campus_days": "many"}})
+
+
+def test_audio_path_is_ignored_when_raw_text_is_given():
+    service = _service()
+    result = service.course_codes({"raw_text": "mandatory COMP 1405", "audio_path": "/etc/passwd"})
+    assert result.status == "success"
+    assert service.client.requests == []
+
+
+@pytest.mark.parametrize("body", [
+    {"audio_base64": "not base64!"},
+    {"raw_text": ["COMP 1405"]},
+])
+def test_malformed_course_codes_input_is_refused(body):
+    with pytest.raises(BadRequest):
+        _service().course_codes(body)
+
+
+@pytest.mark.parametrize("key, value", [("top_k", "3"), ("top_k", 0), ("max_schedules", 2.5), ("max_schedules", True)])
+def test_schedule_counts_must_be_positive_integers(key, value):
+    with pytest.raises(BadRequest):
+        _service().schedules({"engine": "solver", key: value})
+
+
+def test_plan_uses_a_model_per_step():
+    answer = '{"status": "success", "requested_input": "", "special_request": "", "mandatory": [], "electives": []}'
+    service = _service()
+    service.client.answers = [answer, '{"status": "success", "schedules": []}']
+    service.plan({
+        "raw_text": "comp fourteen oh five", "extraction_model": "small-model", "schedule_model": "big-model",
+        "audio_base64": "ignored", "max_schedules": 2,
+    })
+    assert [r["model"] for r in service.client.calls("completion")] == ["small-model", "big-model"]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import planner_tracing
+from planner_tracing import NOOP_SPAN, Tracer, propagate_context, usage_attributes
+
+
+def test_spans_nest_and_record_attributes(tracer):
+    with tracer.span("outer", model="m") as outer:
+        with tracer.span("inner") as inner:
+            tracer.current().set(rows_parsed=3)
+        outer.set(status="success")
+
+    assert [s.name for s in tracer.finished] == ["inner", "outer"]
+    assert inner.parent_id == outer.span_id and inner.trace_id == outer.trace_id
+    assert outer.parent_id is None
+    assert inner.attributes == {"rows_parsed": 3}
+    assert outer.attributes == {"model": "m", "status": "success"}
+    assert outer.duration >= inner.duration >= 0
+    assert tracer.current() is NOOP_SPAN
+
+
+def test_errors_are_recorded_and_reraised(tracer):
+    with pytest.raises(RuntimeError):
+        with tracer.span("banner_request"):
+            raise RuntimeError("503")
+    [span] = tracer.finished
+    assert span.error == "RuntimeError: 503"
+
+
+def test_traced_records_the_result_status(tracer):
+    @tracer.traced("plan")
+    def plan():
+        return SimpleNamespace(status="error")
+
+    @tracer.traced()
+    async def plan_async():
+        tracer.current().set(prompt_tokens=5)
+        return SimpleNamespace(status="success")
+
+    plan()
+    asyncio.run(plan_async())
+    assert [(s.name, s.attributes) for s in tracer.finished] == [
+        ("plan", {"status": "error"}),
+        ("plan_async", {"prompt_tokens": 5, "status": "success"}),
+    ]
+
+
+def test_thread_pool_workers_see_the_parent_span(tracer):
+    with tracer.span("fetch") as parent, ThreadPoolExecutor(2) as pool:
+        def work(department):
+            with tracer.span("banner_request", department=department) as span:
+                return span.parent_id
+        parents = list(pool.map(propagate_context(work), ["COMP", "MATH"]))
+    assert parents == [parent.span_id] * 2
+
+
+def test_prometheus_output(tracer):
+    for tokens in (10, 5):
+        with tracer.span("extraction_completion", **usage_attributes(
+                SimpleNamespace(usage=SimpleNamespace(prompt_tokens=tokens, completion_tokens=1)))):
+            pass
+    with pytest.raises(ValueError):
+        with tracer.span("parse_html", rows_parsed=7):
+            raise ValueError
+
+    lines = tracer.export_prometheus().splitlines()
+    assert "# TYPE course_planner_span_duration_seconds histogram" in lines
+    assert 'course_planner_span_duration_seconds_count{span="extraction_completion"} 2' in lines
+    assert 'course_planner_span_duration_seconds_bucket{span="parse_html",le="+Inf"} 1' in lines
+    assert "# TYPE course_planner_prompt_tokens_total counter" in lines
+    assert 'course_planner_prompt_tokens_total{span="extraction_completion"} 15' in lines
+    assert 'course_planner_completion_tokens_total{span="extraction_completion"} 2' in lines
+    assert 'course_planner_rows_parsed_total{span="parse_html"} 7' in lines
+    assert 'course_planner_span_errors_total{span="parse_html"} 1' in lines
+    assert not any("extraction_completion" in line for line in lines if "errors" in line)
+
+    tracer.reset()
+    assert tracer.export_prometheus() == "" and not tracer.finished
+
+
+def test_jsonl_sink_and_metrics_file(tmp_path):
+    tracer = Tracer(enabled=True)
+    tracer.add_sink(planner_tracing.jsonl_sink(str(tmp_path / "spans.jsonl")))
+    with tracer.span("write_markdown", rows=2):
+        pass
+    [line] = (tmp_path / "spans.jsonl").read_text().splitlines()
+    record = json.loads(line)
+    assert record["name"] == "write_markdown" and record["attributes"] == {"rows": 2}
+    assert record["error"] is None and record["duration_s"] >= 0
+
+    assert tracer.write_metrics() is None
+    path = tracer.write_metrics(str(tmp_path / "metrics.prom"))
+    assert open(path).read() == tracer.export_prometheus()
+
+
+def test_disabled_tracer_is_a_no_op(monkeypatch):
+    tracer = Tracer(enabled=False)
+    calls = []
+    tracer.add_sink(calls.append)
+
+    @tracer.traced("plan")
+    def plan(x):
+        return x * 2
+
+    with tracer.span("outer", model="m") as span:
+        assert span is NOOP_SPAN and tracer.current() is NOOP_SPAN
+        span.set(rows_parsed=3)
+    assert plan(2) == 4
+    assert not tracer.finished and calls == [] and tracer.export_prometheus() == ""
+
+    monkeypatch.setattr(planner_tracing.TRACER, "enabled", False)
+    assert propagate_context(plan) is plan
+
+
+def test_configure_from_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(planner_tracing, "TRACER", Tracer())
+    monkeypatch.setenv("COURSE_PLANNER_TRACE", "1")
+    monkeypatch.setenv("COURSE_PLANNER_METRICS_FILE", str(tmp_path / "metrics.prom"))
+    tracer = planner_tracing.configure_from_env()
+    assert tracer.enabled and tracer.write_metrics() == str(tmp_path / "metrics.prom")
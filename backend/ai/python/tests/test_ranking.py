@@ -0,0 +1,50 @@
+import numpy as np
+
+from conftest import SAMPLE_MANDATORY, SAMPLE_MARKDOWN, section
+from course_planner import generate_schedules, solve_schedules
+from schedule_ranking import RankingWeights, ScheduleRanker, rank_schedules
+
+
+def _crns(response):
+    return [[c.crn for c in s.courses] for s in response.schedules]
+
+
+def test_solver_top_k_matches_rank_schedules(sample_courses):
+    everything = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    weights = RankingWeights(campus_days=90.0)
+    ranked = solve_schedules(sample_courses, SAMPLE_MANDATORY, [], top_k=5, weights=weights)
+    assert _crns(ranked) == _crns(rank_schedules(everything, 5, weights))
+    assert [s.schedule_id for s in ranked.schedules] == [1, 2, 3, 4, 5]
+
+
+def test_weights_without_top_k_reorder_every_schedule(sample_courses):
+    everything = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    ranked = solve_schedules(sample_courses, SAMPLE_MANDATORY, [], weights=RankingWeights())
+    assert len(ranked.schedules) == len(everything.schedules)
+    assert sorted(_crns(ranked)) == sorted(_crns(everything))
+
+
+def test_generate_schedules_solver_engine_passes_top_k(sample_courses):
+    result = generate_schedules(
+        None, SAMPLE_MARKDOWN, SAMPLE_MANDATORY, [], engine="solver", courses=sample_courses, top_k=3,
+    )
+    assert _crns(result) == _crns(solve_schedules(sample_courses, SAMPLE_MANDATORY, [], top_k=3))
+
+
+def test_top_k_ties_keep_candidate_order():
+    ranker = ScheduleRanker([section("COMP 1405", "A", "Mon", "10:05", "11:25")])
+    matrix = ranker.pack([[0]] * 50)      # 50 identical candidates, all tied
+    for k in (1, 7, 49, 50, 80):
+        best, scores = ranker.top_k(matrix, k)
+        assert best.tolist() == list(range(min(k, 50)))
+        assert np.all(scores == scores[0])
+
+
+def test_top_k_orders_by_score_then_position():
+    sections = [
+        section("COMP 1405", "A", "Mon", "08:35", "09:55"),   # early: penalised
+        section("COMP 1405", "B", "Mon", "10:05", "11:25"),
+    ]
+    ranker = ScheduleRanker(sections)
+    best, _ = ranker.top_k(ranker.pack([[0], [1], [0], [1]]), 3)
+    assert best.tolist() == [1, 3, 0]
@@ -0,0 +1,114 @@
+import pytest
+
+from conftest import SAMPLE_MANDATORY, section
+from course_planner import SingleSchedule, solve_schedules
+from schedule_validation import ScheduleValidator, SectionIndex
+
+
+@pytest.fixture
+def solved(sample_courses):
+    return solve_schedules(sample_courses, SAMPLE_MANDATORY, [], max_schedules=5).schedules
+
+
+@pytest.fixture
+def validator(sample_courses):
+    return ScheduleValidator(SectionIndex(sample_courses), SAMPLE_MANDATORY)
+
+
+def _crns(schedule):
+    return sorted(c.crn for c in schedule.courses)
+
+
+def _copy(schedule, courses):
+    return SingleSchedule(schedule_id=schedule.schedule_id, courses=courses)
+
+
+def test_valid_schedules_pass_unchanged(validator, solved):
+    accepted = [validator.accept(s) for s in solved]
+    assert [_crns(a) for a in accepted] == [_crns(s) for s in solved]
+    assert [a.schedule_id for a in accepted] == [1, 2, 3, 4, 5]
+    assert validator.report.accepted == 5 and validator.report.corrected == 0
+
+
+def test_duplicate_schedule_is_dropped(validator, solved):
+    assert validator.accept(solved[0]) is not None
+    assert validator.accept(solved[0]) is None
+    assert validator.report.dropped == {"duplicate_schedule": 1}
+
+
+def test_wrong_crn_is_corrected_by_code_and_section(validator, solved):
+    courses = [c.model_copy() for c in solved[0].courses]
+    courses[0] = courses[0].model_copy(update={"crn": "99999", "instructor": "Someone Else"})
+    accepted = validator.accept(_copy(solved[0], courses))
+    assert _crns(accepted) == _crns(solved[0])
+    assert validator.report.corrected == 1
+
+
+def test_invented_and_orphan_entries_are_removed(validator, solved, sample_courses):
+    extra = sample_courses[0].model_copy(update={"crn": "99999", "section": "ZZ"})
+    orphan = next(c for c in sample_courses if c.course_code == "COMP 1405" and c.section == "B1")
+    accepted = validator.accept(_copy(solved[0], list(solved[0].courses) + [extra, orphan]))
+    assert _crns(accepted) == _crns(solved[0])
+
+
+def test_missing_tutorial_is_filled_in(validator, solved):
+    courses = [c for c in solved[0].courses if not (c.course_code == "MATH 1007" and c.credits == 0)]
+    accepted = validator.accept(_copy(solved[0], courses))
+    assert _crns(accepted) == _crns(solved[0])
+    assert validator.report.corrected == 1
+
+
+def test_missing_mandatory_course_is_dropped(validator, solved):
+    courses = [c for c in solved[0].courses if c.course_code != "PSYC 1001"]
+    assert validator.accept(_copy(solved[0], courses)) is None
+    assert validator.report.dropped == {"missing_mandatory": 1}
+
+
+def test_time_conflict_is_dropped(validator, solved, sample_courses):
+    # COMP 1405 B (Mon Wed 16:05) overlaps the MATH 1007 GT tutorial (Wed 16:35).
+    lecture_b = next(c for c in sample_courses if c.course_code == "COMP 1405" and c.section == "B")
+    tutorial_b2 = next(c for c in sample_courses if c.course_code == "COMP 1405" and c.section == "B2")
+    courses = [c for c in solved[0].courses if c.course_code != "COMP 1405"] + [lecture_b, tutorial_b2]
+    assert validator.accept(_copy(solved[0], courses)) is None
+    assert validator.report.dropped == {"time_conflict": 1}
+
+
+def test_too_many_credits_is_dropped(sample_courses, solved):
+    validator = ScheduleValidator(SectionIndex(sample_courses), SAMPLE_MANDATORY, max_credits=2.0)
+    assert validator.accept(solved[0]) is None
+    assert validator.report.dropped == {"too_many_credits": 1}
+
+
+def test_accepted_crns_lists_accepted_schedules(validator, solved):
+    validator.accept(solved[0])
+    validator.accept(solved[1])
+    first, second = validator.accepted_crns().split("; ")
+    assert first.startswith("1:") and second.startswith("2:")
+    assert sorted(first[2:].split(",")) == _crns(solved[0])
+
+
+def test_sections_sharing_a_crn_are_kept_apart():
+    courses = [
+        section("COMP 1000", "A", "Mon", "10:05", "11:25", crn="30000"),
+        section("PSYC 1000", "A", "Tue", "10:05", "11:25", crn="30000"),
+        section("PSYC 1000", "B", "Wed", "10:05", "11:25", crn="30001"),
+    ]
+    validator = ScheduleValidator(SectionIndex(courses), ["COMP 1000", "PSYC 1000"])
+    first = validator.accept(SingleSchedule(schedule_id=1, courses=courses[:2]))
+    assert first is not None
+    assert [(c.course_code, c.section) for c in first.courses] == [("COMP 1000", "A"), ("PSYC 1000", "A")]
+    second = validator.accept(SingleSchedule(schedule_id=2, courses=[courses[0], courses[2]]))
+    assert second is not None
+    assert validator.report.dropped == {}
+
+
+def test_too_many_campus_days_is_dropped():
+    courses = [
+        section("COMP 1000", "A", "Mon Wed", "10:05", "11:25"),
+        section("PSYC 1000", "A", "Tue Thu", "10:05", "11:25"),
+        section("PSYC 1000", "B", "Mon Wed", "13:05", "14:25"),
+    ]
+    validator = ScheduleValidator(SectionIndex(courses), ["COMP 1000", "PSYC 1000"], max_campus_days=2)
+    assert validator.accept(SingleSchedule(schedule_id=1, courses=courses[:2])) is None
+    assert validator.accept(SingleSchedule(schedule_id=2, courses=[courses[0], courses[2]])) is not None
+    assert validator.report.dropped == {"too_many_days": 1}
@@ -0,0 +1,140 @@
+from itertools import combinations
+
+from conftest import SAMPLE_MANDATORY, section
+from course_planner import (
+    MAX_SCHEDULE_CREDITS,
+    CompactSection,
+    ScheduleCourse,
+    normalize_course_code,
+    solve_schedules,
+)
+from schedule_constraints import compile_special_request
+from schedule_validation import ScheduleValidator, SectionIndex
+from section_links import SectionLinks, is_primary_section
+
+
+def _assert_valid(schedule, courses, mandatory, max_credits=MAX_SCHEDULE_CREDITS):
+    links = SectionLinks.from_courses(courses)
+    for a, b in combinations(schedule.courses, 2):
+        assert not a.overlaps(b), (a.crn, b.crn)
+
+    lectures = [c for c in schedule.courses if is_primary_section(c)]
+    codes = [normalize_course_code(c.course_code) for c in lectures]
+    assert len(codes) == len(set(codes))
+    assert {normalize_course_code(c) for c in mandatory} <= set(codes)
+    assert sum(c.credits for c in lectures) <= max_credits + 1e-9
+
+    for lecture in lectures:
+        tutorials = [c for c in schedule.courses if not is_primary_section(c)
+                     and c.course_code == lecture.course_code]
+        if links.tutorials_of(lecture):
+            assert len(tutorials) == 1
+            assert links.linked(lecture, tutorials[0])
+        else:
+            assert tutorials == []
+
+
+def test_sample_schedules_are_valid(sample_courses):
+    result = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    assert result.status == "success"
+    assert len(result.schedules) == 129
+    assert [s.schedule_id for s in result.schedules] == list(range(1, 130))
+    for schedule in result.schedules:
+        _assert_valid(schedule, sample_courses, SAMPLE_MANDATORY)
+
+
+def test_schedules_are_distinct(sample_courses):
+    result = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    keys = {frozenset(c.crn for c in s.courses) for s in result.schedules}
+    assert len(keys) == len(result.schedules)
+
+
+def test_max_schedules_caps_output(sample_courses):
+    assert len(solve_schedules(sample_courses, SAMPLE_MANDATORY, [], max_schedules=3).schedules) == 3
+
+
+def test_credit_cap_limits_electives(sample_courses):
+    result = solve_schedules(sample_courses, ["COMP 1405"], ["COMP 1805", "MATH 1007"], max_credits=1.0)
+    assert result.status == "success"
+    for schedule in result.schedules:
+        _assert_valid(schedule, sample_courses, ["COMP 1405"], max_credits=1.0)
+    sizes = {len([c for c in s.courses if is_primary_section(c)]) for s in result.schedules}
+    assert sizes == {1, 2}
+
+
+def test_mandatory_courses_over_credit_cap_have_no_schedule(sample_courses):
+    assert solve_schedules(sample_courses, SAMPLE_MANDATORY, [], max_credits=1.0).schedules == []
+
+
+def test_unknown_mandatory_course_is_an_error(sample_courses):
+    assert solve_schedules(sample_courses, ["COMP 9999"], []).status == "error"
+
+
+def test_lecture_is_paired_with_exactly_one_linked_tutorial():
+    courses = [
+        section("CHEM 1001", "A", "Mon", "10:05", "11:25", links="CHEM 1001 A1 or A2"),
+        section("CHEM 1001", "A1", "Tue", "10:05", "11:25", links="CHEM 1001 A"),
+        section("CHEM 1001", "A2", "Mon", "10:35", "11:55", links="CHEM 1001 A"),   # overlaps the lecture
+        section("CHEM 1001", "B", "Wed", "10:05", "11:25"),
+        section("CHEM 1001", "B1", "Thu", "10:05", "11:25", links="CHEM 1001 B"),   # linked from its side only
+    ]
+    result = solve_schedules(courses, ["CHEM 1001"], [])
+    picked = sorted(tuple(c.section for c in s.courses) for s in result.schedules)
+    assert picked == [("A", "A1"), ("B", "B1")]
+
+
+def test_lecture_without_tutorials_is_taken_alone():
+    courses = [section("PHIL 1000", "A", "Mon", "10:05", "11:25")]
+    result = solve_schedules(courses, ["PHIL 1000"], [])
+    assert [[c.section for c in s.courses] for s in result.schedules] == [["A"]]
+
+
+def test_conflicting_mandatory_courses_have_no_schedule():
+    courses = [
+        section("PHIL 1000", "A", "Mon", "10:05", "11:25"),
+        section("HIST 1000", "A", "Mon", "11:00", "12:25"),
+    ]
+    assert solve_schedules(courses, ["PHIL 1000", "HIST 1000"], []).schedules == []
+
+
+def test_solver_is_deterministic(sample_courses):
+    first = solve_schedules(sample_courses, SAMPLE_MANDATORY, [])
+    second = solve_schedules(list(sample_courses), SAMPLE_MANDATORY, [])
+    assert first.model_dump() == second.model_dump()
+
+
+def _compact(courses):
+    return [CompactSection(**c.model_dump()) for c in courses]
+
+
+def test_compact_rows_solve_like_schedule_courses(sample_courses):
+    constraints = compile_special_request("no classes on friday")
+    for kwargs in (dict(), dict(constraints=constraints), dict(top_k=4)):
+        expected = solve_schedules(sample_courses, SAMPLE_MANDATORY, ["COMP 1805"], **kwargs)
+        result = solve_schedules(_compact(sample_courses), SAMPLE_MANDATORY, ["COMP 1805"], **kwargs)
+        assert result.model_dump() == expected.model_dump()
+        assert all(type(c) is ScheduleCourse for s in result.schedules for c in s.courses)
+
+
+def test_compact_rows_in_the_schedule_validator(sample_courses):
+    solved = solve_schedules(sample_courses, SAMPLE_MANDATORY, [], max_schedules=2).schedules
+    validator = ScheduleValidator(SectionIndex(_compact(sample_courses)), SAMPLE_MANDATORY)
+    accepted = [validator.accept(s) for s in solved]
+    assert [a.model_dump() for a in accepted] == [s.model_dump() for s in solved]
+
+
+def test_meeting_mask_follows_changed_times():
+    lecture = section("COMP 1405", "A", "Mon", "10:05", "11:25")
+    tutorial = section("COMP 1405", "A1", "Tue", "10:05", "11:25")
+    assert not lecture.overlaps(tutorial)
+    lecture.day = "Tue"
+    assert lecture.overlaps(tutorial)
+    moved = tutorial.model_copy(update={"start_time": "12:05", "end_time": "13:25"})
+    assert not lecture.overlaps(moved)
+    assert moved.meeting_mask == ScheduleCourse(**moved.model_dump()).meeting_mask
+
+
+def test_reading_the_mask_does_not_affect_equality():
+    first = section("COMP 1405", "A", "Mon", "10:05", "11:25", crn="1")
+    second = section("COMP 1405", "A", "Mon", "10:05", "11:25", crn="1")
+    assert first.meeting_mask and first == second
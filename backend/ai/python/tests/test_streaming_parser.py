@@ -0,0 +1,10 @@
+import pytest
+
+from conftest import section_rows as _rows
+from course_planner import iter_course_search_html, parse_course_search_html
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 512, 1 << 20])
+def test_streaming_parser_agrees_with_bs4(page, chunk_size):
+    chunks = (page[i:i + chunk_size] for i in range(0, len(page), chunk_size))
+    assert _rows(iter_course_search_html(chunks)) == _rows(parse_course_search_html(page, parser="bs4"))
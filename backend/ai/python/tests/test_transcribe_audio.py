@@ -0,0 +1,169 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import audio_preprocessing
+from audio_preprocessing import (
+    AudioChunk,
+    AudioPreprocessing,
+    AudioTranscriptionReport,
+    ffmpeg_binary,
+    transcribe_audio,
+    transcribe_audio_async,
+)
+from conftest import PYTHON_DIR, FakeGroq
+
+SAMPLES = [os.path.join(PYTHON_DIR, name) for name in ("test2.m4a", "test3.m4a")]
+
+
+class FakeTranscriber:
+    """
+    Groq / AsyncGroq stand-in whose transcription of chunk 'i' is texts[i],
+    returned after delays[i] seconds. Tracks how many requests overlap; with
+    'barrier' set, every request waits until that many are in flight.
+    """
+
+    def __init__(self, texts, delays=None, asynchronous=False, barrier=None):
+        self.texts = texts
+        self.delays = delays or [0.0] * len(texts)
+        self.barrier = barrier
+        self.in_flight = self.max_in_flight = 0
+        self.filenames = []
+        self._lock = threading.Lock()
+        self._arrived = 0
+        create = self._create_async if asynchronous else self._create
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=create))
+
+    def _start(self, request):
+        filename = request["file"][0]
+        with self._lock:
+            self.filenames.append(filename)
+            self.in_flight += 1
+            self._arrived += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return int(filename.split(".")[1])
+
+    def _finish(self, index):
+        with self._lock:
+            self.in_flight -= 1
+        return SimpleNamespace(text=self.texts[index])
+
+    def _create(self, **request):
+        index = self._start(request)
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        time.sleep(self.delays[index])
+        return self._finish(index)
+
+    async def _create_async(self, **request):
+        index = self._start(request)
+        if self.barrier:
+            async def everyone_arrived():
+                while self._arrived < self.barrier:
+                    await asyncio.sleep(0.001)
+            await asyncio.wait_for(everyone_arrived(), timeout=5)
+        await asyncio.sleep(self.delays[index])
+        return self._finish(index)
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    """
+    Makes preprocessing return 'count' chunks without running ffmpeg.
+    """
+    def use(count):
+        chunks = [
+            AudioChunk(index=i, start_seconds=i, end_seconds=i + 1, filename=f"talk.{i}.ogg", data=b"x" * (i + 1))
+            for i in range(count)
+        ]
+        report = AudioTranscriptionReport(
+            preprocessed=True, original_bytes=100, uploaded_bytes=sum(len(c.data) for c in chunks), chunks=count,
+        )
+        monkeypatch.setattr(audio_preprocessing, "preprocess_audio", lambda path, config: (chunks, report))
+    return use
+
+
+def _transcribe(client, config=None, asynchronous=False):
+    if asynchronous:
+        return asyncio.run(transcribe_audio_async(client, "talk.m4a", b"original", config=config))
+    return transcribe_audio(client, "talk.m4a", b"original", config=config)
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_chunks_are_stitched_in_order(chunked, asynchronous):
+    chunked(4)
+    # Later chunks answer first, and blank transcripts are dropped.
+    client = FakeTranscriber(["  I need comp", "1405", " ", "and math 1007 "], delays=[0.06, 0.04, 0.02, 0.0],
+                             asynchronous=asynchronous)
+    text, report = _transcribe(client, asynchronous=asynchronous)
+    assert text == "I need comp 1405 and math 1007"
+    assert report.chunks == 4 and report.preprocessed and report.transcription_seconds > 0
+    assert sorted(client.filenames) == [f"talk.{i}.ogg" for i in range(4)]
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_chunks_are_transcribed_concurrently(chunked, asynchronous):
+    chunked(3)
+    # Each request waits for the other two, so this only finishes when all three overlap.
+    barrier = 3 if asynchronous else threading.Barrier(3)
+    client = FakeTranscriber(["a", "b", "c"], asynchronous=asynchronous, barrier=barrier)
+    text, _ = _transcribe(client, AudioPreprocessing(max_concurrency=3), asynchronous)
+    assert text == "a b c"
+    assert client.max_in_flight == 3
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_concurrency_is_limited_by_the_config(chunked, asynchronous):
+    chunked(6)
+    client = FakeTranscriber(list("abcdef"), delays=[0.05] * 6, asynchronous=asynchronous)
+    text, _ = _transcribe(client, AudioPreprocessing(max_concurrency=2), asynchronous)
+    assert text == "a b c d e f"
+    assert client.max_in_flight == 2
+
+
+@pytest.mark.parametrize("ffmpeg", ["/nonexistent/ffmpeg", "false"])
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_without_a_usable_ffmpeg_the_original_is_uploaded(ffmpeg, asynchronous):
+    if ffmpeg == "false" and ffmpeg_binary("false") is None:
+        pytest.skip("no 'false' binary")
+    client = FakeGroq(transcript=" I need comp 1405 ", asynchronous=asynchronous)
+    config = AudioPreprocessing(ffmpeg=ffmpeg)
+    if asynchronous:
+        text, report = asyncio.run(transcribe_audio_async(client, "/tmp/talk.m4a", b"original", config=config))
+    else:
+        text, report = transcribe_audio(client, "/tmp/talk.m4a", b"original", config=config)
+
+    assert text == "I need comp 1405"
+    [request] = client.calls("transcription")
+    assert request["file"] == ("talk.m4a", b"original")
+    assert not report.preprocessed and report.chunks == 1
+    assert report.original_bytes == report.uploaded_bytes == len(b"original")
+    assert report.note.startswith("uploaded unprocessed: ")
+
+
+@pytest.mark.skipif(ffmpeg_binary() is None, reason="ffmpeg not installed")
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_sample_recordings_are_trimmed_split_and_reencoded(path):
+    with open(path, "rb") as f:
+        audio_bytes = f.read()
+    config = AudioPreprocessing(max_chunk_seconds=2.0)
+    client = FakeGroq(transcript="part")
+    text, report = transcribe_audio(client, path, audio_bytes, config=config)
+
+    assert report.preprocessed and report.note is None
+    assert report.original_bytes == len(audio_bytes)
+    assert report.chunks >= 1 and text == " ".join(["part"] * report.chunks)
+    assert 0 < report.processed_seconds <= report.original_seconds
+    uploads = [request["file"] for request in client.calls("transcription")]
+    assert sorted(name for name, _ in uploads) == sorted(
+        f"{os.path.splitext(os.path.basename(path))[0]}.{i}.ogg" for i in range(report.chunks))
+    assert report.uploaded_bytes == sum(len(data) for _, data in uploads)
+    assert all(data.startswith(b"OggS") for _, data in uploads)
+
+    chunks, _ = audio_preprocessing.preprocess_audio(path, config)
+    assert all(c.end_seconds - c.start_seconds <= config.max_chunk_seconds + 1e-6 for c in chunks)
+    assert all(a.end_seconds == pytest.approx(b.start_seconds) for a, b in zip(chunks, chunks[1:]))